@@ -1,18 +1,21 @@
 """Shared utilities for benchmark evaluation functions."""
-from typing import Any, Optional, Dict, List
+from typing import TYPE_CHECKING, Any, Optional, Dict, List
 from difflib import SequenceMatcher
-import numpy as np
 import re
-from sentence_transformers import SentenceTransformer
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-_model: Optional[SentenceTransformer] = None
 
+_model: Optional["SentenceTransformer"] = None
 
-def _get_model() -> SentenceTransformer:
-    """Get or initialize the PubMedBERT model."""
+
+def _get_model() -> "SentenceTransformer":
+    """Get or initialize the PubMedBERT model (imports torch on first use)."""
     global _model
     if _model is None:
+        from sentence_transformers import SentenceTransformer
+
         _model = SentenceTransformer("pritamdeka/S-PubMedBert-MS-MARCO")
     return _model
 
@@ -38,6 +41,12 @@ def semantic_similarity(gt_val: Any, pred_val: Any) -> float:
     pred_str = str(pred_val).strip()
     if gt_str == pred_str:
         return 1.0
+    # Imported on first use, to keep torch off the startup path, but outside
+    # the try: a missing or broken install must fail loudly rather than
+    # silently score every comparison with SequenceMatcher
+    import numpy as np
+    import sentence_transformers  # noqa: F401
+
     try:
         model = _get_model()
         embeddings = model.encode([gt_str, pred_str])
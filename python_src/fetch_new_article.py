@@ -18,7 +18,7 @@ from .markdown_fetcher.pubmed_downloader import PubMedDownloader
 from llm import generate_response, normalize_model
 from utils.prompt_manager import PromptManager
 from utils.citation_generator import generate_citations, CITATION_PROMPT_TEMPLATE
-from utils.normalization import normalize_output_file
+from utils.normalization import normalize_output_dict, write_output_file
 from utils.cost import CostTracker
 
 
@@ -182,40 +182,24 @@ async def get_annotation_from_markdown(
         output_dir = Path("public/data/annotations")
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save to temporary file for normalization
-        temp_file = output_dir / f"{pmcid}.json.tmp"
         final_file = output_dir / f"{pmcid}.json"
 
+        # Normalize terms in memory
+        logger.info("Normalizing terms in annotation...")
         try:
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(annotation_results, f, indent=2, ensure_ascii=False)
-
-            # Normalize terms
-            logger.info("Normalizing terms in annotation...")
-            normalization_success = normalize_output_file(str(temp_file), str(final_file), verbose=True)
-
-            if normalization_success and final_file.exists():
-                # Load normalized results
-                with open(final_file, "r") as f:
-                    final_results = json.load(f)
-                logger.info("Successfully normalized annotation")
-            else:
-                # If normalization failed, use the non-normalized version
-                logger.warning("Normalization failed, saving non-normalized version")
-                import shutil
-                shutil.copy2(temp_file, final_file)
-                final_results = annotation_results
-
-            logger.success(f"Successfully generated annotation. Cost: ${cost_tracker.total_cost_usd:.4f}")
-            logger.success(f"Annotation saved to: {final_file}")
-
-            return final_results
-
-        finally:
-            # Always clean up temp file
-            if temp_file.exists():
-                temp_file.unlink(missing_ok=True)
-                logger.debug(f"Cleaned up temp file: {temp_file}")
+            final_results = normalize_output_dict(annotation_results)
+            logger.info("Successfully normalized annotation")
+        except Exception as e:
+            # If normalization failed, use the non-normalized version
+            logger.warning(f"Normalization failed ({e}), saving non-normalized version")
+            final_results = annotation_results
+
+        write_output_file(final_results, final_file)
+
+        logger.success(f"Successfully generated annotation. Cost: ${cost_tracker.total_cost_usd:.4f}")
+        logger.success(f"Annotation saved to: {final_file}")
+
+        return final_results
 
     except Exception as e:
         logger.error(f"Failed to get annotation from markdown: {e}")
@@ -3,16 +3,35 @@ LLM interface using LiteLLM for multi-provider support.
 
 Supports OpenAI, Anthropic, Google Gemini, and 100+ other providers.
 Model names use provider prefix format: "openai/gpt-4o", "anthropic/claude-3-5-sonnet"
+
+"mock/..." models are answered offline by utils.mock_llm, for load and
+latency testing without API keys.
 """
 
+import asyncio
 import json
+import os
 import re
 from enum import Enum
-from typing import Union, Tuple
-import litellm
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Union
 from dotenv import load_dotenv
-
-from utils.cost import UsageInfo, extract_usage_from_response
+from loguru import logger
+
+from utils.cost import (
+    UsageInfo,
+    cached_usage,
+    calculate_cost,
+    extract_usage_from_response,
+)
+from utils.llm_cache import cache_enabled_by_default, get_llm_cache, make_cache_key
+from utils.llm_rate_limit import (
+    CHARS_PER_TOKEN,
+    estimate_tokens,
+    get_llm_rate_limiter,
+)
+from utils.llm_retry import get_llm_retry_handler
+from utils.mock_llm import MOCK_PROVIDER, get_mock_llm, record_fixture
 
 load_dotenv()
 
@@ -21,10 +40,21 @@ load_dotenv()
 # - ANTHROPIC_API_KEY
 # - GEMINI_API_KEY (for Google)
 
-# Enable client-side JSON validation for providers without native support
-litellm.enable_json_schema_validation = True
+_LITELLM = None
+
+
+def _get_litellm():
+    """Import and configure LiteLLM on first use; importing it takes seconds."""
+    global _LITELLM
+    if _LITELLM is None:
+        import litellm
+
+        # Enable client-side JSON validation for providers without native support
+        litellm.enable_json_schema_validation = True
 
-litellm.drop_params = True  # Drop unsupported params automatically
+        litellm.drop_params = True  # Drop unsupported params automatically
+        _LITELLM = litellm
+    return _LITELLM
 
 
 # DEPRECATED: Keep Model enum for backward compatibility
@@ -50,7 +80,11 @@ TEMPERATURE_OVERRIDES = {
 }
 
 # Providers that support OpenAI-style json_schema structured output
-PROVIDERS_WITH_NATIVE_JSON_SCHEMA = {"openai"}
+PROVIDERS_WITH_NATIVE_JSON_SCHEMA = {"openai", MOCK_PROVIDER}
+
+# Providers that only cache a prompt prefix marked with cache_control
+# (OpenAI and Gemini cache long identical prefixes automatically)
+PROVIDERS_WITH_CACHE_CONTROL = {"anthropic"}
 
 
 def normalize_model(model: str | Model) -> str:
@@ -91,50 +125,262 @@ def get_provider(model_str: str) -> str:
     return "openai"
 
 
+# Structural characters, and backslash escapes so escaped quotes are skipped
+_JSON_TOKEN = re.compile(r'\\.|[{}\[\]",]', re.DOTALL)
+_JSON_OPENER = re.compile(r"[{\[]")
+_JSON_CLOSERS = {"{": "}", "[": "]"}
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _scan_json_spans(
+    text: str,
+) -> Tuple[List[Tuple[int, int]], Optional[Tuple[int, int, str]]]:
+    """
+    Find balanced top-level {...} / [...] spans in one pass over text.
+
+    Returns:
+        ([(start, end), ...], truncated), where truncated is (start, cut,
+        closers) for a span still open at the end of the text: text[start:cut]
+        ends with a complete element of the outermost open array (or, with no
+        array open, a complete top-level member), and appending closers
+        closes every open bracket. None when there is no such span.
+    """
+    spans: List[Tuple[int, int]] = []
+    stack: List[str] = []
+    span_start = 0
+    in_string = False
+    # Last point in the open span where the JSON could be cut and closed
+    cut: Optional[Tuple[int, str]] = None
+    # Stack depth inside the outermost open array; cuts deeper than this
+    # would keep a partly written element
+    array_depth: Optional[int] = None
+
+    for match in _JSON_TOKEN.finditer(text):
+        token = match.group()
+        if in_string:
+            if token == '"':
+                in_string = False
+            continue
+        if token in _JSON_CLOSERS:
+            if not stack:
+                span_start = match.start()
+                cut = None
+                array_depth = None
+            stack.append(_JSON_CLOSERS[token])
+            if token == "[" and array_depth is None:
+                array_depth = len(stack)
+        elif not stack or len(token) > 1:
+            continue
+        elif token == '"':
+            in_string = True
+        elif token == ",":
+            if len(stack) <= (array_depth or 1):
+                cut = (match.start(), "".join(reversed(stack)))
+        elif token == stack[-1]:
+            cut_depth = array_depth or 1
+            stack.pop()
+            if array_depth is not None and len(stack) < array_depth:
+                array_depth = None
+            if not stack:
+                spans.append((span_start, match.end()))
+            elif len(stack) <= cut_depth:
+                cut = (match.end(), "".join(reversed(stack)))
+        else:
+            # Mismatched bracket: whatever this was, it isn't JSON
+            stack.clear()
+            array_depth = None
+
+    truncated = None
+    if stack and cut is not None:
+        truncated = (span_start, cut[0], cut[1])
+    return spans, truncated
+
+
 def extract_json_from_response(response_text: str) -> str:
     """
     Extract JSON from a response that may contain markdown code blocks or other text.
 
+    The usual response, one JSON value with or without a code fence or a
+    line of prose around it, is decoded directly from its first bracket.
+    Otherwise the text is scanned once for balanced top-level objects and
+    arrays (see _scan_json_spans) and the longest one that parses is
+    returned. A response cut off mid-JSON (e.g. at max_tokens) is recovered
+    by dropping the trailing incomplete element and closing the open
+    brackets, which keeps every complete annotation instead of failing the
+    whole response.
+
     Args:
         response_text: Raw response text from the model
 
     Returns:
-        Extracted JSON string
+        Extracted JSON string, or the stripped text if no JSON is found
     """
-    # Try to find JSON in markdown code blocks first
-    json_block_pattern = r"```(?:json)?\s*\n?([\s\S]*?)\n?```"
-    matches = re.findall(json_block_pattern, response_text)
-    if matches:
-        # Return the first valid JSON block
-        for match in matches:
-            try:
-                json.loads(match.strip())
-                return match.strip()
-            except json.JSONDecodeError:
-                continue
-
-    # Try to find JSON object/array directly
-    # Look for content starting with { or [
     response_text = response_text.strip()
-    if response_text.startswith("{") or response_text.startswith("["):
-        return response_text
 
-    # Try to extract JSON object from anywhere in the text
-    json_obj_pattern = r"(\{[\s\S]*\})"
-    obj_matches = re.findall(json_obj_pattern, response_text)
-    if obj_matches:
-        # Return the longest valid JSON match
-        for match in sorted(obj_matches, key=len, reverse=True):
+    first = _JSON_OPENER.search(response_text)
+    if first is None:
+        # Return original if no JSON found
+        return response_text
+    try:
+        _, end = _JSON_DECODER.raw_decode(response_text, first.start())
+    except (json.JSONDecodeError, RecursionError):
+        pass
+    else:
+        if _JSON_OPENER.search(response_text, end) is None:
+            return response_text[first.start() : end]
+
+    spans, truncated = _scan_json_spans(response_text)
+
+    best: Optional[str] = None
+    for start, end in sorted(spans, key=lambda span: span[0] - span[1]):
+        try:
+            _, parsed_end = _JSON_DECODER.raw_decode(response_text, start)
+        except (json.JSONDecodeError, RecursionError):
+            continue
+        if parsed_end == end:
+            best = response_text[start:end]
+            break
+
+    if truncated is not None:
+        start, cut, closers = truncated
+        if best is None or cut - start > len(best):
+            repaired = response_text[start:cut] + closers
             try:
-                json.loads(match)
-                return match
-            except json.JSONDecodeError:
-                continue
+                json.loads(repaired)
+            except (json.JSONDecodeError, RecursionError):
+                pass
+            else:
+                logger.warning(
+                    f"Recovered truncated JSON response: dropped "
+                    f"{len(response_text) - cut} trailing characters, "
+                    f"closed {len(closers)} brackets"
+                )
+                return repaired
+
+    if best is not None:
+        return best
 
     # Return original if no JSON found
     return response_text
 
 
+def json_schema_instruction(response_format: dict) -> str:
+    """Instruction asking providers without native structured output for schema-conformant JSON."""
+    schema_str = json.dumps(response_format, indent=2)
+    return f"""
+
+IMPORTANT: You must respond with valid JSON only. No other text before or after the JSON.
+Your response must conform to this JSON schema:
+```json
+{schema_str}
+```
+
+Respond with only the JSON object, no markdown code blocks or explanations."""
+
+
+def build_messages(
+    prompt: str,
+    text: str,
+    response_format: dict | None = None,
+    provider: str = "openai",
+) -> list[dict]:
+    """
+    Build the chat messages for a prompt and article text.
+
+    The article comes first, as its own content block, followed by the task
+    instructions (and, for providers without native structured output, the
+    JSON schema instruction). Every task run on the same article (var-pheno,
+    var-drug, var-fa, study-parameters, summary, citations) then starts with
+    the same tokens, so providers can serve the article from their prompt
+    cache. OpenAI and Gemini do this automatically for long identical
+    prefixes. For Anthropic the article block is marked with cache_control.
+
+    Args:
+        prompt: The task instructions
+        text: The article text (may be empty)
+        response_format: Optional JSON schema for structured output
+        provider: Provider name, as returned by get_provider
+
+    Returns:
+        A single user message: [article block, instruction block], or just the
+        instructions when there is no text
+    """
+    instructions = prompt
+    if response_format and provider not in PROVIDERS_WITH_NATIVE_JSON_SCHEMA:
+        # Anthropic, Gemini, etc. don't fully support OpenAI-style json_schema
+        # (issues with nullable types, null in enums, etc.)
+        instructions += json_schema_instruction(response_format)
+
+    if not text:
+        return [{"role": "user", "content": instructions}]
+
+    article_block = {"type": "text", "text": text}
+    if provider in PROVIDERS_WITH_CACHE_CONTROL:
+        article_block["cache_control"] = {"type": "ephemeral"}
+    return [
+        {
+            "role": "user",
+            "content": [article_block, {"type": "text", "text": instructions}],
+        }
+    ]
+
+
+def _chunk_text(chunk) -> str:
+    """Text delta of a streamed completion chunk (empty for e.g. the usage chunk)."""
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    delta = getattr(choices[0], "delta", None)
+    return getattr(delta, "content", None) or ""
+
+
+class LLMStream:
+    """
+    A streamed completion: async-iterate it for text deltas as they arrive.
+
+    Once the stream has been read to the end, `text` holds the full response
+    (JSON extracted for providers without native structured output, as
+    generate_response returns it) and `usage` its UsageInfo.
+    """
+
+    def __init__(self, deltas: Callable[["LLMStream"], AsyncIterator[str]]):
+        self.text: Optional[str] = None
+        self.usage: Optional[UsageInfo] = None
+        self._deltas = deltas(self)
+
+    @classmethod
+    def replay(cls, text: str, usage: UsageInfo) -> "LLMStream":
+        """A stream of an already complete response (e.g. a cache hit)."""
+
+        async def deltas(llm_stream: "LLMStream"):
+            llm_stream.text = text
+            llm_stream.usage = usage
+            yield text
+
+        return cls(deltas)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._deltas
+
+    async def read(self) -> str:
+        """Read the rest of the stream and return the full response text."""
+        async for _ in self._deltas:
+            pass
+        return self.text
+
+
+def _is_cacheable(response_text: str | None, response_format: dict | None) -> bool:
+    """Only cache complete answers: non-empty, and valid JSON when a schema was requested."""
+    if not response_text:
+        return False
+    if response_format:
+        try:
+            json.loads(response_text)
+        except (json.JSONDecodeError, RecursionError):
+            return False
+    return True
+
+
 async def generate_response(
     prompt: str,
     text: str,
@@ -143,7 +389,9 @@ async def generate_response(
     temperature: float = 0.0,
     max_tokens: int = 16384,
     return_usage: bool = False,
-) -> Union[str, Tuple[str, UsageInfo]]:
+    use_cache: bool | None = None,
+    stream: bool = False,
+) -> Union[str, Tuple[str, UsageInfo], "LLMStream"]:
     """
     Generate a response using LiteLLM (supports multiple providers).
 
@@ -159,9 +407,16 @@ async def generate_response(
                     Default 0.0 for reproducibility.
         max_tokens: Maximum tokens in the response. Default 16384 to prevent truncation.
         return_usage: If True, returns (response_text, UsageInfo) tuple for cost tracking.
+        use_cache: Serve identical requests from the LLM response cache (see
+                    utils/llm_cache.py). Defaults to the LLM_CACHE environment variable.
+                    Cache hits are reported as zero-cost UsageInfo with cache_hits=1.
+        stream: If True, returns an LLMStream of text deltas as they are generated;
+                    its text and usage are set once it has been read to the end.
+                    Only failures before the first delta are retried.
 
     Returns:
-        Generated response text, or (text, UsageInfo) tuple if return_usage=True
+        Generated response text, or (text, UsageInfo) tuple if return_usage=True,
+        or an LLMStream if stream=True
 
     Examples:
         # Using provider prefix (recommended)
@@ -172,6 +427,12 @@ async def generate_response(
 
         # Using enum (deprecated, for backward compatibility)
         response = await generate_response(prompt, text, Model.OPENAI_GPT_4O)
+
+        # Streaming
+        response = await generate_response(prompt, text, "gpt-4o", stream=True)
+        async for delta in response:
+            ...
+        print(response.text, response.usage)
     """
     # Normalize model to provider-prefixed format
     model_str = normalize_model(model)
@@ -181,53 +442,173 @@ async def generate_response(
     if model_str in TEMPERATURE_OVERRIDES:
         temperature = TEMPERATURE_OVERRIDES[model_str]
 
-    # Combine the prompt with the text
-    full_prompt = f"{prompt}\n\n{text}"
+    if use_cache is None:
+        use_cache = cache_enabled_by_default()
+    cache_key = None
+    if use_cache:
+        cache_key = make_cache_key(
+            model_str, prompt, text, response_format, temperature, max_tokens
+        )
+        cached = await asyncio.to_thread(get_llm_cache().get, cache_key)
+        if cached is not None:
+            response_text, original_usage = cached
+            if stream:
+                return LLMStream.replay(response_text, cached_usage(original_usage))
+            if return_usage:
+                return response_text, cached_usage(original_usage)
+            return response_text
 
     params = {
         "model": model_str,
-        "messages": [{"role": "user", "content": full_prompt}],
+        "messages": build_messages(prompt, text, response_format, provider),
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
 
-    # Handle structured output based on provider capabilities
-    if response_format:
-        if provider in PROVIDERS_WITH_NATIVE_JSON_SCHEMA:
-            # OpenAI supports native json_schema structured output
-            params["response_format"] = {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "response",
-                    "schema": response_format,
-                },
-            }
-        else:
-            # For Anthropic, Gemini, etc. - add JSON instruction to prompt
-            # These providers don't fully support OpenAI-style json_schema
-            # (issues with nullable types, null in enums, etc.)
-            schema_str = json.dumps(response_format, indent=2)
-            json_instruction = f"""
-
-IMPORTANT: You must respond with valid JSON only. No other text before or after the JSON.
-Your response must conform to this JSON schema:
-```json
-{schema_str}
-```
-
-Respond with only the JSON object, no markdown code blocks or explanations."""
+    # OpenAI supports native json_schema structured output; other providers
+    # get the schema as an instruction (see build_messages)
+    if response_format and provider in PROVIDERS_WITH_NATIVE_JSON_SCHEMA:
+        params["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "response",
+                "schema": response_format,
+            },
+        }
+
+    # Retries are handled below, with a shared budget and circuit breaker
+    params["max_retries"] = 0
+
+    rate_limiter = get_llm_rate_limiter()
+    estimated_tokens = estimate_tokens(params["messages"])
+    # Reserve room for the whole completion; settle() refunds what is unused
+    reserved_tokens = estimated_tokens + max_tokens
+    rate_limiter.check_fits(model_str, reserved_tokens)
+    if provider == MOCK_PROVIDER:
+        acompletion = get_mock_llm().acompletion
+    else:
+        acompletion = _get_litellm().acompletion
+
+    record_path = os.getenv("MOCK_LLM_RECORD")
+    if provider == MOCK_PROVIDER:
+        record_path = None
+
+    async def finish(response_text: str, usage_info: UsageInfo) -> str:
+        # For non-OpenAI providers with response_format, extract JSON from response
+        if response_format and provider not in PROVIDERS_WITH_NATIVE_JSON_SCHEMA:
+            response_text = extract_json_from_response(response_text)
+
+        if record_path:
+            # Keyed as the same request to a mock model will be, for offline replay
+            await asyncio.to_thread(
+                record_fixture,
+                record_path,
+                build_messages(prompt, text, response_format, MOCK_PROVIDER),
+                response_format,
+                response_text,
+                usage_info,
+            )
+
+        if cache_key is not None and _is_cacheable(response_text, response_format):
+            await asyncio.to_thread(
+                get_llm_cache().set, cache_key, model_str, response_text, usage_info
+            )
+        return response_text
 
-            params["messages"][0]["content"] = full_prompt + json_instruction
+    if stream:
+        params["stream"] = True
+        params["stream_options"] = {"include_usage": True}
 
-    response = await litellm.acompletion(**params)
-    response_text = response.choices[0].message.content
+        async def open_stream():
+            # Read the first chunk here, so errors before any output is
+            # returned (429s, timeouts) are retried like any other call
+            reservation = await rate_limiter.acquire(model_str, reserved_tokens)
+            try:
+                chunks = (await acompletion(**params)).__aiter__()
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    first = None
+            except Exception:
+                rate_limiter.settle(reservation, estimated_tokens)
+                raise
+            return reservation, first, chunks
+
+        async def deltas(llm_stream: LLMStream):
+            (reservation, chunk, chunks), call_stats = await get_llm_retry_handler().call(
+                provider, open_stream
+            )
+            parts = []
+            usage = None
+            try:
+                while chunk is not None:
+                    usage = getattr(chunk, "usage", None) or usage
+                    delta = _chunk_text(chunk)
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        chunk = None
+            except BaseException:
+                # Broken or abandoned stream: charge what was generated so far
+                rate_limiter.settle(
+                    reservation,
+                    estimated_tokens + len("".join(parts)) // CHARS_PER_TOKEN,
+                )
+                raise
+            rate_limiter.settle(reservation, getattr(usage, "total_tokens", None))
+
+            response_text = "".join(parts)
+            if usage is not None:
+                usage_info = extract_usage_from_response(
+                    SimpleNamespace(usage=usage), model_str
+                )
+            else:
+                # Provider sent no usage chunk: estimate, so costs are not lost
+                completion_tokens = len(response_text) // CHARS_PER_TOKEN
+                usage_info = UsageInfo(
+                    prompt_tokens=estimated_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=estimated_tokens + completion_tokens,
+                    cost_usd=calculate_cost(
+                        model_str, estimated_tokens, completion_tokens
+                    ),
+                    model=model_str,
+                )
+            usage_info.retries = call_stats.retries
+            usage_info.retry_wait_s = call_stats.backoff_seconds
+            llm_stream.usage = usage_info
+            llm_stream.text = await finish(response_text, usage_info)
+
+        return LLMStream(deltas)
+
+    async def attempt():
+        # Every attempt waits for this model's shared request/token budget
+        reservation = await rate_limiter.acquire(model_str, reserved_tokens)
+        try:
+            response = await acompletion(**params)
+        except Exception:
+            rate_limiter.settle(reservation, estimated_tokens)
+            raise
+        rate_limiter.settle(
+            reservation,
+            getattr(getattr(response, "usage", None), "total_tokens", None),
+        )
+        return response
+
+    response, call_stats = await get_llm_retry_handler().call(provider, attempt)
+
+    usage_info = None
+    if return_usage or cache_key is not None or record_path:
+        usage_info = extract_usage_from_response(response, model_str)
+        usage_info.retries = call_stats.retries
+        usage_info.retry_wait_s = call_stats.backoff_seconds
 
-    # For non-OpenAI providers with response_format, extract JSON from response
-    if response_format and provider not in PROVIDERS_WITH_NATIVE_JSON_SCHEMA:
-        response_text = extract_json_from_response(response_text)
+    response_text = await finish(response.choices[0].message.content, usage_info)
 
     if return_usage:
-        usage_info = extract_usage_from_response(response, model_str)
         return response_text, usage_info
 
     return response_text
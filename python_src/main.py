@@ -2,7 +2,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from llm import Model, generate_response, normalize_model
+from llm import Model, generate_response, get_provider, normalize_model
 import asyncio
 import json
 import os
@@ -27,11 +27,16 @@ from utils.prompt_manager import PromptManager
 from utils.citation_generator import generate_citations
 from utils.output_manager import save_output, combine_outputs
 from utils.normalization import (
-    normalize_outputs_in_directory,
-    normalize_outputs_in_directory_async,
-    normalize_single_file_async,
+    normalize_output_dict_async,
+    normalize_output_dicts,
+    write_output_file,
 )
 from utils.cost import CostTracker, UsageInfo
+from utils.json_stream import ArrayElementStream
+from utils.mock_llm import MOCK_PROVIDER
+from term_normalization.cache import get_term_cache
+from term_normalization.batcher import get_term_batcher
+from term_normalization.term_lookup import TermType
 
 app = FastAPI()
 
@@ -93,6 +98,8 @@ class PipelineJob:
             "updated_at": self.updated_at,
             "total_cost_usd": round(self.total_cost_usd, 6),
             "cost_by_pmcid": {k: round(v, 6) for k, v in self.cost_by_pmcid.items()},
+            # Process-wide term cache counters and lookup latency by source
+            "term_cache": get_term_cache().stats(),
         }
 
 
@@ -105,6 +112,16 @@ class PipelineStartRequest(BaseModel):
     model: str = "gpt-4o-mini"
     concurrency: int = 3
     temperature: float = 0.0
+    # Normalize all outputs together after generation, resolving each unique
+    # term once, instead of normalizing each file as soon as it is generated
+    batch_normalization: bool = False
+    # Run per-file normalization in a pool of worker processes instead of
+    # threads, keeping CPU-bound fuzzy matching off the server's GIL
+    process_normalization: bool = False
+    # Stream extraction responses and start each annotation's citation call
+    # as soon as it has streamed in. Opt-in: citations started for annotations
+    # that do not survive the final parse are still billed
+    stream_citations: bool = False
 
 
 class PromptRequest(BaseModel):
@@ -159,6 +176,18 @@ class RunBestPromptsRequest(BaseModel):
     citation_prompt: str | None = None
 
 
+# Upper bound on distinct terms accepted by one /normalize/terms request
+MAX_NORMALIZE_TERMS = 5000
+
+# Annotation arrays that get a citation call per annotation
+CITATION_ANNOTATION_TYPES = ["var_pheno_ann", "var_drug_ann", "var_fa_ann"]
+
+
+class NormalizeTermsRequest(BaseModel):
+    variants: list[str] = []
+    drugs: list[str] = []
+
+
 @app.get("/healthcheck")
 async def healthcheck():
     return {"status": "ok"}
@@ -998,9 +1027,12 @@ async def process_single_pmcid(
     semaphore: asyncio.Semaphore,
     override_model: str | None = None,
     override_temperature: float | None = None,
+    stream_citations: bool = False,
 ) -> tuple[str, dict, CostTracker]:
     """
     Process a single PMCID with all prompts.
+    With stream_citations, extraction responses are streamed and each
+    annotation's citation call starts as soon as that annotation is complete.
     Returns (pmcid, results_dict, cost_tracker)
     """
     async with semaphore:
@@ -1011,6 +1043,32 @@ async def process_single_pmcid(
         with open(md_path, "r") as f:
             text = f.read()
 
+        from utils.citation_generator import CITATION_PROMPT_TEMPLATE
+
+        # Always use GPT-4o-mini for citations (cost-optimized); mock runs
+        # stay offline
+        citation_model = "openai/gpt-4o-mini"
+        if override_model:
+            if get_provider(normalize_model(override_model)) == MOCK_PROVIDER:
+                citation_model = override_model
+
+        # Citation calls started while extraction is still streaming, keyed by
+        # (ann_type, index), with the annotation each was started for
+        early_citations: dict[tuple[str, int], tuple[dict, asyncio.Future]] = {}
+
+        def start_citation(ann_type: str, index: int, annotation: dict) -> asyncio.Future:
+            return asyncio.ensure_future(
+                generate_single_citation(
+                    ann_type,
+                    index,
+                    annotation,
+                    text,
+                    CITATION_PROMPT_TEMPLATE,
+                    citation_model,
+                    track_cost=True,
+                )
+            )
+
         # Run all prompts in parallel for this PMCID
         async def run_prompt(
             task: str, prompt_data: dict
@@ -1030,15 +1088,36 @@ async def process_single_pmcid(
                     else prompt_data.get("temperature", 0.0)
                 )
 
-                result = await generate_response(
-                    prompt=prompt_data["prompt"],
-                    text=text,
-                    model=model,
-                    response_format=prompt_data.get("response_format"),
-                    temperature=temperature,
-                    return_usage=True,
-                )
-                output, usage_info = result
+                if stream_citations:
+                    # Start each annotation's citation call as soon as the
+                    # annotation has streamed in, not after the whole response
+                    response = await generate_response(
+                        prompt=prompt_data["prompt"],
+                        text=text,
+                        model=model,
+                        response_format=prompt_data.get("response_format"),
+                        temperature=temperature,
+                        stream=True,
+                    )
+                    parser = ArrayElementStream(CITATION_ANNOTATION_TYPES)
+                    async for delta in response:
+                        for ann_type, index, annotation in parser.feed(delta):
+                            if isinstance(annotation, dict):
+                                early_citations[(ann_type, index)] = (
+                                    annotation,
+                                    start_citation(ann_type, index, annotation),
+                                )
+                    output, usage_info = response.text, response.usage
+                else:
+                    result = await generate_response(
+                        prompt=prompt_data["prompt"],
+                        text=text,
+                        model=model,
+                        response_format=prompt_data.get("response_format"),
+                        temperature=temperature,
+                        return_usage=True,
+                    )
+                    output, usage_info = result
 
                 try:
                     parsed_output = json.loads(output)
@@ -1069,34 +1148,34 @@ async def process_single_pmcid(
             if usage_info:
                 cost_tracker.add_usage(task, usage_info)
 
-        # Generate citations for annotations
-        from utils.citation_generator import CITATION_PROMPT_TEMPLATE
-
-        # Always use GPT-4o-mini for citations (cost-optimized)
-        citation_model = "openai/gpt-4o-mini"
-
+        # Generate citations for annotations, reusing the calls started while
+        # streaming when the final parse agrees with the streamed annotation
         citation_tasks = []
-        for ann_type in ["var_pheno_ann", "var_drug_ann", "var_fa_ann"]:
+        # Early calls whose annotation did not survive the final parse; they
+        # are awaited only for their cost, since they may already be billed
+        discarded_citations = []
+        for ann_type in CITATION_ANNOTATION_TYPES:
             if ann_type in pmcid_results and isinstance(pmcid_results[ann_type], list):
                 for i, annotation in enumerate(pmcid_results[ann_type]):
-                    citation_tasks.append(
-                        generate_single_citation(
-                            ann_type,
-                            i,
-                            annotation,
-                            text,
-                            CITATION_PROMPT_TEMPLATE,
-                            citation_model,
-                            track_cost=True,
-                        )
-                    )
-
-        if citation_tasks:
-            citation_results = await asyncio.gather(*citation_tasks)
-            for ann_type, index, citations, error, usage_info in citation_results:
-                pmcid_results[ann_type][index]["Citations"] = citations
-                if error:
-                    pmcid_results[ann_type][index]["Citation_Error"] = error
+                    streamed, future = early_citations.pop((ann_type, i), (None, None))
+                    if future is None or streamed != annotation:
+                        if future is not None:
+                            discarded_citations.append(future)
+                        future = start_citation(ann_type, i, annotation)
+                    citation_tasks.append(future)
+        discarded_citations += [future for _, future in early_citations.values()]
+
+        if citation_tasks or discarded_citations:
+            citation_results = await asyncio.gather(
+                *citation_tasks, *discarded_citations
+            )
+            for n, (ann_type, index, citations, error, usage_info) in enumerate(
+                citation_results
+            ):
+                if n < len(citation_tasks):
+                    pmcid_results[ann_type][index]["Citations"] = citations
+                    if error:
+                        pmcid_results[ann_type][index]["Citation_Error"] = error
                 if usage_info:
                     cost_tracker.add_usage("citations", usage_info)
 
@@ -1160,12 +1239,22 @@ async def run_pipeline_task(job: PipelineJob):
         override_model = normalize_model(override_model)
 
         override_temperature = job.config.get("temperature", 0.0)
+        batch_normalization = job.config.get("batch_normalization", False)
+        process_normalization = job.config.get("process_normalization", False)
+        stream_citations = job.config.get("stream_citations", False)
 
         job.add_message(f"Processing with concurrency: {concurrency}")
         job.add_message(
             f"Using model: {override_model}, temperature: {override_temperature}"
         )
-        job.add_message("Normalization will run concurrently with LLM generation")
+        if batch_normalization:
+            job.add_message("Normalization will run as one batch after LLM generation")
+        elif process_normalization:
+            job.add_message(
+                "Normalization will run concurrently with LLM generation in worker processes"
+            )
+        else:
+            job.add_message("Normalization will run concurrently with LLM generation")
 
         # Shared state for tracking
         all_outputs = {}
@@ -1187,6 +1276,7 @@ async def run_pipeline_task(job: PipelineJob):
                 semaphore,
                 override_model=override_model,
                 override_temperature=override_temperature,
+                stream_citations=stream_citations,
             )
 
             # Accumulate costs
@@ -1202,10 +1292,15 @@ async def run_pipeline_task(job: PipelineJob):
                 f"Generated {result_pmcid} ({completed_llm}/{total}) - Cost: {cost_str}"
             )
 
-            # Step 2: Kick off normalization immediately (don't await)
-            output_file = Path(output_dir) / f"{result_pmcid}.json"
-            norm_task = asyncio.create_task(normalize_single_file_async(output_file))
-            normalization_tasks.append((result_pmcid, norm_task))
+            # Step 2: Kick off normalization of the in-memory results (don't await)
+            if not batch_normalization:
+                output_file = Path(output_dir) / f"{result_pmcid}.json"
+                norm_task = asyncio.create_task(
+                    normalize_output_dict_async(
+                        results, output_file, use_processes=process_normalization
+                    )
+                )
+                normalization_tasks.append((result_pmcid, norm_task))
 
             return result_pmcid, results
 
@@ -1233,25 +1328,38 @@ async def run_pipeline_task(job: PipelineJob):
 
         # Wait for all normalization tasks to complete
         job.current_stage = "normalizing_terms"
-        job.add_message("Waiting for remaining normalization tasks...")
-
         normalized_count = 0
         failed_count = 0
 
+        if batch_normalization:
+            job.add_message("Normalizing all outputs in one batch...")
+            batch_results = await asyncio.to_thread(normalize_output_dicts, all_outputs)
+            for pmcid, (normalized_output, error) in batch_results.items():
+                if normalized_output is None:
+                    failed_count += 1
+                    job.add_message(f"Normalization failed for {pmcid}: {error}")
+                    continue
+                output_file = Path(output_dir) / f"{pmcid}.json"
+                await asyncio.to_thread(
+                    write_output_file, normalized_output, output_file
+                )
+                all_outputs[pmcid] = normalized_output
+                normalized_count += 1
+            # Progress: 50-85% for normalization
+            job.progress = 0.85
+        else:
+            job.add_message("Waiting for remaining normalization tasks...")
+
         for pmcid, norm_task in normalization_tasks:
             if job.cancelled:
                 job.add_message("Pipeline cancelled during normalization")
                 return
 
             try:
-                filename, success, error = await norm_task
+                all_outputs[pmcid] = await norm_task
                 completed_norm += 1
-                if success:
-                    normalized_count += 1
-                    job.add_message(f"Normalized {pmcid} ({completed_norm}/{total})")
-                else:
-                    failed_count += 1
-                    job.add_message(f"Normalization failed for {pmcid}: {error}")
+                normalized_count += 1
+                job.add_message(f"Normalized {pmcid} ({completed_norm}/{total})")
                 # Progress: 50-85% for normalization
                 job.progress = 0.5 + (completed_norm / total) * 0.35
             except Exception as e:
@@ -1260,13 +1368,6 @@ async def run_pipeline_task(job: PipelineJob):
                 job.add_message(f"Normalization error for {pmcid}: {e}")
                 job.progress = 0.5 + (completed_norm / total) * 0.35
 
-        # Reload normalized data
-        for pmcid in pmcids:
-            output_file = Path(output_dir) / f"{pmcid}.json"
-            if output_file.exists():
-                with open(output_file, "r") as f:
-                    all_outputs[pmcid] = json.load(f)
-
         job.add_message(
             f"Term normalization complete: {normalized_count} successful, {failed_count} failed"
         )
@@ -1381,6 +1482,9 @@ async def start_pipeline(request: PipelineStartRequest):
             "model": request.model,
             "concurrency": request.concurrency,
             "temperature": request.temperature,
+            "batch_normalization": request.batch_normalization,
+            "process_normalization": request.process_normalization,
+            "stream_citations": request.stream_citations,
         }
 
         job = PipelineJob(job_id, config)
@@ -1560,3 +1664,51 @@ async def get_pipeline_result(filename: str):
         raise HTTPException(status_code=500, detail="Invalid JSON file")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/normalize/terms")
+async def normalize_terms(request: NormalizeTermsRequest):
+    """
+    Normalize many variant and drug strings in one call.
+
+    Terms are deduped and queued on the shared micro-batcher, which merges
+    concurrent requests into single parallel resolution passes. Results are
+    streamed as NDJSON in completion order, one line per distinct term:
+    {"term": ..., "type": "variant"|"drug", "result": {...}|null, "error": str|null}
+    """
+    terms = [
+        (term, term_type)
+        for values, term_type in (
+            (request.variants, TermType.VARIANT),
+            (request.drugs, TermType.DRUG),
+        )
+        for term in dict.fromkeys(values)
+        if term.strip()
+    ]
+    if len(terms) > MAX_NORMALIZE_TERMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many terms ({len(terms)}); the limit is {MAX_NORMALIZE_TERMS}",
+        )
+
+    batcher = get_term_batcher()
+    futures = {batcher.submit(term, term_type): (term, term_type) for term, term_type in terms}
+
+    async def result_lines():
+        pending = set(futures)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                term, term_type = futures[future]
+                line = {"term": term, "type": term_type.value, "result": None, "error": None}
+                if future.cancelled():
+                    line["error"] = "lookup cancelled"
+                elif future.exception() is not None:
+                    line["error"] = str(future.exception())
+                elif future.result() is not None:
+                    line["result"] = future.result().to_dict()
+                yield json.dumps(line) + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
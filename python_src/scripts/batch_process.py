@@ -36,10 +36,7 @@ Annotation Details:
 - Finding: {sentence}
 - Notes: {notes}
 
-Article Text:
-{full_text}
-
-Please identify 1-3 direct quotes from the article that provide evidence for this annotation. Focus on quotes that mention:
+Please identify 1-3 direct quotes from the article above that provide evidence for this annotation. Focus on quotes that mention:
 1. The specific variant or haplotype
 2. The phenotype, outcome, or drug response
 3. Statistical significance or effect size
@@ -88,6 +85,8 @@ class BatchProcessor:
             "skipped": 0,
             "start_time": datetime.now(),
             "total_cost_usd": 0.0,
+            "llm_cache_hits": 0,
+            "saved_cost_usd": 0.0,
         }
 
     def setup_logging(self):
@@ -202,11 +201,12 @@ class BatchProcessor:
             if isinstance(response_format, str):
                 response_format = json.loads(response_format)
 
-            # Format prompt with article text or append article text if no placeholder
-            if "{article_text}" not in prompt["prompt"]:
-                formatted_prompt = f"{prompt['prompt']}\n\n{text}"
-            else:
-                formatted_prompt = prompt["prompt"].replace("{article_text}", text)
+            # The article is sent ahead of the prompt (see llm.build_messages) so
+            # all tasks on this article share a cacheable prefix; an
+            # {article_text} placeholder now points back at it
+            formatted_prompt = prompt["prompt"].replace(
+                "{article_text}", "(the article text is given above)"
+            )
 
             # Generate response with usage tracking
             self.logger.debug(
@@ -214,7 +214,7 @@ class BatchProcessor:
             )
             result = await generate_response(
                 prompt=formatted_prompt,
-                text="",
+                text=text,
                 model=model,
                 response_format=response_format,
                 temperature=prompt.get("temperature", 0.0),
@@ -373,6 +373,8 @@ class BatchProcessor:
 
                 self.stats["success"] += 1
                 self.stats["total_cost_usd"] += file_cost
+                self.stats["llm_cache_hits"] += cost_tracker.total_cache_hits
+                self.stats["saved_cost_usd"] += cost_tracker.total_saved_cost_usd
 
                 return {
                     "file": file_path.name,
@@ -445,6 +447,11 @@ class BatchProcessor:
         self.logger.info(f"Skipped: {self.stats['skipped']}")
         self.logger.info(f"Total duration: {duration:.1f}s")
         self.logger.info(f"Total API cost: ${self.stats['total_cost_usd']:.4f}")
+        if self.stats["llm_cache_hits"]:
+            self.logger.info(
+                f"LLM cache hits: {self.stats['llm_cache_hits']} "
+                f"(saved ${self.stats['saved_cost_usd']:.4f})"
+            )
 
         if self.stats["success"] > 0:
             avg_duration = (
@@ -521,8 +528,17 @@ def main():
         help="Skip files that already have output files",
     )
 
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Reuse cached responses for identical LLM requests (same as LLM_CACHE=1)",
+    )
+
     args = parser.parse_args()
 
+    if args.llm_cache:
+        os.environ["LLM_CACHE"] = "1"
+
     # Create and run processor
     processor = BatchProcessor(args)
 
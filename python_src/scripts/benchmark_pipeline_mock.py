@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Pipeline Load Benchmark (offline)
+
+Runs the pipeline's per-article stage (process_single_pmcid: every best
+prompt, then a citation call per annotation) over a set of articles against
+the mock LLM provider, and reports articles/sec, LLM calls/sec, p50/p95/p99
+article latency, retries and rate-limit waits. No API keys or network are
+needed; latency, errors and output size come from utils.mock_llm.
+
+    python scripts/benchmark_pipeline_mock.py --limit 50 --concurrency 8 \\
+        --latency lognormal:0.8,0.5 --rate-limit-rate 0.05
+
+Set --tokens-per-s to model generation time; compare with
+--stream-citations to see what starting citations mid-stream saves.
+
+Results are written as JSON (with the git commit) so runs can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config import MARKDOWN_DIR
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(
+    pmcids: List[str],
+    articles_dir: str,
+    model: str,
+    concurrency: int,
+    stream_citations: bool = False,
+) -> dict:
+    # Imported here so the MOCK_LLM_* settings are in place first
+    from main import process_single_pmcid
+    from utils.llm_rate_limit import get_llm_rate_limiter
+    from utils.llm_retry import get_llm_retry_handler
+    from utils.mock_llm import get_mock_llm
+    from utils.prompt_manager import PromptManager
+
+    prompt_details_map = PromptManager().get_best_prompts()
+    # Admission is limited here, so latency excludes the wait for a slot
+    slots = asyncio.Semaphore(concurrency)
+    unlimited = asyncio.Semaphore(len(pmcids))
+    latencies: List[float] = []
+    failed_tasks = 0
+    annotations = 0
+    retries = 0
+    retry_wait_s = 0.0
+
+    async def timed(pmcid: str, output_dir: str):
+        nonlocal failed_tasks, annotations, retries, retry_wait_s
+        async with slots:
+            t0 = time.perf_counter()
+            _, results, cost_tracker = await process_single_pmcid(
+                pmcid,
+                articles_dir,
+                output_dir,
+                prompt_details_map,
+                unlimited,
+                override_model=model,
+                stream_citations=stream_citations,
+            )
+            latencies.append(time.perf_counter() - t0)
+        failed_tasks += sum(
+            1
+            for task in prompt_details_map
+            if isinstance(results.get(task), dict) and "error" in results[task]
+        )
+        annotations += sum(
+            len(results.get(ann_type) or [])
+            for ann_type in ("var_pheno_ann", "var_drug_ann", "var_fa_ann")
+            if isinstance(results.get(ann_type), list)
+        )
+        retries += cost_tracker.total_retries
+        retry_wait_s += cost_tracker.total_retry_wait_s
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(pmcid, output_dir) for pmcid in pmcids))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    mock_stats = get_mock_llm().stats()
+    return {
+        "articles": len(pmcids),
+        "tasks_per_article": len(prompt_details_map),
+        "failed_tasks": failed_tasks,
+        "annotations": annotations,
+        "elapsed_s": round(elapsed, 3),
+        "articles_per_s": round(len(pmcids) / elapsed, 3) if elapsed else 0.0,
+        "llm_calls_per_s": round(mock_stats["calls"] / elapsed, 2) if elapsed else 0.0,
+        "article_latency_s": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "retries": retries,
+        "retry_wait_s": round(retry_wait_s, 3),
+        "mock": mock_stats,
+        "retry_handler": get_llm_retry_handler().stats(),
+        "rate_limiter": get_llm_rate_limiter().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark pipeline throughput and tail latency against the mock LLM."
+    )
+    parser.add_argument(
+        "--articles-dir",
+        type=str,
+        help="Directory of <PMCID>.md articles",
+        default=MARKDOWN_DIR,
+    )
+    parser.add_argument(
+        "--limit", type=int, help="Number of articles to run (default all)", default=None
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Run each article this many times, for larger loads (default 1)",
+        default=1,
+    )
+    parser.add_argument(
+        "--concurrency", type=int, help="Articles in flight (default 3)", default=3
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        help="Mock model (default mock/gpt-4o-mini)",
+        default="mock/gpt-4o-mini",
+    )
+    parser.add_argument(
+        "--latency", type=str, help="MOCK_LLM_LATENCY distribution", default=None
+    )
+    parser.add_argument(
+        "--tokens-per-s", type=float, help="MOCK_LLM_TOKENS_PER_S", default=None
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, help="MOCK_LLM_RATE_LIMIT_RATE", default=None
+    )
+    parser.add_argument(
+        "--timeout-rate", type=float, help="MOCK_LLM_TIMEOUT_RATE", default=None
+    )
+    parser.add_argument(
+        "--fixtures", type=str, help="MOCK_LLM_FIXTURES file or directory", default=None
+    )
+    parser.add_argument("--seed", type=int, default=0, help="MOCK_LLM_SEED")
+    parser.add_argument(
+        "--stream-citations",
+        action="store_true",
+        help="Stream extraction responses and start citations as annotations arrive",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Where to write the JSON results",
+        default=f"benchmark_results/pipeline_mock_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+    )
+    args = parser.parse_args()
+
+    if not args.model.startswith("mock/"):
+        print(f"✗ Not a mock model: {args.model}")
+        return 1
+    articles_dir = Path(args.articles_dir)
+    if not articles_dir.is_dir():
+        print(f"✗ Articles directory not found: {articles_dir}")
+        return 1
+    pmcids = sorted(p.stem for p in articles_dir.glob("*.md"))[: args.limit]
+    if not pmcids:
+        print(f"✗ No markdown files found in {articles_dir}")
+        return 1
+    pmcids = pmcids * args.repeat
+
+    for env, value in (
+        ("MOCK_LLM_LATENCY", args.latency),
+        ("MOCK_LLM_TOKENS_PER_S", args.tokens_per_s),
+        ("MOCK_LLM_RATE_LIMIT_RATE", args.rate_limit_rate),
+        ("MOCK_LLM_TIMEOUT_RATE", args.timeout_rate),
+        ("MOCK_LLM_FIXTURES", args.fixtures),
+        ("MOCK_LLM_SEED", args.seed),
+    ):
+        if value is not None:
+            os.environ[env] = str(value)
+
+    print(
+        f"Running {len(pmcids)} articles from {articles_dir} with {args.model}, "
+        f"concurrency {args.concurrency}"
+    )
+    run = asyncio.run(
+        run_benchmark(
+            pmcids,
+            str(articles_dir),
+            args.model,
+            args.concurrency,
+            stream_citations=args.stream_citations,
+        )
+    )
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": args.model,
+        "concurrency": args.concurrency,
+        "stream_citations": args.stream_citations,
+        **run,
+    }
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    latency = results["article_latency_s"]
+    print(
+        f"{results['articles_per_s']} articles/s, {results['llm_calls_per_s']} LLM calls/s, "
+        f"article latency p50 {latency['p50']}s p95 {latency['p95']}s "
+        f"p99 {latency['p99']}s, {results['retries']} retries, "
+        f"{results['failed_tasks']} failed tasks"
+    )
+    print(f"✓ Results saved to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
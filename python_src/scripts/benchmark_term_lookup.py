@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Term Lookup Throughput Benchmark
+
+Replays a realistic term corpus through VariantLookup.search and
+DrugLookup.search with the PharmGKB/RxNorm network calls stubbed out, and
+reports lookups/sec, p50/p99 latency, cache hit rates and peak RSS for a
+cold pass (empty term cache) and a warm pass (same corpus again).
+
+The corpus is every Variant/Haplotypes and Drug(s) value in the ground truth
+annotations, plus seeded synthetic perturbations of them: typos, case
+changes, spacing changes, and HGVS synonyms in place of rsIDs.
+
+Results are written as JSON (with the git commit) so runs can be compared:
+
+    python scripts/benchmark_term_lookup.py --output benchmark_results/terms_new.json \
+        --compare benchmark_results/terms_old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Benchmark the in-memory cache only; must be set before the cache is created
+os.environ["TERM_CACHE_PERSIST"] = "0"
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from term_normalization import drug_search, variant_search
+from term_normalization.cache import get_term_cache
+from term_normalization.term_lookup import (
+    ANNOTATION_TYPES,
+    NORMALIZED_FIELDS,
+    TermLookup,
+    TermType,
+)
+
+DEFAULT_CORPUS = "persistent_data/benchmark_annotations.json"
+
+Corpus = List[Tuple[str, TermType]]
+
+
+def load_corpus_terms(path: Path) -> Corpus:
+    """
+    Every variant and drug value in the annotations, in file order.
+
+    Args:
+        path: A ground truth file ({pmcid: annotations}) or a directory of
+            per-article annotation JSON files
+    """
+    if path.is_dir():
+        documents = [json.loads(p.read_text()) for p in sorted(path.glob("*.json"))]
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+        documents = list(data.values()) if isinstance(data, dict) else data
+
+    terms: Corpus = []
+    for annotations in documents:
+        if not isinstance(annotations, dict):
+            continue
+        for ann_type in ANNOTATION_TYPES:
+            for annotation in annotations.get(ann_type) or []:
+                for field, term_type, _ in NORMALIZED_FIELDS:
+                    value = annotation.get(field)
+                    if isinstance(value, str) and value.strip():
+                        terms.append((value, term_type))
+    return terms
+
+
+def load_hgvs_synonyms(data_dir: Path) -> Dict[str, List[str]]:
+    """rsID -> HGVS synonyms from variants.tsv, for HGVS-form perturbations."""
+    import pandas as pd
+
+    df = pd.read_csv(data_dir / "term_lookup_info" / "variants.tsv", sep="\t")
+    synonyms: Dict[str, List[str]] = {}
+    for name, values in zip(df["Variant Name"], df["Synonyms"]):
+        if isinstance(values, str):
+            hgvs = [s.strip() for s in values.split(",") if ":g." in s or ":c." in s]
+            if hgvs:
+                synonyms[str(name).lower()] = hgvs
+    return synonyms
+
+
+def _typo(term: str, rng: random.Random) -> str:
+    if len(term) < 4:
+        return term
+    i = rng.randrange(len(term))
+    return term[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") + term[i + 1 :]
+
+
+def _case(term: str, rng: random.Random) -> str:
+    return rng.choice([term.upper(), term.lower(), term.swapcase(), term.title()])
+
+
+def _spacing(term: str, rng: random.Random) -> str:
+    choice = rng.randrange(3)
+    if choice == 0:
+        return f"  {term} "
+    if choice == 1:
+        return term.replace("*", " *", 1) if "*" in term else term.replace(" ", "  ")
+    return term.replace(" ", "")
+
+
+def perturb_corpus(
+    terms: Corpus,
+    hgvs_synonyms: Dict[str, List[str]],
+    ratio: float,
+    seed: int,
+) -> Corpus:
+    """
+    Synthetic variants of corpus terms: ratio * len(terms) perturbed copies.
+
+    Variants that are rsIDs with a known HGVS synonym are sometimes replaced
+    by that synonym; everything else gets a typo, case or spacing change.
+    """
+    rng = random.Random(seed)
+    perturbed: Corpus = []
+    for _ in range(int(len(terms) * ratio)):
+        term, term_type = rng.choice(terms)
+        hgvs = hgvs_synonyms.get(term.strip().lower())
+        if term_type == TermType.VARIANT and hgvs and rng.random() < 0.5:
+            perturbed.append((rng.choice(hgvs), term_type))
+            continue
+        perturb = rng.choice([_typo, _case, _spacing])
+        perturbed.append((perturb(term, rng), term_type))
+    return perturbed
+
+
+def stub_network(latency_s: float = 0.0) -> None:
+    """Replace the PharmGKB/RxNorm calls with empty responses after latency_s."""
+
+    def no_variants(term: str, threshold: float = 0.8, top_k: int = 1):
+        if latency_s:
+            time.sleep(latency_s)
+        return []
+
+    def no_drug(drug_name: str):
+        if latency_s:
+            time.sleep(latency_s)
+        return None
+
+    variant_search.pgkb_rsid_search = no_variants
+    variant_search.pgkb_star_allele_search = no_variants
+    drug_search.rxnorm_search = no_drug
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_pass(lookup: TermLookup, terms: Corpus) -> dict:
+    """Search every term once and summarize throughput, latency and cache use."""
+    cache = get_term_cache()
+    before = cache.stats()
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    for term, term_type in terms:
+        t0 = time.perf_counter()
+        try:
+            lookup.search(term, term_type=term_type)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    after = cache.stats()
+
+    latencies.sort()
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "lookups": len(terms),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "lookups_per_s": round(len(terms) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(1000 * percentile(latencies, 50), 3),
+            "p99": round(1000 * percentile(latencies, 99), 3),
+            "max": round(1000 * latencies[-1], 3) if latencies else 0.0,
+        },
+        "cache": {
+            "hits": hits,
+            "misses": misses,
+            "negative_hits": after["negative_hits"] - before["negative_hits"],
+            # Exact name/synonym matches return before the cache is consulted
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    print(f"\n=== Compared with {baseline.get('commit') or 'baseline'} ===")
+    for phase in ("cold", "warm"):
+        new, old = results[phase], baseline.get(phase)
+        if not old:
+            continue
+        speedup = new["lookups_per_s"] / old["lookups_per_s"] if old["lookups_per_s"] else 0.0
+        print(
+            f"{phase}: {old['lookups_per_s']} -> {new['lookups_per_s']} lookups/s "
+            f"({speedup:.2f}x), p99 {old['latency_ms']['p99']} -> "
+            f"{new['latency_ms']['p99']} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark term lookup throughput on a replayed term corpus."
+    )
+    parser.add_argument(
+        "--corpus",
+        type=str,
+        help="Ground truth annotations file, or a directory of annotation JSON files",
+        default=DEFAULT_CORPUS,
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        help="Base data directory containing term_lookup_info/",
+        default="data",
+    )
+    parser.add_argument(
+        "--perturb-ratio",
+        type=float,
+        help="Perturbed terms added per corpus term (default 1.0)",
+        default=1.0,
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Perturbation seed")
+    parser.add_argument(
+        "--api-latency-ms",
+        type=float,
+        help="Simulated latency of each stubbed API call (default 0)",
+        default=0.0,
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Where to write the JSON results",
+        default=f"benchmark_results/term_lookup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        help="Earlier results JSON to compare against",
+        default=None,
+    )
+    args = parser.parse_args()
+
+    corpus_path = Path(args.corpus)
+    if not corpus_path.exists():
+        print(f"✗ Corpus not found: {corpus_path}")
+        return 1
+    data_dir = Path(args.data_dir)
+
+    stub_network(args.api_latency_ms / 1000.0)
+
+    base_terms = load_corpus_terms(corpus_path)
+    terms = base_terms + perturb_corpus(
+        base_terms, load_hgvs_synonyms(data_dir), args.perturb_ratio, args.seed
+    )
+    random.Random(args.seed).shuffle(terms)
+    print(
+        f"Corpus: {len(base_terms)} terms from {corpus_path}, "
+        f"{len(terms) - len(base_terms)} perturbed, {len(set(terms))} distinct"
+    )
+
+    rss_before_start = peak_rss_mb()
+    start = time.perf_counter()
+    lookup = TermLookup()
+    lookup.variant_search.data_dir = data_dir
+    lookup.drug_search.data_dir = data_dir
+    lookup.warm_up()
+    startup_s = time.perf_counter() - start
+
+    get_term_cache().clear()
+    cold = run_pass(lookup, terms)
+    warm = run_pass(lookup, terms)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "path": str(corpus_path),
+            "base_terms": len(base_terms),
+            "total_terms": len(terms),
+            "distinct_terms": len(set(terms)),
+            "perturb_ratio": args.perturb_ratio,
+            "seed": args.seed,
+        },
+        "api_latency_ms": args.api_latency_ms,
+        "startup": {
+            "elapsed_s": round(startup_s, 4),
+            "peak_rss_mb_before": rss_before_start,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "cold": cold,
+        "warm": warm,
+        "source_latency": get_term_cache().stats()["latency"],
+    }
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Startup: {results['startup']['elapsed_s']}s")
+    for phase in ("cold", "warm"):
+        r = results[phase]
+        print(
+            f"{phase:>5}: {r['lookups_per_s']} lookups/s, "
+            f"p50 {r['latency_ms']['p50']} ms, p99 {r['latency_ms']['p99']} ms, "
+            f"cache hit rate {r['cache']['hit_rate']:.1%}, peak RSS {r['peak_rss_mb']} MB"
+        )
+    print(f"✓ Results saved to {output_path}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print_comparison(results, json.load(f))
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
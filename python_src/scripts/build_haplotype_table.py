@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Build Haplotype Table
+
+Normalizes a downloaded PharmGKB haplotype file (TSV, CSV or a zip holding
+one; local path or URL) into data/term_lookup_info/haplotypes.tsv with
+columns "Haplotype ID", "Gene Symbol" and "Haplotype Name". Variant lookups
+use it to resolve star alleles such as CYP2D6*4 without calling the
+PharmGKB API.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from term_normalization.haplotype_index import HAPLOTYPE_TSV, build_haplotype_table
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the local star-allele table from a PharmGKB haplotype file."
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        required=True,
+        help="Path or URL of the PharmGKB haplotype file (TSV/CSV or zip)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        help="Base data directory containing term_lookup_info/",
+        default="data",
+    )
+    args = parser.parse_args()
+
+    output_path = Path(args.data_dir) / "term_lookup_info" / HAPLOTYPE_TSV
+    start = time.time()
+    try:
+        count = build_haplotype_table(args.source, output_path)
+    except (OSError, ValueError) as e:
+        print(f"✗ Failed to build {output_path}: {e}")
+        return 1
+    print(f"✓ {output_path} ({count} haplotypes) built in {time.time() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
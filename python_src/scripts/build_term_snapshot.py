@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Build Term Lookup Snapshots
+
+Compiles data/term_lookup_info/variants.tsv and drugs.tsv into memory-mappable
+snapshots (variants.snapshot, drugs.snapshot) with the string tables, exploded
+synonym lists and search indexes precomputed. Lookups pick the snapshots up
+automatically; re-run this script whenever the TSVs change.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from term_normalization import drug_search, variant_search
+from term_normalization.snapshot import build_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the term lookup TSVs into memory-mappable snapshots."
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        help="Base data directory containing term_lookup_info/",
+        default="data",
+    )
+    args = parser.parse_args()
+
+    lookup_dir = Path(args.data_dir) / "term_lookup_info"
+    tables = [
+        (lookup_dir / "variants.tsv", variant_search),
+        (lookup_dir / "drugs.tsv", drug_search),
+    ]
+
+    for tsv_path, module in tables:
+        if not tsv_path.exists():
+            print(f"✗ Missing {tsv_path}")
+            return 1
+        start = time.time()
+        snapshot_path = build_snapshot(
+            tsv_path,
+            module.SNAPSHOT_FUZZY_INDEXES,
+            module.SNAPSHOT_EXACT_INDEXES,
+        )
+        size_mb = snapshot_path.stat().st_size / 1e6
+        print(
+            f"✓ {snapshot_path} ({size_mb:.1f} MB) built in {time.time() - start:.1f}s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
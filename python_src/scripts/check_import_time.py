@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Import-Time Budget Check
+
+Imports a module (by default main, the API) in a fresh interpreter with
+`python -X importtime`, and fails if the import takes longer than the budget
+or pulls in a dependency that should only load on first use (litellm,
+sentence-transformers/torch, pandas, numpy). Run it in CI or before merging
+changes to module-level imports:
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --module scripts.batch_process --budget-ms 2000
+
+Exits 0 within budget, 1 otherwise, and prints the slowest imports.
+tests/test_import_time.py enforces the same budget and deferred modules for
+main and the scripts under pytest.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PYTHON_SRC = Path(__file__).parent.parent
+
+# Heavy dependencies that must be imported lazily, where they are used
+DEFERRED_MODULES = ["litellm", "sentence_transformers", "torch", "pandas", "numpy"]
+
+DEFAULT_BUDGET_MS = 1500
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(module: str) -> Tuple[Dict[str, Tuple[int, int]], str]:
+    """
+    Import module in a fresh interpreter under -X importtime.
+
+    Returns:
+        ({module name: (self us, cumulative us)}, stderr of the run)
+    """
+    env = dict(os.environ)
+    # The API runs from python_src with the repo root (benchmarks/) importable
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PYTHON_SRC), str(PYTHON_SRC.parent), env.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PYTHON_SRC,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return timings, result.stderr
+
+
+def check(module: str, budget_ms: float, top: int) -> List[str]:
+    """Measure one module and return the budget violations (empty if none)."""
+    timings, _ = measure_imports(module)
+    if module not in timings:
+        return [f"{module}: no importtime output (already imported by site?)"]
+    total_ms = timings[module][1] / 1000.0
+
+    print(f"import {module}: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[:top]:
+        print(f"  {self_us / 1000.0:8.1f} ms self {cumulative_us / 1000.0:8.1f} ms total  {name}")
+
+    violations = []
+    if total_ms > budget_ms:
+        violations.append(
+            f"{module}: import took {total_ms:.0f} ms, over the {budget_ms:.0f} ms budget"
+        )
+    for name in DEFERRED_MODULES:
+        if name in timings:
+            violations.append(
+                f"{module}: imports {name} at startup; import it where it is used"
+            )
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if importing a module is slow or loads heavy dependencies."
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="Module to import (repeatable, default main)",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        help=f"Longest acceptable import time (default {DEFAULT_BUDGET_MS})",
+        default=float(os.getenv("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS)),
+    )
+    parser.add_argument(
+        "--top", type=int, help="Slowest imports to list (default 10)", default=10
+    )
+    args = parser.parse_args()
+
+    violations: List[str] = []
+    for module in args.module or ["main"]:
+        try:
+            violations += check(module, args.budget_ms, args.top)
+        except RuntimeError as e:
+            violations.append(str(e))
+
+    if violations:
+        for violation in violations:
+            print(f"✗ {violation}")
+        return 1
+    print("✓ Import time within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
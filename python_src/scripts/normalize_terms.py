@@ -37,6 +37,18 @@ def main():
         help="Output file path (only for single file mode)",
         default=None,
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Resolve each unique term across the directory once before rewriting files",
+        default=False,
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Normalize files in this many worker processes (0 = current process)",
+        default=0,
+    )
 
     args = parser.parse_args()
 
@@ -44,9 +56,15 @@ def main():
         # Normalize entire directory
         print(f"Normalizing directory: {args.directory}")
         print(f"In-place: {args.in_place}")
+        print(f"Batch: {args.batch}")
+        print(f"Processes: {args.processes}")
 
         success, failed = normalize_outputs_in_directory(
-            args.directory, in_place=args.in_place, verbose=True
+            args.directory,
+            in_place=args.in_place,
+            verbose=True,
+            batch=args.batch,
+            processes=args.processes,
         )
 
         print(f"\n=== Summary ===")
@@ -0,0 +1,189 @@
+"""
+Micro-batching queue for term lookups from many concurrent async callers.
+
+Each caller submits (term, term type) pairs and gets an asyncio future per
+term. A single background task drains the queue: it waits up to
+`max_wait_ms` after the first queued term (or until `max_batch_size` terms
+are queued), dedupes the batch against everything already in flight, and
+resolves the batch with one resolve_terms_async call through the shared
+TermLookup (and so the shared TermCache, indexes and lookup coalescing).
+PharmGKB/RxNorm requests are awaited, so a term waiting on the network
+holds no thread; only table scans and cache access run on the batcher's
+thread pool. Futures complete term by term, so callers can stream results
+as they land.
+
+Configured from the environment:
+    TERM_BATCH_MAX_SIZE      terms per resolution pass (default 512)
+    TERM_BATCH_MAX_WAIT_MS   how long a pass waits to fill up (default 5)
+    TERM_BATCH_WORKERS       threads for table scans and cache access (default 8)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from term_normalization.term_lookup import (
+    DEFAULT_BATCH_WORKERS,
+    SearchResult,
+    TermLookup,
+    TermType,
+    get_term_lookup,
+    resolve_terms_async,
+)
+
+DEFAULT_MAX_BATCH_SIZE = 512
+DEFAULT_MAX_WAIT_MS = 5.0
+
+TermKey = Tuple[str, TermType]
+
+
+class TermBatcher:
+    """Coalesces concurrent term submissions into shared resolution passes."""
+
+    def __init__(
+        self,
+        term_lookup: Optional[TermLookup] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_workers: int = DEFAULT_BATCH_WORKERS,
+    ):
+        self.term_lookup = term_lookup or get_term_lookup()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="term-batch"
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Dict[TermKey, asyncio.Future] = {}
+        # Running passes, referenced so they are not garbage collected
+        self._passes: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.terms_resolved = 0
+        self.coalesced = 0
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the previous loop is gone (e.g. across test runs)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._pending = {}
+            self._passes = set()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    def submit(self, term: str, term_type: TermType) -> asyncio.Future:
+        """
+        Queue a term for the next pass; must be called from the event loop.
+
+        Returns:
+            Future resolving to the best SearchResult or None; lookup errors
+            are set as the future's exception. A term already queued or in
+            flight returns the existing future.
+        """
+        self._ensure_worker()
+        key = (term, term_type)
+        future = self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+        future = self._loop.create_future()
+        # Results nobody waits for any more (e.g. a disconnected client)
+        # should not log "exception was never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending[key] = future
+        self._queue.put_nowait(key)
+        return future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[TermKey]) -> None:
+        self.batches += 1
+        futures = {key: self._pending[key] for key in batch}
+        work = self._loop.create_task(
+            resolve_terms_async(
+                batch,
+                executor=self._executor,
+                term_lookup=self.term_lookup,
+                on_result=lambda key, result, error: self._finish(
+                    key, futures[key], result, error
+                ),
+            )
+        )
+        self._passes.add(work)
+        work.add_done_callback(lambda work: self._finish_pass(futures, work))
+
+    def _finish(
+        self,
+        key: TermKey,
+        future: asyncio.Future,
+        result: Optional[SearchResult],
+        error: Optional[Exception],
+    ) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        self.terms_resolved += 1
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _finish_pass(
+        self, futures: Dict[TermKey, asyncio.Future], work: asyncio.Task
+    ) -> None:
+        self._passes.discard(work)
+        error = None if work.cancelled() else work.exception()
+        # Terms the pass never finished: it was cancelled (e.g. at shutdown)
+        # or failed as a whole
+        for key, future in futures.items():
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "terms_resolved": self.terms_resolved,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+        }
+
+
+_TERM_BATCHER: Optional[TermBatcher] = None
+
+
+def get_term_batcher() -> TermBatcher:
+    """Get the global TermBatcher, configured from the environment on first use."""
+    global _TERM_BATCHER
+    if _TERM_BATCHER is None:
+        _TERM_BATCHER = TermBatcher(
+            max_batch_size=int(
+                os.getenv("TERM_BATCH_MAX_SIZE", DEFAULT_MAX_BATCH_SIZE)
+            ),
+            max_wait_ms=float(os.getenv("TERM_BATCH_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS)),
+            max_workers=int(os.getenv("TERM_BATCH_WORKERS", DEFAULT_BATCH_WORKERS)),
+        )
+    return _TERM_BATCHER
@@ -3,17 +3,53 @@ Term deduplication cache for normalization system.
 
 This module provides thread-safe caching for normalized terms to avoid
 redundant API calls and lookups across multiple files.
+
+The in-memory cache sits in front of an optional SQLite database (WAL mode)
+so results survive restarts and are shared between the API, the scripts and
+pipeline subprocesses.
 """
 
+import hashlib
+import json
+import os
+import sqlite3
 import threading
-from typing import Dict, Optional, List, TYPE_CHECKING
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, List, Sequence, Tuple, TYPE_CHECKING
 from dataclasses import dataclass
 
+from loguru import logger
+
 if TYPE_CHECKING:
     from term_normalization.variant_search import VariantSearchResult
     from term_normalization.drug_search import DrugSearchResult
 
 
+# Persistent cache location and lifetime (override via environment)
+DEFAULT_CACHE_DIR = "data/cache"
+DEFAULT_CACHE_FILE = "term_cache.sqlite3"
+DEFAULT_TTL_DAYS = 30
+# Lookups that found nothing are retried sooner than successful ones
+DEFAULT_NEGATIVE_TTL_HOURS = 6
+
+# In-memory entries kept per term type before LRU eviction
+DEFAULT_MAX_ENTRIES = 10000
+
+# TSV snapshot the cached results were computed from, under
+# <data_dir>/term_lookup_info
+TERM_LOOKUP_TSVS = ("variants.tsv", "drugs.tsv", "haplotypes.tsv")
+DEFAULT_DATA_DIR = Path("data")
+
+
+def term_lookup_files(data_dir: Path = DEFAULT_DATA_DIR) -> Tuple[Path, ...]:
+    """The lookup TSVs loaded by a TermLookup over data_dir, as absolute paths."""
+    base = Path(data_dir).resolve() / "term_lookup_info"
+    return tuple(base / name for name in TERM_LOOKUP_TSVS)
+
+
 @dataclass
 class CachedVariantResult:
     """Cached variant normalization result."""
@@ -30,12 +66,303 @@ class CachedDrugResult:
     results: List  # List[DrugSearchResult]
 
 
+def compute_snapshot_version(paths: Optional[Sequence[Path]] = None) -> str:
+    """
+    Hash the term lookup TSVs so cached results are tied to the data they came from.
+
+    Args:
+        paths: Files to hash (default: term_lookup_files() of the default
+            data directory)
+
+    Missing files hash as empty, so a partial checkout still gets a stable stamp.
+    """
+    if paths is None:
+        paths = term_lookup_files()
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(str(Path(path).name).encode())
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:16]
+
+
+class PersistentTermStore:
+    """
+    SQLite-backed term cache shared between processes.
+
+    Entries are keyed by (term_type, normalized term) and stored as JSON lists
+    of result dicts. Each entry records the TSV snapshot version it was
+    computed against and an expiry time; stale or expired entries read as
+    misses and are overwritten on the next write. The version hashes the
+    TSVs under the data directory the lookups load from (see use_data_dir()).
+
+    The database runs in WAL mode, so readers never block on a writer and
+    several processes can use the same file. Each thread gets its own
+    connection.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        version: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_DAYS * 24 * 3600,
+    ):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self._version = version
+        self._fixed_version = version is not None
+        self._files = term_lookup_files()
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            self._version = compute_snapshot_version(self._files)
+        return self._version
+
+    def use_data_dir(self, data_dir: Path) -> None:
+        """Version entries by the lookup TSVs under data_dir."""
+        files = term_lookup_files(data_dir)
+        if files != self._files:
+            self._files = files
+            if not self._fixed_version:
+                self._version = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS term_cache (
+                        term_type TEXT NOT NULL,
+                        term_key TEXT NOT NULL,
+                        raw_input TEXT NOT NULL,
+                        results TEXT NOT NULL,
+                        version TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (term_type, term_key)
+                    )
+                    """
+                )
+                self._initialized = True
+
+        self._local.conn = conn
+        return conn
+
+    def get(self, term_type: str, key: str) -> Optional[Tuple[List[dict], float]]:
+        """
+        Get cached result dicts for a term.
+
+        Returns:
+            (result dicts, expires_at) if a fresh entry exists, None otherwise.
+            An empty list is a cached negative result.
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT results, version, expires_at FROM term_cache "
+                "WHERE term_type = ? AND term_key = ?",
+                (term_type, key),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        results, version, expires_at = row
+        if version != self.version or expires_at < time.time():
+            return None
+        return json.loads(results), expires_at
+
+    def set(
+        self,
+        term_type: str,
+        key: str,
+        raw_input: str,
+        results: List[dict],
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """Store result dicts for a term, replacing any existing entry."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._connect().execute(
+            "INSERT OR REPLACE INTO term_cache "
+            "(term_type, term_key, raw_input, results, version, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                term_type,
+                key,
+                raw_input,
+                json.dumps(results, ensure_ascii=False),
+                self.version,
+                now,
+                now + ttl,
+            ),
+        )
+
+    def clear(self) -> None:
+        """Delete all persisted entries."""
+        self._connect().execute("DELETE FROM term_cache")
+
+    def count(self) -> int:
+        """Number of fresh entries for the current snapshot version."""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT COUNT(*) FROM term_cache WHERE version = ? AND expires_at >= ?",
+                (self.version, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0]
+
+
+def _default_persistent_store() -> Optional[PersistentTermStore]:
+    """
+    Build the persistent store from the environment.
+
+    TERM_CACHE_DIR / TERM_CACHE_FILE pick the database location,
+    TERM_CACHE_TTL_DAYS the lifetime of positive entries, and
+    TERM_CACHE_PERSIST=0 turns the disk tier off entirely.
+    """
+    if os.getenv("TERM_CACHE_PERSIST", "1").lower() in ("0", "false", "no"):
+        return None
+    cache_dir = os.getenv("TERM_CACHE_DIR", DEFAULT_CACHE_DIR)
+    cache_file = os.getenv("TERM_CACHE_FILE", DEFAULT_CACHE_FILE)
+    ttl_days = float(os.getenv("TERM_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS))
+    return PersistentTermStore(
+        Path(cache_dir) / cache_file, ttl_seconds=ttl_days * 24 * 3600
+    )
+
+
 class TermCache:
-    """Thread-safe cache for normalized terms."""
+    """
+    Thread-safe LRU cache for normalized terms.
+
+    Variants and drugs are kept in separate OrderedDicts, each bounded to
+    max_entries; the least recently used entry is evicted once a type is full.
+    Hit/miss/eviction counters and per-source lookup latency are kept so the
+    cache can be sized and normalization time attributed (see stats()).
 
-    def __init__(self):
-        self._variant_cache: Dict[str, CachedVariantResult] = {}
-        self._drug_cache: Dict[str, CachedDrugResult] = {}
+    Lookups that found nothing are cached as negative entries, kept apart from
+    the positive ones with their own, shorter TTL, so an unmappable term costs
+    one lookup per TTL window instead of one per occurrence.
+    """
+
+    def __init__(
+        self,
+        persistent: Optional[PersistentTermStore] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_HOURS * 3600,
+    ):
+        self._variant_cache: "OrderedDict[str, CachedVariantResult]" = OrderedDict()
+        self._drug_cache: "OrderedDict[str, CachedDrugResult]" = OrderedDict()
+        # (term_type, key) -> expiry timestamp of a cached "not found"
+        self._negative_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._persistent = persistent
+        self._data_dir: Optional[Path] = None
+        self.max_entries = max_entries
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.RLock()
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "persistent_hits": 0,
+            "evictions": 0,
+        }
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    def _lookup(self, entries: OrderedDict, key: str):
+        """Return the L1 entry for key (marking it recently used) or None."""
+        with self._lock:
+            cached = entries.get(key)
+            if cached is not None:
+                entries.move_to_end(key)
+            return cached
+
+    def _store(self, entries: OrderedDict, key: str, value) -> None:
+        """Insert into an L1 dict, evicting least recently used entries."""
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _get_negative(self, term_type: str, key: str) -> bool:
+        """Whether a fresh negative entry exists for the term."""
+        with self._lock:
+            expires_at = self._negative_cache.get((term_type, key))
+            if expires_at is None:
+                return False
+            if expires_at < time.time():
+                del self._negative_cache[(term_type, key)]
+                return False
+            self._negative_cache.move_to_end((term_type, key))
+            return True
+
+    def _set_negative(
+        self, term_type: str, key: str, expires_at: Optional[float] = None
+    ) -> None:
+        if expires_at is None:
+            expires_at = time.time() + self.negative_ttl_seconds
+        self._store(self._negative_cache, (term_type, key), expires_at)
+
+    def _count_hit(self, results: List, persistent: bool = False) -> None:
+        with self._lock:
+            self._counters["hits"] += 1
+            if not results:
+                self._counters["negative_hits"] += 1
+            if persistent:
+                self._counters["persistent_hits"] += 1
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def _persistent_get(
+        self, term_type: str, key: str
+    ) -> Optional[Tuple[List[dict], float]]:
+        if self._persistent is None:
+            return None
+        try:
+            return self._persistent.get(term_type, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent term cache read failed: {e}")
+            return None
+
+    def _persistent_set(
+        self, term_type: str, key: str, raw_input: str, results: List
+    ) -> None:
+        if self._persistent is None:
+            return
+        try:
+            self._persistent.set(
+                term_type,
+                key,
+                raw_input,
+                [result.to_dict() for result in results],
+                ttl_seconds=None if results else self.negative_ttl_seconds,
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent term cache write failed: {e}")
 
     def get_variant(self, raw_variant: str) -> Optional[List]:
         """
@@ -48,8 +375,34 @@ class TermCache:
             List of VariantSearchResult if cached, None otherwise
         """
         key = raw_variant.lower().strip()
-        cached = self._variant_cache.get(key)
-        return cached.results if cached else None
+        cached = self._lookup(self._variant_cache, key)
+        if cached is not None:
+            self._count_hit(cached.results)
+            return cached.results
+        if self._get_negative("variant", key):
+            self._count_hit([])
+            return []
+
+        stored = self._persistent_get("variant", key)
+        if stored is None:
+            self._count_miss()
+            return None
+        stored_results, expires_at = stored
+        if not stored_results:
+            self._set_negative("variant", key, expires_at)
+            self._count_hit([], persistent=True)
+            return []
+
+        from term_normalization.variant_search import VariantSearchResult
+
+        results = [VariantSearchResult(**result) for result in stored_results]
+        self._store(
+            self._variant_cache,
+            key,
+            CachedVariantResult(raw_input=raw_variant, results=results),
+        )
+        self._count_hit(results, persistent=True)
+        return results
 
     def set_variant(
         self, raw_variant: str, results: List
@@ -59,12 +412,24 @@ class TermCache:
 
         Args:
             raw_variant: Raw variant string
-            results: List of VariantSearchResult to cache
+            results: List of VariantSearchResult to cache; an empty list is cached
+                as a negative result with the shorter negative TTL
         """
         key = raw_variant.lower().strip()
-        self._variant_cache[key] = CachedVariantResult(
-            raw_input=raw_variant, results=results
+        if not results:
+            with self._lock:
+                self._variant_cache.pop(key, None)
+            self._set_negative("variant", key)
+            self._persistent_set("variant", key, raw_variant, results)
+            return
+        with self._lock:
+            self._negative_cache.pop(("variant", key), None)
+        self._store(
+            self._variant_cache,
+            key,
+            CachedVariantResult(raw_input=raw_variant, results=results),
         )
+        self._persistent_set("variant", key, raw_variant, results)
 
     def get_drug(self, raw_drug: str) -> Optional[List]:
         """
@@ -77,8 +442,34 @@ class TermCache:
             List of DrugSearchResult if cached, None otherwise
         """
         key = raw_drug.lower().strip()
-        cached = self._drug_cache.get(key)
-        return cached.results if cached else None
+        cached = self._lookup(self._drug_cache, key)
+        if cached is not None:
+            self._count_hit(cached.results)
+            return cached.results
+        if self._get_negative("drug", key):
+            self._count_hit([])
+            return []
+
+        stored = self._persistent_get("drug", key)
+        if stored is None:
+            self._count_miss()
+            return None
+        stored_results, expires_at = stored
+        if not stored_results:
+            self._set_negative("drug", key, expires_at)
+            self._count_hit([], persistent=True)
+            return []
+
+        from term_normalization.drug_search import DrugSearchResult
+
+        results = [DrugSearchResult(**result) for result in stored_results]
+        self._store(
+            self._drug_cache,
+            key,
+            CachedDrugResult(raw_input=raw_drug, results=results),
+        )
+        self._count_hit(results, persistent=True)
+        return results
 
     def set_drug(self, raw_drug: str, results: List) -> None:
         """
@@ -86,47 +477,139 @@ class TermCache:
 
         Args:
             raw_drug: Raw drug string
-            results: List of DrugSearchResult to cache
+            results: List of DrugSearchResult to cache; an empty list is cached
+                as a negative result with the shorter negative TTL
         """
         key = raw_drug.lower().strip()
-        self._drug_cache[key] = CachedDrugResult(raw_input=raw_drug, results=results)
+        if not results:
+            with self._lock:
+                self._drug_cache.pop(key, None)
+            self._set_negative("drug", key)
+            self._persistent_set("drug", key, raw_drug, results)
+            return
+        with self._lock:
+            self._negative_cache.pop(("drug", key), None)
+        self._store(
+            self._drug_cache, key, CachedDrugResult(raw_input=raw_drug, results=results)
+        )
+        self._persistent_set("drug", key, raw_drug, results)
 
-    def clear(self) -> None:
-        """Clear all cached terms."""
-        self._variant_cache.clear()
-        self._drug_cache.clear()
+    def record_latency(self, source: str, seconds: float) -> None:
+        """
+        Record the duration of one lookup against a source.
+
+        Args:
+            source: Lookup source, e.g. "local_tsv", "local_haplotypes",
+                "pharmgkb_api", "rxnorm_api"
+            seconds: Wall-clock duration of the call
+        """
+        with self._lock:
+            entry = self._latency.setdefault(
+                source, {"calls": 0, "total_s": 0.0, "max_s": 0.0}
+            )
+            entry["calls"] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+
+    @contextmanager
+    def timed(self, source: str):
+        """Context manager that records the duration of its body under source."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_latency(source, time.perf_counter() - start)
+
+    def timed_call(self, source: str, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs) and record its duration under source.
 
-    def stats(self) -> Dict[str, int]:
+        Pass this (not fn) to run_blocking so the recorded time covers the
+        work on the worker thread, not the wait for a free one.
+        """
+        with self.timed(source):
+            return fn(*args, **kwargs)
+
+    def use_data_dir(self, data_dir: Path) -> None:
+        """
+        Tie cached results to the lookup tables under data_dir.
+
+        TermLookup calls this with the directory its lookups load from, so the
+        persistent store's snapshot version hashes the files actually used.
+        Switching to another directory drops the in-memory entries.
+        """
+        data_dir = Path(data_dir).resolve()
+        with self._lock:
+            if self._data_dir is not None and data_dir != self._data_dir:
+                self.clear()
+            self._data_dir = data_dir
+        if self._persistent is not None:
+            self._persistent.use_data_dir(data_dir)
+
+    def clear(self, persistent: bool = False) -> None:
+        """
+        Clear all cached terms.
+
+        Counters and latency totals are kept; they describe the process lifetime.
+
+        Args:
+            persistent: Also delete the entries stored on disk
+        """
+        with self._lock:
+            self._variant_cache.clear()
+            self._drug_cache.clear()
+            self._negative_cache.clear()
+        if persistent and self._persistent is not None:
+            self._persistent.clear()
+
+    def stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
 
         Returns:
-            Dictionary with cache sizes
+            Dictionary with cache sizes, hit/miss/eviction counters, hit rate
+            and per-source latency (calls, total seconds, average and max ms)
         """
-        return {
-            "variant_count": len(self._variant_cache),
-            "drug_count": len(self._drug_cache),
-        }
+        with self._lock:
+            counters = dict(self._counters)
+            lookups = counters["hits"] + counters["misses"]
+            stats: Dict[str, Any] = {
+                "variant_count": len(self._variant_cache),
+                "drug_count": len(self._drug_cache),
+                "negative_count": len(self._negative_cache),
+                "max_entries": self.max_entries,
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+                "latency": {
+                    source: {
+                        "calls": int(entry["calls"]),
+                        "total_s": round(entry["total_s"], 4),
+                        "avg_ms": round(1000 * entry["total_s"] / entry["calls"], 2),
+                        "max_ms": round(1000 * entry["max_s"], 2),
+                    }
+                    for source, entry in self._latency.items()
+                },
+            }
+        if self._persistent is not None:
+            try:
+                stats["persistent_count"] = self._persistent.count()
+            except sqlite3.Error:
+                pass
+        return stats
 
 
 # Global cache instance
-_TERM_CACHE = TermCache()
+_TERM_CACHE = TermCache(
+    persistent=_default_persistent_store(),
+    max_entries=int(os.getenv("TERM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    negative_ttl_seconds=float(
+        os.getenv("TERM_CACHE_NEGATIVE_TTL_HOURS", DEFAULT_NEGATIVE_TTL_HOURS)
+    )
+    * 3600,
+)
 
 
 def get_term_cache() -> TermCache:
     """Get the global term cache instance."""
     return _TERM_CACHE
 
-
-# Global PharmGKB API rate limiter (max 2 concurrent calls)
-_PHARMGKB_SEMAPHORE = threading.Semaphore(2)
-
-
-def get_pharmgkb_semaphore() -> threading.Semaphore:
-    """
-    Get the global PharmGKB API rate limiting semaphore.
-
-    PharmGKB has rate limits, so we restrict to max 2 concurrent API calls.
-    This semaphore should be acquired before making PharmGKB API requests.
-    """
-    return _PHARMGKB_SEMAPHORE
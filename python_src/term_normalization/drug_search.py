@@ -1,46 +1,49 @@
-from pydantic import BaseModel
+import functools
 from typing import List, Optional, Any
-import requests
+from concurrent.futures import Executor
 from term_normalization.search_utils import (
+    BaseSearchResult,
+    LookupTable,
     calc_similarity,
     general_search,
     general_search_comma_list,
+    get_exact_index,
+    get_fuzzy_index,
+    get_row_dict,
+    run_blocking,
 )
-import pandas as pd
 from loguru import logger
 from pathlib import Path
 from term_normalization.cache import get_term_cache
+from term_normalization.single_flight import get_lookup_flight
+from term_normalization.http_client import RXNORM_API, get_api_client, lookup_found
+
+# Indexes precompiled into drugs.snapshot (see scripts/build_term_snapshot.py)
+SNAPSHOT_FUZZY_INDEXES = [
+    ("Name", False),
+    ("Generic Names", True),
+    ("Trade Names", True),
+    ("RxNorm Identifiers", False),
+]
+SNAPSHOT_EXACT_INDEXES = [(("Name",), ("Generic Names", "Trade Names"))]
 
 # Global cache for drug TSV data
-_DRUG_DF_CACHE: Optional[pd.DataFrame] = None
+_DRUG_DF_CACHE: Optional[LookupTable] = None
 
 
-def _get_cached_drug_df(data_path: Path) -> pd.DataFrame:
-    """Load and cache the drug TSV file to avoid repeated file I/O."""
+def _get_cached_drug_df(data_path: Path) -> LookupTable:
+    """Load and cache the drug table (snapshot if built, else the TSV)."""
     global _DRUG_DF_CACHE
     if _DRUG_DF_CACHE is None:
-        _DRUG_DF_CACHE = pd.read_csv(data_path, sep="\t")
+        # Imported on first use: snapshots and TSVs need numpy/pandas
+        from term_normalization.snapshot import load_lookup_table
+
+        _DRUG_DF_CACHE = load_lookup_table(data_path)
     return _DRUG_DF_CACHE
 
 
-class DrugSearchResult(BaseModel):
-    raw_input: str
-    id: str
-    normalized_term: str
-    url: str
-    score: float
-
-    def to_dict(self) -> dict:
-        """
-        Return a plain-Python dict representation of the result that is safe for json.dump.
-        Supports both Pydantic v1 (dict) and v2 (model_dump).
-        """
-        try:
-            # Pydantic v2
-            return self.model_dump()
-        except AttributeError:  # pragma: no cover - v1 fallback
-            # Pydantic v1
-            return self.dict()
+class DrugSearchResult(BaseSearchResult):
+    __slots__ = ()
 
 
 # RxNorm Helpers
@@ -63,11 +66,9 @@ def get_first_rxnorm_candidate(data):
     return None
 
 
-def rxnorm_search(drug_name: str) -> Optional[DrugSearchResult]:
-    url = "https://rxnav.nlm.nih.gov/REST/approximateTerm.json"
-    params = {"term": drug_name, "maxEntries": 1}
-    response = requests.get(url, params=params, timeout=5)
-    if response.status_code == 200:
+def _rxnorm_result(response, drug_name: str) -> DrugSearchResult:
+    """Best RxNorm candidate of an /approximateTerm response, or "Not Found"."""
+    if lookup_found(response):
         data = response.json()
         candidate = get_first_rxnorm_candidate(data)
         if candidate:
@@ -87,7 +88,25 @@ def rxnorm_search(drug_name: str) -> Optional[DrugSearchResult]:
     )
 
 
-class DrugLookup(BaseModel):
+def rxnorm_search(drug_name: str) -> Optional[DrugSearchResult]:
+    params = {"term": drug_name, "maxEntries": 1}
+    response = get_api_client(RXNORM_API).get_sync(
+        "/approximateTerm.json", params=params
+    )
+    return _rxnorm_result(response, drug_name)
+
+
+async def rxnorm_search_async(drug_name: str) -> Optional[DrugSearchResult]:
+    params = {"term": drug_name, "maxEntries": 1}
+    response = await get_api_client(RXNORM_API).get(
+        "/approximateTerm.json",
+        params=params,
+        on_latency=functools.partial(get_term_cache().record_latency, "rxnorm_api"),
+    )
+    return _rxnorm_result(response, drug_name)
+
+
+class DrugLookup:
     """
     Lookup class for drugs
     Uses ClinPGx and RxNorm to find drug information
@@ -97,12 +116,23 @@ class DrugLookup(BaseModel):
     drug_lookup.search("aspirin")
     """
 
-    # Base data directory; expects TSV at `<data_dir>/term_lookup_info/drugs.tsv`
-    data_dir: Path = Path("data")
+    __slots__ = ("data_dir",)
+
+    def __init__(self, data_dir: Path = Path("data")):
+        # Base data directory; expects TSV at `<data_dir>/term_lookup_info/drugs.tsv`
+        self.data_dir = Path(data_dir)
 
     def _data_path(self) -> Path:
         return self.data_dir / "term_lookup_info" / "drugs.tsv"
 
+    def warm_up(self) -> None:
+        """Load the drug table and build its search indexes ahead of the first query."""
+        df = _get_cached_drug_df(self._data_path())
+        for column, comma_list in SNAPSHOT_FUZZY_INDEXES:
+            get_fuzzy_index(df, column, comma_list=comma_list)
+        for columns, comma_columns in SNAPSHOT_EXACT_INDEXES:
+            get_exact_index(df, list(columns), comma_columns=list(comma_columns))
+
     def _clinpgx_drug_name_search(
         self, drug_name: str, raw_input: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[DrugSearchResult]]:
@@ -166,6 +196,36 @@ class DrugLookup(BaseModel):
             ]
         return []
 
+    def _clinpgx_exact_search(
+        self, drug_name: str, top_k: int = 1
+    ) -> List[DrugSearchResult]:
+        """
+        Exact, case-insensitive match against Name, Generic Names and Trade Names.
+
+        Only returns results when there are at least top_k exact hits, so the
+        fuzzy search is never skipped when it would contribute extra results.
+        """
+        df = _get_cached_drug_df(self._data_path())
+        index = get_exact_index(
+            df, ["Name"], comma_columns=["Generic Names", "Trade Names"]
+        )
+        rows = index.lookup(drug_name)
+        if not rows or len(rows) < top_k:
+            return []
+        results = []
+        for row_id in rows[:top_k]:
+            row = get_row_dict(df, row_id)
+            results.append(
+                DrugSearchResult(
+                    raw_input=drug_name,
+                    id=row["PharmGKB Accession Id"],
+                    normalized_term=row["Name"],
+                    url=f"https://www.clinpgx.org/chemical/{row['PharmGKB Accession Id']}",
+                    score=1.0,
+                )
+            )
+        return results
+
     def clinpgx_lookup(
         self, drug_name: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[DrugSearchResult]]:
@@ -229,8 +289,22 @@ class DrugLookup(BaseModel):
         Search using RxNorm and convert results back to PharmGKB format using RxCUI to PA ID mapping.
         """
         # Get RxNorm result
-        rxnorm_result = rxnorm_search(drug_name)
+        with get_term_cache().timed("rxnorm_api"):
+            rxnorm_result = rxnorm_search(drug_name)
+        return self._rxnorm_to_pharmgkb(rxnorm_result, drug_name)
+
+    async def rxnorm_lookup_async(
+        self, drug_name: str, executor: Optional[Executor] = None
+    ) -> Optional[List[DrugSearchResult]]:
+        """rxnorm_lookup() that awaits the RxNorm request instead of blocking a thread."""
+        rxnorm_result = await rxnorm_search_async(drug_name)
+        return await run_blocking(
+            executor, self._rxnorm_to_pharmgkb, rxnorm_result, drug_name
+        )
 
+    def _rxnorm_to_pharmgkb(
+        self, rxnorm_result: Optional[DrugSearchResult], drug_name: str
+    ) -> List[DrugSearchResult]:
         # If no result or empty result, return empty list
         if not rxnorm_result or not rxnorm_result.id or rxnorm_result.id == "":
             return []
@@ -242,21 +316,70 @@ class DrugLookup(BaseModel):
             rxcui = rxnorm_result.id
 
         # Convert RxCUI to PharmGKB PA ID
-        pharmgkb_results = self.rxcui_to_pa_id(rxcui, raw_input=drug_name)
+        with get_term_cache().timed("local_tsv"):
+            pharmgkb_results = self.rxcui_to_pa_id(rxcui, raw_input=drug_name)
 
         return pharmgkb_results if pharmgkb_results else []
 
+    def _flight_key(self, drug_name: str, threshold: float, top_k: int) -> tuple:
+        return ("drug", drug_name.lower().strip(), threshold, top_k)
+
     def search(
         self, drug_name: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[DrugSearchResult]]:
-        # Check cache first
+        """
+        Search for a drug; concurrent searches for the same term share one lookup.
+        """
+        return get_lookup_flight().do(
+            self._flight_key(drug_name, threshold, top_k),
+            lambda: self._search(drug_name, threshold=threshold, top_k=top_k),
+        )
+
+    async def search_async(
+        self,
+        drug_name: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[DrugSearchResult]]:
+        """
+        Awaitable search(). The RxNorm request is awaited, so no thread is
+        held while it is in flight; table scans and cache access run on
+        executor (default: the event loop's pool).
+        """
+        return await get_lookup_flight().do_coroutine(
+            self._flight_key(drug_name, threshold, top_k),
+            lambda: self._search_async(
+                drug_name, threshold=threshold, top_k=top_k, executor=executor
+            ),
+        )
+
+    def _search_local(
+        self, drug_name: str, top_k: int = 1
+    ) -> Optional[List[DrugSearchResult]]:
+        """Exact table hits, else the cached result; None if the term needs a lookup."""
         cache = get_term_cache()
-        cached = cache.get_drug(drug_name)
-        if cached is not None:
-            return cached
 
+        # Exact name/synonym hits skip both the fuzzy scan and RxNorm
+        with cache.timed("local_tsv"):
+            results = self._clinpgx_exact_search(drug_name, top_k=top_k)
+        if results:
+            return results
+
+        # Check cache
+        return cache.get_drug(drug_name)
+
+    def _search(
+        self, drug_name: str, threshold: float = 0.8, top_k: int = 1
+    ) -> Optional[List[DrugSearchResult]]:
+        results = self._search_local(drug_name, top_k=top_k)
+        if results is not None:
+            return results
+
+        cache = get_term_cache()
         # Try ClinPGx first
-        results = self.clinpgx_lookup(drug_name, threshold=threshold, top_k=top_k)
+        with cache.timed("local_tsv"):
+            results = self.clinpgx_lookup(drug_name, threshold=threshold, top_k=top_k)
         if results:
             cache.set_drug(drug_name, results)
             return results
@@ -264,8 +387,41 @@ class DrugLookup(BaseModel):
         # If no results from ClinPGx, try RxNorm
         results = self.rxnorm_lookup(drug_name)
 
-        # Cache result (including empty results to avoid repeated failed lookups)
+        # Cache result (including empty results to avoid repeated failed
+        # lookups; API failures have raised by now and are not cached)
+        cache.set_drug(drug_name, results or [])
+
+        return results
+
+    async def _search_async(
+        self,
+        drug_name: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[DrugSearchResult]]:
+        results = await run_blocking(
+            executor, self._search_local, drug_name, top_k=top_k
+        )
+        if results is not None:
+            return results
+
+        cache = get_term_cache()
+        results = await run_blocking(
+            executor,
+            cache.timed_call,
+            "local_tsv",
+            self.clinpgx_lookup,
+            drug_name,
+            threshold=threshold,
+            top_k=top_k,
+        )
         if results:
-            cache.set_drug(drug_name, results)
+            await run_blocking(executor, cache.set_drug, drug_name, results)
+            return results
+        logger.warning("No strong results from ClinPGx, trying RxNorm")
+        results = await self.rxnorm_lookup_async(drug_name, executor=executor)
+
+        await run_blocking(executor, cache.set_drug, drug_name, results or [])
 
         return results
@@ -0,0 +1,257 @@
+"""
+Local, gene-scoped index of PharmGKB haplotypes (star alleles).
+
+Star alleles are only meaningful per gene (CYP2C19*2 and CYP2D6*2 are
+different haplotypes), so the index maps (gene, allele), e.g.
+("CYP2C19", "*17"), to the PharmGKB haplotype id and name. It is loaded from
+`<data_dir>/term_lookup_info/haplotypes.tsv`, which
+`scripts/build_haplotype_table.py` builds from a downloaded PharmGKB
+haplotype file. Lookups resolve in memory and only fall back to the
+PharmGKB API when the table is missing or has no match.
+
+Accepted forms: "CYP2D6*4", "CYP2D6 *4", "CYP2D6*1/*4", "HLA-B*15:02", and
+gene-less "*4" or "*4/*4" when the gene comes from context or the allele
+exists in only one gene.
+"""
+
+import re
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+HAPLOTYPE_TSV = "haplotypes.tsv"
+HAPLOTYPE_COLUMNS = ["Haplotype ID", "Gene Symbol", "Haplotype Name"]
+
+# Column names accepted from PharmGKB haplotype downloads, in priority order
+_SOURCE_COLUMNS = {
+    "Haplotype ID": ["Haplotype ID", "PharmGKB Accession Id", "PharmGKB ID", "ID"],
+    "Gene Symbol": ["Gene Symbol", "Gene", "Gene symbol"],
+    "Haplotype Name": ["Haplotype Name", "Name", "Symbol", "Haplotype"],
+}
+
+_GENE_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+_STAR_ALLELE_RE = re.compile(
+    r"^\s*(?P<gene>[A-Za-z][A-Za-z0-9-]*)?\s*(?P<allele>\*[0-9][0-9A-Za-z:.]*)\s*$"
+)
+_SEPARATORS_RE = re.compile(r"[/,;+]")
+
+StarAllele = Tuple[Optional[str], str]
+
+
+def parse_star_alleles(term: str, gene: Optional[str] = None) -> List[StarAllele]:
+    """
+    Parse a star-allele expression into (gene, allele) pairs.
+
+    A gene prefix carries over to the following bare alleles, so
+    "CYP2D6*1/*4" gives [("CYP2D6", "*1"), ("CYP2D6", "*4")]. Genes and
+    alleles are upper-cased.
+
+    Args:
+        term (str): Expression such as "CYP2D6*4", "CYP2D6 *4" or "*4/*4"
+        gene (str, optional): Gene for alleles written without one
+
+    Returns:
+        List of (gene or None, allele); empty if any part is not a star allele
+    """
+    current = gene.strip().upper() if gene and _GENE_RE.match(gene.strip()) else None
+    alleles: List[StarAllele] = []
+    for part in _SEPARATORS_RE.split(term):
+        match = _STAR_ALLELE_RE.match(part)
+        if match is None:
+            return []
+        if match.group("gene"):
+            current = match.group("gene").upper()
+        alleles.append((current, match.group("allele").upper()))
+    return alleles
+
+
+def qualify_star_alleles(term: str, gene: Optional[str]) -> str:
+    """
+    Prefix a gene-less star-allele expression with its gene ("*4/*4" -> "CYP2D6*4/*4").
+
+    Terms that already name a gene, are not star alleles, or come with a
+    gene value that is not a single symbol are returned unchanged.
+    """
+    if not gene or not isinstance(term, str) or not _GENE_RE.match(gene.strip()):
+        return term
+    alleles = parse_star_alleles(term)
+    if not alleles or alleles[0][0] is not None:
+        return term
+    return f"{gene.strip()}{term.strip()}"
+
+
+class HaplotypeIndex:
+    """In-memory (gene, allele) -> (haplotype id, haplotype name) map."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        """
+        Args:
+            entries: (haplotype id, gene symbol, haplotype name) rows
+        """
+        self._entries: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._genes_by_allele: Dict[str, Set[str]] = {}
+        for haplotype_id, gene, name in entries:
+            parsed = parse_star_alleles(str(name), gene=str(gene))
+            if len(parsed) != 1 or parsed[0][0] is None:
+                continue
+            key = parsed[0]
+            self._entries.setdefault(key, (str(haplotype_id), str(name)))
+            self._genes_by_allele.setdefault(key[1], set()).add(key[0])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_tsv(cls, path: Path) -> "HaplotypeIndex":
+        import pandas as pd
+
+        df = pd.read_csv(path, sep="\t", dtype=str).dropna(subset=HAPLOTYPE_COLUMNS)
+        return cls(df[HAPLOTYPE_COLUMNS].itertuples(index=False, name=None))
+
+    def lookup(self, gene: str, allele: str) -> Optional[Tuple[str, str]]:
+        """(haplotype id, name) for a gene and allele such as ("CYP2D6", "*4")."""
+        return self._entries.get((gene.upper(), allele.upper()))
+
+    def resolve(self, term: str, gene: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Resolve a star-allele expression to its haplotypes.
+
+        Args:
+            term (str): Expression such as "CYP2D6*4" or "CYP2D6*1/*4"
+            gene (str, optional): Gene for alleles written without one
+
+        Returns:
+            Distinct (haplotype id, name) in the order written; empty unless
+            every allele resolves (a gene-less allele must exist in exactly
+            one gene)
+        """
+        resolved: List[Tuple[str, str]] = []
+        for allele_gene, allele in parse_star_alleles(term, gene=gene):
+            if allele_gene is None:
+                genes = self._genes_by_allele.get(allele, ())
+                if len(genes) != 1:
+                    return []
+                allele_gene = next(iter(genes))
+            entry = self._entries.get((allele_gene, allele))
+            if entry is None:
+                return []
+            if entry not in resolved:
+                resolved.append(entry)
+        return resolved
+
+
+def _read_source_table(source: Union[str, Path]) -> "pd.DataFrame":
+    """Read a haplotype table from a path or URL; zip archives use their first TSV/CSV."""
+    import pandas as pd
+
+    source = str(source)
+    if source.startswith(("http://", "https://")):
+        import requests
+
+        logger.info(f"Downloading haplotypes from {source}...")
+        response = requests.get(source, timeout=120)
+        response.raise_for_status()
+        content = response.content
+    else:
+        content = Path(source).read_bytes()
+    name = source.rsplit("/", 1)[-1].split("?", 1)[0]
+
+    if zipfile.is_zipfile(BytesIO(content)):
+        with zipfile.ZipFile(BytesIO(content)) as z:
+            members = [
+                m for m in z.namelist() if m.lower().endswith((".tsv", ".csv", ".txt"))
+            ]
+            if not members:
+                raise ValueError(f"No TSV/CSV file found in {source}")
+            name = members[0]
+            content = z.read(name)
+    sep = "," if name.lower().endswith(".csv") else "\t"
+    return pd.read_csv(BytesIO(content), sep=sep, dtype=str)
+
+
+def _pick_column(df: "pd.DataFrame", candidates: Sequence[str]) -> str:
+    for column in candidates:
+        if column in df.columns:
+            return column
+    raise ValueError(
+        f"None of the columns {candidates} found in haplotype file "
+        f"(columns: {list(df.columns)})"
+    )
+
+
+def build_haplotype_table(source: Union[str, Path], output_path: Path) -> int:
+    """
+    Normalize a PharmGKB haplotype download into haplotypes.tsv.
+
+    Args:
+        source: Path or URL of the haplotype file (TSV, CSV, or a zip of one)
+        output_path (Path): Destination TSV
+
+    Returns:
+        Number of haplotypes written
+    """
+    raw = _read_source_table(source)
+    columns = {target: _pick_column(raw, names) for target, names in _SOURCE_COLUMNS.items()}
+    df = raw[[columns[c] for c in HAPLOTYPE_COLUMNS]].copy()
+    df.columns = HAPLOTYPE_COLUMNS
+    df = df.dropna().drop_duplicates()
+
+    # Some exports list the bare allele ("*4"); store the gene-qualified name
+    bare = df["Haplotype Name"].str.strip().str.startswith("*")
+    df.loc[bare, "Haplotype Name"] = (
+        df.loc[bare, "Gene Symbol"].str.strip() + df.loc[bare, "Haplotype Name"].str.strip()
+    )
+
+    parsed = [
+        len(parse_star_alleles(name, gene=gene)) == 1
+        for gene, name in zip(df["Gene Symbol"], df["Haplotype Name"])
+    ]
+    skipped = len(df) - sum(parsed)
+    df = df[parsed]
+    if skipped:
+        logger.info(f"Skipped {skipped} haplotypes without a star-allele name")
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df.sort_values(HAPLOTYPE_COLUMNS[1:]).to_csv(output_path, sep="\t", index=False)
+    return len(df)
+
+
+# Global cache: data path -> index (None when the table is missing)
+_HAPLOTYPE_INDEX_CACHE: Dict[Path, Optional[HaplotypeIndex]] = {}
+
+
+def get_haplotype_index(path: Path) -> Optional[HaplotypeIndex]:
+    """
+    Load and cache the haplotype index at path.
+
+    Returns None (once logged) when the table has not been built.
+    """
+    if path not in _HAPLOTYPE_INDEX_CACHE:
+        if Path(path).exists():
+            index = HaplotypeIndex.from_tsv(path)
+            logger.info(f"Loaded {len(index)} haplotypes from {path}")
+        else:
+            index = None
+            logger.info(
+                f"No haplotype table at {path}; star alleles are looked up via the "
+                "PharmGKB API (see scripts/build_haplotype_table.py)"
+            )
+        _HAPLOTYPE_INDEX_CACHE[path] = index
+    return _HAPLOTYPE_INDEX_CACHE[path]
@@ -0,0 +1,317 @@
+"""
+Pooled, rate-limited HTTP client for the external term lookup APIs.
+
+All PharmGKB and RxNorm requests go through one httpx.AsyncClient per API,
+running on a shared background event loop. Each client keeps a keep-alive
+connection pool to its host and a token bucket that limits the request rate
+(not just the number of requests in flight). 429 and 5xx responses are
+retried with exponential backoff, honouring Retry-After when present.
+
+Synchronous lookup code (resolve_terms and the normalization pools) calls
+`get_sync()`, which hands the request to the loop thread, so worker threads
+never hold a socket of their own; the calling thread still blocks until the
+response arrives, retries and backoff included. The async lookups
+(`search_async`, used by the API's term batcher) await `get()`, so a term
+waiting on the network holds no thread at all.
+
+Each API is configured from the environment, e.g. for PharmGKB:
+    PHARMGKB_API_BASE_URL   (default https://api.pharmgkb.org/v1/data)
+    PHARMGKB_API_RATE       requests per second (default 2)
+    PHARMGKB_API_TIMEOUT    seconds (default 10)
+    PHARMGKB_API_RETRIES    retries after the first attempt (default 3)
+and likewise with the RXNORM_API_ prefix. Pointing a base URL at a local stub
+server (or calling `configure_api()`) is enough to run lookups offline.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from loguru import logger
+
+PHARMGKB_API = "pharmgkb"
+RXNORM_API = "rxnorm"
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class ApiConfig:
+    """Connection, rate limit and retry settings for one external API."""
+
+    base_url: str
+    rate_per_second: float
+    timeout: float
+    max_retries: int = 3
+    max_connections: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+
+
+_DEFAULT_CONFIGS: Dict[str, ApiConfig] = {
+    # PharmGKB asks clients to stay around 2 requests/second
+    PHARMGKB_API: ApiConfig(
+        base_url="https://api.pharmgkb.org/v1/data",
+        rate_per_second=2.0,
+        timeout=10.0,
+        max_connections=2,
+    ),
+    # RxNav allows up to 20 requests/second per IP
+    RXNORM_API: ApiConfig(
+        base_url="https://rxnav.nlm.nih.gov/REST",
+        rate_per_second=20.0,
+        timeout=5.0,
+        max_connections=8,
+    ),
+}
+
+
+def _config_from_env(name: str) -> ApiConfig:
+    """Apply <NAME>_API_* environment overrides to the default config."""
+    default = _DEFAULT_CONFIGS[name]
+    prefix = f"{name.upper()}_API_"
+    return replace(
+        default,
+        base_url=os.getenv(prefix + "BASE_URL", default.base_url),
+        rate_per_second=float(os.getenv(prefix + "RATE", default.rate_per_second)),
+        timeout=float(os.getenv(prefix + "TIMEOUT", default.timeout)),
+        max_retries=int(os.getenv(prefix + "RETRIES", default.max_retries)),
+    )
+
+
+class TokenBucket:
+    """
+    Async token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and waits for the next refill when none are left.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ApiClient:
+    """Keep-alive connection pool, token bucket and retry policy for one API."""
+
+    def __init__(self, name: str, config: ApiConfig):
+        self.name = name
+        self.config = config
+        self._bucket = TokenBucket(config.rate_per_second)
+        self._client = httpx.AsyncClient(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+            ),
+        )
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.config.backoff_max)
+                except ValueError:
+                    pass
+        delay = self.config.backoff_base * (2**attempt)
+        return min(delay, self.config.backoff_max) * (0.5 + random.random() / 2)
+
+    async def _request(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        on_latency: Optional[Callable[[float], None]] = None,
+    ) -> httpx.Response:
+        attempt = 0
+        elapsed = 0.0
+        while True:
+            await self._bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = await self._client.get(path, params=params)
+            except httpx.TransportError as e:
+                elapsed += time.perf_counter() - start
+                if attempt >= self.config.max_retries:
+                    if on_latency is not None:
+                        on_latency(elapsed)
+                    raise
+                delay = self._retry_delay(attempt, None)
+                logger.warning(
+                    f"{self.name} request {path} failed ({e!r}), retrying in {delay:.1f}s"
+                )
+            else:
+                elapsed += time.perf_counter() - start
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= self.config.max_retries
+                ):
+                    if on_latency is not None:
+                        on_latency(elapsed)
+                    return response
+                delay = self._retry_delay(attempt, response)
+                logger.warning(
+                    f"{self.name} request {path} returned {response.status_code}, "
+                    f"retrying in {delay:.1f}s"
+                )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        on_latency: Optional[Callable[[float], None]] = None,
+    ) -> httpx.Response:
+        """
+        GET path relative to the API base URL from any event loop.
+
+        Args:
+            path: Path relative to the configured base URL
+            params: Query parameters
+            on_latency: Called on the client loop with the seconds spent in
+                the HTTP attempts themselves (rate-limit waits and retry
+                backoff excluded), so callers can record request latency
+                without counting the time their own loop takes to resume
+
+        Returns:
+            The final httpx.Response (after retries); transport errors are
+            raised once retries are exhausted
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(path, params, on_latency), _get_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def get_sync(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        """Blocking variant of get() for synchronous callers."""
+        return asyncio.run_coroutine_threadsafe(
+            self._request(path, params), _get_loop()
+        ).result()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def lookup_found(response: httpx.Response) -> bool:
+    """
+    Whether a lookup response (after retries) has results to read.
+
+    Returns:
+        True for 200. False for 404 and other client errors the API would
+        repeat for the same term (e.g. 400/422 for an odd term string),
+        which are answers, not outages.
+
+    Raises:
+        httpx.HTTPStatusError: For a 429 or 5xx that outlasted the retries
+            (or any other unexpected status), so the failure is not mistaken
+            for (and cached as) "no match"
+    """
+    status = response.status_code
+    if status == 200:
+        return True
+    if 400 <= status < 500 and status not in RETRY_STATUS_CODES:
+        return False
+    raise httpx.HTTPStatusError(
+        f"{status} from {response.request.url}",
+        request=response.request,
+        response=response,
+    )
+
+
+# Shared background event loop that owns every ApiClient
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+_CLIENTS: Dict[str, ApiClient] = {}
+_CONFIGS: Dict[str, ApiConfig] = {}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="term-api-client", daemon=True
+            )
+            thread.start()
+            _LOOP = loop
+        return _LOOP
+
+
+def get_api_client(name: str) -> ApiClient:
+    """
+    Get the shared client for an API ("pharmgkb" or "rxnorm").
+
+    The client is created on first use from configure_api() overrides or the
+    environment.
+    """
+    with _LOOP_LOCK:
+        client = _CLIENTS.get(name)
+        if client is None:
+            config = _CONFIGS.get(name) or _config_from_env(name)
+            client = ApiClient(name, config)
+            _CLIENTS[name] = client
+        return client
+
+
+def get_api_config(name: str) -> ApiConfig:
+    """Current settings for an API (configure_api() overrides, else the environment)."""
+    with _LOOP_LOCK:
+        return _CONFIGS.get(name) or _config_from_env(name)
+
+
+def configure_api(name: str, **overrides) -> ApiConfig:
+    """
+    Override settings for an API, e.g. configure_api("rxnorm", base_url=stub_url).
+
+    Any existing client for the API is closed and rebuilt on next use.
+    """
+    with _LOOP_LOCK:
+        config = replace(_CONFIGS.get(name) or _config_from_env(name), **overrides)
+        _CONFIGS[name] = config
+        client = _CLIENTS.pop(name, None)
+    if client is not None:
+        _close_client(client)
+    return config
+
+
+def close_api_clients() -> None:
+    """Close all pooled connections; clients are recreated on next use."""
+    with _LOOP_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        _close_client(client)
+
+
+def _close_client(client: ApiClient) -> None:
+    if _LOOP is None or _LOOP.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(client.aclose(), _LOOP).result()
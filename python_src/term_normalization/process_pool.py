@@ -0,0 +1,195 @@
+"""
+Process pool for CPU-bound term normalization.
+
+Fuzzy matching is pure-Python SequenceMatcher work, so normalizing files in
+threads serializes on the GIL and competes with the event loop serving the
+API. This module runs normalization in a ProcessPoolExecutor instead. Each
+worker process warms up its TermLookup at start (mapping the
+lookup snapshots, see snapshot.py), then normalizes annotation dicts sent to
+it and returns the normalized dicts.
+
+Workers are started with the "spawn" method, since the parent process owns
+background threads (the API client loop, SQLite connections) that must not
+be forked. The SQLite term cache is shared between workers; the in-memory
+cache and the API clients are per process, so each worker gets an equal
+share of the configured PharmGKB/RxNorm request rates and the total rate
+stays the same.
+
+    TERM_NORMALIZATION_PROCESSES   worker processes (default: CPU count)
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from term_normalization.http_client import (
+    PHARMGKB_API,
+    RXNORM_API,
+    configure_api,
+    get_api_config,
+)
+from term_normalization.term_lookup import (
+    get_term_lookup,
+    normalize_annotations,
+    save_annotations,
+)
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def default_process_count() -> int:
+    return int(os.getenv("TERM_NORMALIZATION_PROCESSES", os.cpu_count() or 1))
+
+
+def _init_worker(api_rate_share: float) -> None:
+    """Process initializer: split the API rate limits and preload the lookups."""
+    for name in (PHARMGKB_API, RXNORM_API):
+        config = get_api_config(name)
+        configure_api(name, rate_per_second=config.rate_per_second * api_rate_share)
+    get_term_lookup().warm_up()
+
+
+def normalize_dict_in_worker(
+    annotations: Dict, output_file: Optional[Path] = None
+) -> Dict:
+    """
+    Normalize an annotation dict in the current worker process.
+
+    Args:
+        annotations: Annotation JSON (not modified)
+        output_file: If given, the normalized dict is also written here
+            (atomically, via a .json.tmp file)
+
+    Returns:
+        The normalized copy; lookup errors are raised to the caller
+    """
+    normalized = normalize_annotations(annotations)
+    if output_file is not None:
+        output_file = Path(output_file)
+        temp_file = output_file.with_suffix(".json.tmp")
+        save_annotations(normalized, temp_file)
+        temp_file.replace(output_file)
+    return normalized
+
+
+def normalize_file_in_worker(input_file: Path, output_file: Path) -> None:
+    """
+    Normalize an annotation file in the current worker process.
+
+    Unlike normalize_annotation, load and lookup errors are raised so the
+    caller can report them.
+    """
+    with open(input_file, "r") as f:
+        annotations = json.load(f)
+    normalize_dict_in_worker(annotations, output_file)
+
+
+def get_normalization_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get the shared normalization process pool, starting it on first use.
+
+    Args:
+        max_workers: Worker processes (default TERM_NORMALIZATION_PROCESSES or
+            the CPU count); a different value starts a new pool. The old one
+            finishes the work already submitted to it in the background, so
+            neither this call (possibly on the event loop) nor other callers
+            waiting on the lock block on it
+    """
+    global _POOL, _POOL_WORKERS
+    max_workers = max_workers or default_process_count()
+    retired = None
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_WORKERS != max_workers:
+            retired, _POOL = _POOL, None
+        if _POOL is None:
+            logger.info(f"Starting term normalization pool with {max_workers} processes")
+            _POOL = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(1.0 / max_workers,),
+            )
+            _POOL_WORKERS = max_workers
+        pool = _POOL
+    if retired is not None:
+        retired.shutdown(wait=False)
+    return pool
+
+
+def shutdown_normalization_pool(wait: bool = True) -> None:
+    """Stop the shared pool's worker processes; it is restarted on next use."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+async def normalize_dict_in_pool(
+    annotations: Dict,
+    output_file: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> Dict:
+    """Awaitable normalize_dict_in_worker() run on the shared process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_normalization_pool(max_workers),
+        normalize_dict_in_worker,
+        annotations,
+        output_file,
+    )
+
+
+async def normalize_file_in_pool(
+    input_file: Path, output_file: Path, max_workers: Optional[int] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    Normalize an annotation file on the shared process pool.
+
+    Returns:
+        Tuple of (success, error message)
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(
+            get_normalization_pool(max_workers),
+            normalize_file_in_worker,
+            input_file,
+            output_file,
+        )
+        return (True, None)
+    except Exception as e:
+        return (False, str(e))
+
+
+def normalize_files_in_pool(
+    files: List[Tuple[Path, Path]], max_workers: Optional[int] = None
+) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Normalize (input path, output path) pairs on the shared process pool.
+
+    Returns:
+        List of (success, error message) in input order
+    """
+    pool = get_normalization_pool(max_workers)
+    futures = [
+        pool.submit(normalize_file_in_worker, input_file, output_file)
+        for input_file, output_file in files
+    ]
+    outcomes: List[Tuple[bool, Optional[str]]] = []
+    for future in futures:
+        try:
+            future.result()
+            outcomes.append((True, None))
+        except Exception as e:
+            outcomes.append((False, str(e)))
+    return outcomes
@@ -1,11 +1,625 @@
-import pandas as pd
-from typing import List, Optional
+import asyncio
+import functools
+import heapq
+import math
+from bisect import bisect_left
+from collections import Counter
+import threading
+from concurrent.futures import Executor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from difflib import SequenceMatcher
 import re
 
+if TYPE_CHECKING:
+    # pandas is imported where it is used, so importing this module stays cheap
+    import pandas as pd
+
+    from term_normalization.snapshot import SnapshotTable
+
+# Either a TSV loaded with pandas or its precompiled snapshot
+LookupTable = Union["pd.DataFrame", "SnapshotTable"]
+
+
+class BaseSearchResult:
+    """
+    A normalized term for one raw input: id, name, url and match score.
+
+    Results are created for every candidate a lookup scores, so they are
+    plain slotted objects rather than Pydantic models; to_dict() converts
+    them at the JSON and API boundary.
+    """
+
+    __slots__ = ("raw_input", "id", "normalized_term", "url", "score")
+
+    def __init__(
+        self, raw_input: str, id: str, normalized_term: str, url: str, score: float
+    ):
+        self.raw_input = raw_input
+        self.id = id
+        self.normalized_term = normalized_term
+        self.url = url
+        self.score = float(score)
+
+    def to_dict(self) -> dict:
+        """Return a plain-Python dict representation that is safe for json.dump."""
+        return {
+            "raw_input": self.raw_input,
+            "id": self.id,
+            "normalized_term": self.normalized_term,
+            "url": self.url,
+            "score": self.score,
+        }
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+def trigrams(text: str) -> List[str]:
+    """Character trigrams of text, padded so short strings still produce grams."""
+    padded = f"  {text}  "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramIndex:
+    """
+    Inverted index from padded character trigrams to the entries containing them.
+
+    Used as a candidate generator in front of SequenceMatcher. A ratio of t
+    means the two strings share a common subsequence of at least
+    L = t * (len_a + len_b) / 2 characters. Turning the query into that
+    subsequence deletes len_a - L characters (each destroys at most 3 padded
+    trigrams) and turning it into the entry inserts len_b - L characters
+    (each splits at most 2), so a match keeps at least
+    `5L - 2 * (len_a + len_b) + 2` of the query's trigrams. Entries sharing
+    fewer trigrams than that cannot reach the threshold and are skipped
+    without changing the results.
+
+    Posting lists hold entry indices in ascending order, one per occurrence of
+    the trigram, so summing the slices counts shared trigrams with
+    multiplicity. Callers keep entries sorted by length, so a length window
+    maps to a bisectable slice of every posting list.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        postings: Dict[str, List[int]] = {}
+        for idx, text in enumerate(texts):
+            for gram in trigrams(text):
+                postings.setdefault(gram, []).append(idx)
+        self.postings = postings
+
+    @classmethod
+    def from_postings(cls, postings) -> "TrigramIndex":
+        """Wrap prebuilt postings (any mapping with .get(gram)) without rebuilding."""
+        index = cls.__new__(cls)
+        index.postings = postings
+        return index
+
+    @staticmethod
+    def required_overlap(query_len: int, text_len: int, threshold: float) -> int:
+        """
+        Minimum number of shared trigrams for a ratio >= threshold.
+
+        Args:
+            query_len (int): Length of the query.
+            text_len (int): Length of the candidate entry.
+            threshold (float): SequenceMatcher ratio threshold.
+        """
+        total = query_len + text_len
+        # Small epsilon keeps the float rounding on the conservative side
+        common = math.ceil(threshold * total / 2.0 - 1e-9)
+        return 5 * common - 2 * total + 2
+
+    def candidates(
+        self,
+        query: str,
+        threshold: float,
+        start: int,
+        end: int,
+        lengths: Sequence[int],
+    ) -> Optional[List[int]]:
+        """
+        Entries in [start, end) that share enough trigrams with the query.
+
+        Returns None when the bound is too weak to exclude entries that share
+        no trigram at all (low thresholds); the caller should then fall back
+        to scanning the window.
+        """
+        query_len = len(query)
+        if start >= end:
+            return []
+        # If any length in the window allows zero shared trigrams, entries
+        # missing from every posting list could still match
+        for text_len in range(lengths[start], lengths[end - 1] + 1):
+            if self.required_overlap(query_len, text_len, threshold) <= 0:
+                return None
+
+        counts: Counter = Counter()
+        for gram in set(trigrams(query)):
+            posting = self.postings.get(gram)
+            if not posting:
+                continue
+            lo = bisect_left(posting, start)
+            hi = bisect_left(posting, end, lo)
+            if lo < hi:
+                counts.update(posting[lo:hi])
+
+        required = self.required_overlap
+        return [
+            idx
+            for idx, shared in counts.items()
+            if shared >= required(query_len, lengths[idx], threshold)
+        ]
+
+
+class FuzzyIndex:
+    """
+    Preprocessed strings for fuzzy matching against a single column.
+
+    Each entry is an already lowercased/cleaned string together with the
+    position of the dataframe row it came from. Entries are kept sorted by
+    length so a query only has to look at the length window that can reach
+    the threshold. Within that window a TrigramIndex narrows the entries to
+    those sharing enough trigrams with the query, and each candidate is
+    checked against the cheap `quick_ratio` bound before
+    `SequenceMatcher.ratio` is run.
+
+    Usage:
+    index = FuzzyIndex(["warfarin", "aspirin"], [0, 1])
+    index.search("warfarin", threshold=0.8)
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        row_ids: Sequence[int],
+        originals: Optional[Sequence[str]] = None,
+    ):
+        order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), i))
+        self.texts: List[str] = [texts[i] for i in order]
+        self.row_ids: List[int] = [row_ids[i] for i in order]
+        # Text reported back as the match (e.g. the un-cleaned synonym)
+        self.originals: List[str] = (
+            [originals[i] for i in order] if originals is not None else self.texts
+        )
+        # Insertion order of each entry, used to break ties the same way a
+        # left-to-right scan of the dataframe would
+        self.positions: List[int] = list(order)
+        self.lengths: List[int] = [len(text) for text in self.texts]
+        self.trigram_index = TrigramIndex(self.texts)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        texts: Sequence[str],
+        row_ids: Sequence[int],
+        originals: Sequence[str],
+        positions: Sequence[int],
+        lengths: Sequence[int],
+        trigram_index: TrigramIndex,
+    ) -> "FuzzyIndex":
+        """
+        Wrap entries that are already sorted and indexed (e.g. from a snapshot).
+
+        The sequences must be laid out exactly as __init__ would produce them.
+        """
+        index = cls.__new__(cls)
+        index.texts = texts
+        index.row_ids = row_ids
+        index.originals = originals
+        index.positions = positions
+        index.lengths = lengths
+        index.trigram_index = trigram_index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _length_window(self, query_len: int, threshold: float) -> Tuple[int, int]:
+        """
+        Return the [start, end) slice of entries whose length can reach threshold.
+
+        This is the `real_quick_ratio` bound: ratio <= 2*min(a, b) / (a + b).
+        """
+        if threshold <= 0:
+            return 0, len(self.lengths)
+
+        def reachable(length: int) -> bool:
+            total = query_len + length
+            return total > 0 and 2.0 * min(query_len, length) / total >= threshold
+
+        # Estimate the bounds analytically, then settle them with the exact
+        # float formula so the window matches ratio() to the last bit
+        low = max(0, math.floor(query_len * threshold / (2.0 - threshold)) - 1)
+        while low <= query_len and not reachable(low):
+            low += 1
+        high = math.ceil(query_len * (2.0 - threshold) / threshold) + 1
+        while high >= query_len and not reachable(high):
+            high -= 1
+        if low > high:
+            return 0, 0
+
+        start = bisect_left(self.lengths, low)
+        end = bisect_left(self.lengths, high + 1)
+        return start, end
+
+    def candidates(self, query: str, threshold: float) -> Sequence[int]:
+        """Entry indices that survive the length and trigram bounds for this query."""
+        start, end = self._length_window(len(query), threshold)
+        if threshold > 0:
+            candidates = self.trigram_index.candidates(
+                query, threshold, start, end, self.lengths
+            )
+            if candidates is not None:
+                return candidates
+        return range(start, end)
+
+    def search(
+        self,
+        query: str,
+        threshold: float = 0.8,
+        top_k: Optional[int] = None,
+        per_row: bool = False,
+    ) -> List[Tuple[int, float, int]]:
+        """
+        Score the query against every entry that can reach the threshold.
+
+        Args:
+            query (str): Query, already preprocessed the same way as the entries.
+            threshold (float, optional): Minimum similarity. Defaults to 0.8.
+            top_k (int, optional): Keep only the best top_k entries. None keeps all.
+            per_row (bool, optional): Keep only the best entry of each row
+                (e.g. the best synonym in a comma-separated list); top_k then
+                counts rows.
+
+        Returns:
+            List of (entry_index, score, row_id) sorted by score descending,
+            ties broken by row order.
+        """
+        query_counts: Dict[str, int] = {}
+        for ch in query:
+            query_counts[ch] = query_counts.get(ch, 0) + 1
+
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(query)
+        query_len = len(query)
+        texts = self.texts
+        row_ids = self.row_ids
+        positions = self.positions
+        scored = []
+        # row_id -> (score, -position, entry_index) of the row's best entry
+        best_per_row: Dict[int, Tuple[float, int, int]] = {}
+
+        for idx in self.candidates(query, threshold):
+            text = texts[idx]
+            total = query_len + len(text)
+
+            if threshold > 0:
+                # quick_ratio bound: characters in common regardless of order
+                avail = dict(query_counts)
+                common = 0
+                for ch in text:
+                    count = avail.get(ch, 0)
+                    if count > 0:
+                        avail[ch] = count - 1
+                        common += 1
+                if 2.0 * common / total < threshold:
+                    continue
+
+            # SequenceMatcher caches information about seq2, so the query is
+            # kept as seq1 to mirror calc_similarity(query, text)
+            matcher.set_seq2(text)
+            score = matcher.ratio()
+            if score < threshold:
+                continue
+            if per_row:
+                row_id = row_ids[idx]
+                best = (score, -positions[idx], idx)
+                current = best_per_row.get(row_id)
+                if current is None or best > current:
+                    best_per_row[row_id] = best
+            else:
+                scored.append((idx, score, row_ids[idx]))
+
+        if per_row:
+            scored = [
+                (idx, score, row_id)
+                for row_id, (score, _, idx) in best_per_row.items()
+            ]
+        key = lambda item: (item[1], -item[2], -positions[item[0]])
+        if top_k is None:
+            return sorted(scored, key=key, reverse=True)
+        return heapq.nlargest(top_k, scored, key=key)
+
+
+class ExplodedColumn:
+    """
+    A comma-separated column flattened into one entry per list item.
+
+    Built once per column and shared by the fuzzy and exact indexes, so the
+    split/strip/regex cleaning runs once instead of per index or per query.
+
+    Attributes:
+        items: Stripped list items, as reported back to callers
+        texts: Lowercased items with special characters removed (may be
+            empty, e.g. for an item of only punctuation)
+        row_ids: Row position of each item
+    """
+
+    __slots__ = ("items", "texts", "row_ids")
+
+    def __init__(self, items: List[str], texts: List[str], row_ids: List[int]):
+        self.items = items
+        self.texts = texts
+        self.row_ids = row_ids
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def explode_comma_list(values: Sequence) -> ExplodedColumn:
+    """Split each value of a comma-separated column into items (missing values skipped)."""
+    import pandas as pd
+
+    items, texts, row_ids = [], [], []
+    for row_id, value in enumerate(values):
+        if pd.isna(value):
+            continue
+        for item in str(value).split(","):
+            items.append(item.strip())
+            texts.append(strip_special_characters(item.lower()))
+            row_ids.append(row_id)
+    return ExplodedColumn(items, texts, row_ids)
+
+
+# Indexes are built once per (dataframe, column) and reused across queries
+_INDEX_CACHE: Dict[Tuple[int, str, bool], Tuple["pd.DataFrame", FuzzyIndex]] = {}
+_EXPLODED_CACHE: Dict[Tuple[int, str], Tuple["pd.DataFrame", ExplodedColumn]] = {}
+_INDEX_LOCK = threading.RLock()
+
+
+def get_exploded_column(df: "pd.DataFrame", column_name: str) -> ExplodedColumn:
+    """Get (building on first use) the exploded items of a comma-separated column."""
+    key = (id(df), column_name)
+    cached = _EXPLODED_CACHE.get(key)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+    with _INDEX_LOCK:
+        cached = _EXPLODED_CACHE.get(key)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        exploded = explode_comma_list(df[column_name].tolist())
+        _EXPLODED_CACHE[key] = (df, exploded)
+        return exploded
+
+
+def _build_column_index(values: Sequence) -> FuzzyIndex:
+    import pandas as pd
+
+    texts, row_ids = [], []
+    for row_id, value in enumerate(values):
+        if pd.isna(value):
+            continue
+        texts.append(str(value).lower().strip())
+        row_ids.append(row_id)
+    return FuzzyIndex(texts, row_ids)
+
+
+def _build_comma_list_index(exploded: ExplodedColumn) -> FuzzyIndex:
+    # Skip items that are empty once cleaned
+    keep = [i for i, text in enumerate(exploded.texts) if text]
+    return FuzzyIndex(
+        [exploded.texts[i] for i in keep],
+        [exploded.row_ids[i] for i in keep],
+        [exploded.items[i] for i in keep],
+    )
+
+
+def build_fuzzy_index(
+    values: Union[Sequence, ExplodedColumn], comma_list: bool = False
+) -> FuzzyIndex:
+    """
+    Build a FuzzyIndex over one column's values (missing values are skipped).
+
+    Args:
+        values: Column values in row order, or an already exploded column.
+        comma_list (bool, optional): Split comma-separated values into separate entries.
+    """
+    if comma_list:
+        if not isinstance(values, ExplodedColumn):
+            values = explode_comma_list(values)
+        return _build_comma_list_index(values)
+    return _build_column_index(values)
+
+
+def get_fuzzy_index(
+    df: LookupTable, column_name: str, comma_list: bool = False
+) -> FuzzyIndex:
+    """
+    Get (building on first use) the FuzzyIndex for a dataframe column.
+
+    Args:
+        df (LookupTable): The dataframe (or snapshot) the column belongs to.
+        column_name (str): The column to index.
+        comma_list (bool, optional): Split comma-separated values into separate entries.
+    """
+    import pandas as pd
+
+    if not isinstance(df, pd.DataFrame):
+        # Snapshots ship their indexes prebuilt
+        return df.fuzzy_index(column_name, comma_list)
+
+    key = (id(df), column_name, comma_list)
+    cached = _INDEX_CACHE.get(key)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(key)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        values = (
+            get_exploded_column(df, column_name)
+            if comma_list
+            else df[column_name].tolist()
+        )
+        index = build_fuzzy_index(values, comma_list)
+        # Keep a reference to the dataframe so its id() cannot be reused
+        _INDEX_CACHE[key] = (df, index)
+        return index
+
+
+class ExactIndex:
+    """
+    Case-insensitive exact lookup from names and synonyms to dataframe rows.
+
+    Keys are lowercased and stripped. Rows are kept in the order the columns
+    were indexed, so a hit on a primary name column ranks ahead of a hit on a
+    synonym column.
+
+    Usage:
+    index = ExactIndex()
+    index.add("Warfarin", 0)
+    index.lookup("warfarin ")  # [0]
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_mapping(cls, rows) -> "ExactIndex":
+        """Wrap a prebuilt key -> rows mapping (any mapping with .get) as an index."""
+        index = cls.__new__(cls)
+        index._rows = rows
+        return index
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return text.lower().strip()
+
+    def add(self, text: str, row_id: int) -> None:
+        key = self.normalize(text)
+        if not key:
+            return
+        rows = self._rows.setdefault(key, [])
+        if row_id not in rows:
+            rows.append(row_id)
+
+    def lookup(self, query: str) -> List[int]:
+        """Rows whose indexed text equals the query, ignoring case and padding."""
+        return self._rows.get(self.normalize(query), [])
+
+
+_EXACT_INDEX_CACHE: Dict[Tuple, Tuple["pd.DataFrame", ExactIndex]] = {}
+
+
+def build_exact_index(
+    columns: Sequence[Sequence],
+    comma_columns: Sequence[Union[Sequence, ExplodedColumn]] = (),
+) -> ExactIndex:
+    """
+    Build an ExactIndex from column values (missing values are skipped).
+
+    Args:
+        columns: Values of each whole-value column, in priority order.
+        comma_columns: Values (or exploded items) of each comma-separated
+            column, indexed after `columns`.
+    """
+    import pandas as pd
+
+    index = ExactIndex()
+    for values in columns:
+        for row_id, value in enumerate(values):
+            if not pd.isna(value):
+                index.add(str(value), row_id)
+    for values in comma_columns:
+        if not isinstance(values, ExplodedColumn):
+            values = explode_comma_list(values)
+        for item, row_id in zip(values.items, values.row_ids):
+            index.add(item, row_id)
+    return index
+
+
+def get_exact_index(
+    df: LookupTable,
+    columns: Sequence[str],
+    comma_columns: Sequence[str] = (),
+) -> ExactIndex:
+    """
+    Get (building on first use) an ExactIndex over several dataframe columns.
+
+    Args:
+        df (LookupTable): The dataframe (or snapshot) to index.
+        columns (List[str]): Columns indexed as whole values, in priority order.
+        comma_columns (List[str], optional): Columns holding comma-separated
+            values, indexed item by item after `columns`.
+    """
+    import pandas as pd
+
+    if not isinstance(df, pd.DataFrame):
+        return df.exact_index(columns, comma_columns)
+
+    key = (id(df), tuple(columns), tuple(comma_columns))
+    cached = _EXACT_INDEX_CACHE.get(key)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    with _INDEX_LOCK:
+        cached = _EXACT_INDEX_CACHE.get(key)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        index = build_exact_index(
+            [df[column].tolist() for column in columns],
+            [get_exploded_column(df, column) for column in comma_columns],
+        )
+        _EXACT_INDEX_CACHE[key] = (df, index)
+        return index
+
+
+def get_row_dict(
+    df: LookupTable, row_id: int, keep_columns: Optional[List[str]] = None
+) -> dict:
+    """
+    Return a row as a {column: value} dict.
+
+    Args:
+        df (LookupTable): The dataframe (or snapshot) holding the row.
+        row_id (int): Position of the row.
+        keep_columns (List[str], optional): Columns to keep. If None, keeps all columns.
+    """
+    import pandas as pd
+
+    if isinstance(df, pd.DataFrame):
+        row_dict = df.iloc[row_id].to_dict()
+    else:
+        row_dict = df.row(row_id)
+    if keep_columns is not None:
+        row_dict = {col: row_dict.get(col) for col in keep_columns if col in row_dict}
+    return row_dict
+
 
 def general_search(
-    df: pd.DataFrame,
+    df: LookupTable,
     query: str,
     column_name: str,
     id_column: str,
@@ -17,7 +631,7 @@ def general_search(
     Takes a dataframe and returns the top_k matches for the query based on the column_name and id_column.
 
     Args:
-        df (pd.DataFrame): The dataframe to search.
+        df (LookupTable): The dataframe (or snapshot) to search.
         query (str): The query to search for.
         column_name (str): The name of the column to search in.
         threshold (float, optional): The threshold for the fuzzy match. Defaults to 0.8.
@@ -28,25 +642,13 @@ def general_search(
         return []
 
     query_lower = query.lower().strip()
-    matches = []
+    index = get_fuzzy_index(df, column_name)
 
-    for idx, row in df.iterrows():
-        if pd.isna(row[column_name]):
-            continue
-
-        text = str(row[column_name]).lower().strip()
-        similarity = calc_similarity(query_lower, text)
-
-        if similarity >= threshold:
-            row_dict = row.to_dict()
-            if keep_columns is not None:
-                row_dict = {
-                    col: row_dict.get(col) for col in keep_columns if col in row_dict
-                }
-            row_dict["score"] = similarity
-            matches.append(row_dict)
-
-    matches.sort(key=lambda x: x["score"], reverse=True)
+    matches = []
+    for _, similarity, row_id in index.search(query_lower, threshold, top_k):
+        row_dict = get_row_dict(df, row_id, keep_columns)
+        row_dict["score"] = similarity
+        matches.append(row_dict)
     return matches
 
 
@@ -56,7 +658,7 @@ def strip_special_characters(text: str) -> str:
 
 
 def general_search_comma_list(
-    df: pd.DataFrame,
+    df: LookupTable,
     query: str,
     column_name: str,
     id_column: str,
@@ -70,7 +672,7 @@ def general_search_comma_list(
     Strips special characters before comparison.
 
     Args:
-        df (pd.DataFrame): The dataframe to search.
+        df (LookupTable): The dataframe (or snapshot) to search.
         query (str): The query to search for.
         column_name (str): The name of the column to search in (contains comma-separated values).
         id_column (str): The name of the ID column.
@@ -82,38 +684,31 @@ def general_search_comma_list(
         return []
 
     query_cleaned = strip_special_characters(query.lower())
-    matches = []
-
-    for idx, row in df.iterrows():
-        if pd.isna(row[column_name]):
-            continue
+    index = get_fuzzy_index(df, column_name, comma_list=True)
 
-        # Split comma-separated values and find best match
-        comma_list = str(row[column_name]).split(",")
-        best_similarity = 0.0
-        best_match_text = ""
-
-        for item in comma_list:
-            item_cleaned = strip_special_characters(item.lower())
-            if item_cleaned:  # Skip empty items
-                similarity = calc_similarity(query_cleaned, item_cleaned)
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match_text = item.strip()
-
-        if best_similarity >= threshold:
-            row_dict = row.to_dict()
-            if keep_columns is not None:
-                row_dict = {
-                    col: row_dict.get(col) for col in keep_columns if col in row_dict
-                }
-            row_dict["score"] = best_similarity
-            row_dict["matched_text"] = best_match_text
-            matches.append(row_dict)
-
-    matches.sort(key=lambda x: x["score"], reverse=True)
-    return matches[:top_k]
+    matches = []
+    for entry_idx, similarity, row_id in index.search(
+        query_cleaned, threshold, top_k, per_row=True
+    ):
+        row_dict = get_row_dict(df, row_id, keep_columns)
+        row_dict["score"] = similarity
+        # A row where no item shares a character with the query has no match text
+        row_dict["matched_text"] = index.originals[entry_idx] if similarity > 0 else ""
+        matches.append(row_dict)
+    return matches
 
 
 def calc_similarity(query: str, text: str) -> float:
     return SequenceMatcher(None, query.lower().strip(), text.lower().strip()).ratio()
+
+
+async def run_blocking(
+    executor: Optional[Executor], fn: Callable[..., Any], *args, **kwargs
+) -> Any:
+    """
+    Run a blocking step of an async lookup (table scans, cache reads and
+    writes) on executor, or the event loop's default pool when None.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(fn, *args, **kwargs)
+    )
@@ -0,0 +1,131 @@
+"""
+Single-flight coalescing of concurrent identical lookups.
+
+When several files are normalized at once, many workers ask for the same
+term at the same moment. They would all miss the TermCache and all send the
+same PharmGKB/RxNorm request. SingleFlight lets the first caller for a key
+do the work while concurrent callers for that key wait for its result (or
+its exception) instead of repeating it.
+
+Threaded callers block on a concurrent.futures.Future; async callers await
+the same future through asyncio.wrap_future, so both kinds of caller can
+join the same flight. An async leader can run the work either in a thread
+(do_async) or as a coroutine on its event loop (do_coroutine).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return (future for key, whether the caller leads the call)."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.calls += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    async def _run_coroutine(
+        self, key: Hashable, future: Future, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Call fn() unless a call for key is already running, else wait for it.
+
+        Args:
+            key: Hashable identity of the call
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            The result of the (possibly shared) call; its exception is raised
+            to every waiting caller
+        """
+        future, leader = self._join(key)
+        if leader:
+            return self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Async variant of do(): the leader runs fn in a worker thread, and
+        followers await the shared future without holding a thread.
+        """
+        future, leader = self._join(key)
+        if leader:
+            # fn keeps running and resolves the future even if this await is cancelled
+            return await asyncio.to_thread(self._run, key, future, fn)
+        return await asyncio.wrap_future(future)
+
+    async def do_coroutine(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Async variant of do() for a coroutine function: the leader runs it on
+        the event loop, so neither the leader nor followers hold a thread
+        while it waits on the network.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(self._run_coroutine(key, future, fn))
+            # The outcome is delivered through the shared future
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            # fn keeps running and resolves the future even if this await is cancelled
+            return await asyncio.shield(task)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+# Global flight shared by VariantLookup and DrugLookup
+_LOOKUP_FLIGHT = SingleFlight()
+
+
+def get_lookup_flight() -> SingleFlight:
+    """Get the global SingleFlight used to coalesce term lookups."""
+    return _LOOKUP_FLIGHT
@@ -0,0 +1,425 @@
+"""
+Precompiled, memory-mapped snapshots of the term lookup TSVs.
+
+`scripts/build_term_snapshot.py` compiles variants.tsv / drugs.tsv into a
+single binary file next to each TSV (e.g. variants.snapshot) holding:
+
+- one interned string pool (each distinct string stored once as UTF-8),
+- every column as a table of pool ids,
+- the exploded, cleaned entries of each FuzzyIndex (comma-separated columns
+  split item by item) with their row ids, positions, lengths and trigram
+  posting lists,
+- the sorted key -> rows tables of each ExactIndex.
+
+`load_lookup_table()` maps the file read-only and wraps the arrays in the
+same FuzzyIndex / TrigramIndex / ExactIndex classes used for DataFrames, so
+opening it takes milliseconds and worker processes share the pages through
+the OS page cache instead of each parsing the TSV into its own DataFrame.
+The snapshot records the SHA-1 of the TSV it was built from; a stale or
+missing snapshot falls back to pandas.
+
+File layout: 8-byte magic, little-endian uint64 header length, JSON header,
+then 8-byte aligned arrays described by the header.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from term_normalization.search_utils import (
+    ExactIndex,
+    FuzzyIndex,
+    TrigramIndex,
+    build_exact_index,
+    build_fuzzy_index,
+    get_exact_index,
+    get_fuzzy_index,
+)
+
+SNAPSHOT_MAGIC = b"TLSNAP01"
+SNAPSHOT_SUFFIX = ".snapshot"
+_ALIGN = 8
+
+# (column, comma_list) and (columns, comma_columns) specs of prebuilt indexes
+FuzzySpec = Tuple[str, bool]
+ExactSpec = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+def snapshot_path_for(tsv_path: Path) -> Path:
+    """Snapshot file that belongs to a TSV (same directory, .snapshot suffix)."""
+    return Path(tsv_path).with_suffix(SNAPSHOT_SUFFIX)
+
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IntArray(Sequence):
+    """Read-only int sequence over a numpy array; slices come back as lists."""
+
+    __slots__ = ("_array",)
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._array[idx].tolist()
+        return int(self._array[idx])
+
+
+class StringPool:
+    """Interned strings: string i is blob[offsets[i]:offsets[i + 1]] as UTF-8."""
+
+    __slots__ = ("_blob", "_offsets")
+
+    def __init__(self, blob: memoryview, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def get(self, string_id: int) -> str:
+        start = int(self._offsets[string_id])
+        end = int(self._offsets[string_id + 1])
+        return str(self._blob[start:end], "utf-8")
+
+
+class StringTable(Sequence):
+    """Read-only string sequence of pool ids; id -1 reads as None."""
+
+    __slots__ = ("_pool", "_ids")
+
+    def __init__(self, pool: StringPool, ids: np.ndarray):
+        self._pool = pool
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        string_id = int(self._ids[idx])
+        if string_id < 0:
+            return None
+        return self._pool.get(string_id)
+
+
+class SortedStringMap:
+    """
+    Read-only str -> list-of-ints mapping stored as sorted keys plus CSR arrays.
+
+    Looks keys up by binary search, so nothing has to be rebuilt on open.
+    Values are IntArray views of the shared value array.
+    """
+
+    def __init__(self, keys: StringTable, offsets: np.ndarray, values: np.ndarray):
+        self._keys = keys
+        self._offsets = offsets
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: str, default=None):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return IntArray(
+                self._values[int(self._offsets[i]) : int(self._offsets[i + 1])]
+            )
+        return default
+
+
+class _SnapshotWriter:
+    """Collects named arrays and writes them with a JSON header."""
+
+    def __init__(self):
+        self.arrays: Dict[str, np.ndarray] = {}
+        self._pool: Dict[str, int] = {}
+
+    def add(self, name: str, array: np.ndarray) -> None:
+        self.arrays[name] = np.ascontiguousarray(array)
+
+    def add_ints(self, name: str, values: Sequence[int]) -> None:
+        self.add(name, np.asarray(values, dtype="<i4"))
+
+    def add_strings(self, name: str, values: Sequence[Optional[str]]) -> None:
+        pool = self._pool
+        ids = [-1 if v is None else pool.setdefault(str(v), len(pool)) for v in values]
+        self.add_ints(name, ids)
+
+    def _add_pool(self) -> None:
+        encoded = [string.encode("utf-8") for string in self._pool]
+        blob = b"".join(encoded)
+        offsets = np.zeros(len(encoded) + 1, dtype="<u4" if len(blob) < 2**32 else "<i8")
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        self.add("strings/blob", np.frombuffer(blob, dtype=np.uint8))
+        self.add("strings/offsets", offsets)
+
+    def add_mapping(self, name: str, mapping: Dict[str, Sequence[int]]) -> None:
+        keys = sorted(mapping)
+        offsets = np.zeros(len(keys) + 1, dtype="<u4")
+        np.cumsum([len(mapping[k]) for k in keys], out=offsets[1:])
+        self.add_strings(f"{name}/keys", keys)
+        self.add(f"{name}/offsets", offsets)
+        self.add_ints(f"{name}/values", [v for k in keys for v in mapping[k]])
+
+    def write(self, path: Path, header: dict) -> None:
+        self._add_pool()
+        layout = {}
+        offset = 0
+        for name, array in self.arrays.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout[name] = [array.dtype.str, offset, int(array.size)]
+            offset += array.nbytes
+        header = dict(header, arrays=layout)
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes)) // _ALIGN) * _ALIGN
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\0" * (data_start - f.tell()))
+            for name, array in self.arrays.items():
+                f.write(b"\0" * (data_start + layout[name][1] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+
+def build_snapshot(
+    tsv_path: Path,
+    fuzzy_specs: Sequence[FuzzySpec],
+    exact_specs: Sequence[ExactSpec],
+    snapshot_path: Optional[Path] = None,
+) -> Path:
+    """
+    Compile a lookup TSV and its indexes into a snapshot file.
+
+    Args:
+        tsv_path (Path): Source TSV
+        fuzzy_specs: (column, comma_list) of each FuzzyIndex to prebuild
+        exact_specs: (columns, comma_columns) of each ExactIndex to prebuild
+        snapshot_path (Path, optional): Output path (defaults to snapshot_path_for)
+
+    Returns:
+        Path of the written snapshot
+    """
+    tsv_path = Path(tsv_path)
+    snapshot_path = Path(snapshot_path or snapshot_path_for(tsv_path))
+    df = pd.read_csv(tsv_path, sep="\t")
+    writer = _SnapshotWriter()
+
+    columns = list(df.columns)
+    for i, column in enumerate(columns):
+        values = [None if pd.isna(v) else str(v) for v in df[column].tolist()]
+        writer.add_strings(f"column/{i}", values)
+
+    fuzzy = []
+    for i, (column, comma_list) in enumerate(fuzzy_specs):
+        index = get_fuzzy_index(df, column, comma_list=comma_list)
+        prefix = f"fuzzy/{i}"
+        writer.add_strings(f"{prefix}/texts", index.texts)
+        if index.originals is not index.texts:
+            writer.add_strings(f"{prefix}/originals", index.originals)
+        writer.add_ints(f"{prefix}/row_ids", index.row_ids)
+        writer.add_ints(f"{prefix}/positions", index.positions)
+        writer.add_ints(f"{prefix}/lengths", index.lengths)
+        writer.add_mapping(f"{prefix}/postings", index.trigram_index.postings)
+        fuzzy.append({"column": column, "comma_list": bool(comma_list)})
+
+    exact = []
+    for i, (index_columns, comma_columns) in enumerate(exact_specs):
+        index = get_exact_index(df, index_columns, comma_columns)
+        writer.add_mapping(f"exact/{i}", index._rows)
+        exact.append(
+            {"columns": list(index_columns), "comma_columns": list(comma_columns)}
+        )
+
+    writer.write(
+        snapshot_path,
+        {
+            "format": 1,
+            "source": tsv_path.name,
+            "source_sha1": file_sha1(tsv_path),
+            "rows": len(df),
+            "columns": columns,
+            "fuzzy": fuzzy,
+            "exact": exact,
+        },
+    )
+    return snapshot_path
+
+
+class SnapshotTable:
+    """
+    A lookup table opened from a snapshot file.
+
+    Provides what the search functions need from a DataFrame: `empty`, row
+    access and the prebuilt fuzzy/exact indexes. Indexes that were not
+    prebuilt are built from the mapped columns on first use.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a term lookup snapshot: {self.path}")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(SNAPSHOT_MAGIC))
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        self.header = json.loads(
+            self._mmap[header_start : header_start + header_len].decode("utf-8")
+        )
+        self._data_start = -(-(header_start + header_len) // _ALIGN) * _ALIGN
+        self._buffer = memoryview(self._mmap)
+        blob_offset, blob_size = self.header["arrays"]["strings/blob"][1:]
+        blob_start = self._data_start + blob_offset
+        self._pool = StringPool(
+            self._buffer[blob_start : blob_start + blob_size],
+            self._array("strings/offsets"),
+        )
+
+        self.columns: List[str] = self.header["columns"]
+        self._column_tables = [
+            self._strings(f"column/{i}") for i in range(len(self.columns))
+        ]
+        self._fuzzy: Dict[FuzzySpec, FuzzyIndex] = {}
+        self._exact: Dict[ExactSpec, ExactIndex] = {}
+        self._lock = threading.Lock()
+        for i, spec in enumerate(self.header["fuzzy"]):
+            self._fuzzy[(spec["column"], spec["comma_list"])] = self._load_fuzzy(i)
+        for i, spec in enumerate(self.header["exact"]):
+            key = (tuple(spec["columns"]), tuple(spec["comma_columns"]))
+            self._exact[key] = ExactIndex.from_mapping(self._mapping(f"exact/{i}"))
+
+    @property
+    def source_sha1(self) -> str:
+        return self.header["source_sha1"]
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0 or not self.columns
+
+    def __len__(self) -> int:
+        return self.header["rows"]
+
+    def _array(self, name: str) -> Optional[np.ndarray]:
+        spec = self.header["arrays"].get(name)
+        if spec is None:
+            return None
+        dtype, offset, count = spec
+        return np.frombuffer(
+            self._buffer, dtype=dtype, count=count, offset=self._data_start + offset
+        )
+
+    def _strings(self, name: str) -> StringTable:
+        return StringTable(self._pool, self._array(name))
+
+    def _mapping(self, name: str) -> SortedStringMap:
+        return SortedStringMap(
+            self._strings(f"{name}/keys"),
+            self._array(f"{name}/offsets"),
+            self._array(f"{name}/values"),
+        )
+
+    def _load_fuzzy(self, i: int) -> FuzzyIndex:
+        prefix = f"fuzzy/{i}"
+        texts = self._strings(f"{prefix}/texts")
+        originals = (
+            self._strings(f"{prefix}/originals")
+            if f"{prefix}/originals" in self.header["arrays"]
+            else texts
+        )
+        return FuzzyIndex.from_arrays(
+            texts=texts,
+            row_ids=IntArray(self._array(f"{prefix}/row_ids")),
+            originals=originals,
+            positions=IntArray(self._array(f"{prefix}/positions")),
+            lengths=IntArray(self._array(f"{prefix}/lengths")),
+            trigram_index=TrigramIndex.from_postings(
+                self._mapping(f"{prefix}/postings")
+            ),
+        )
+
+    def column(self, name: str) -> StringTable:
+        """Values of one column in row order (None for missing values)."""
+        return self._column_tables[self.columns.index(name)]
+
+    def row(self, row_id: int) -> dict:
+        """Return a row as a {column: value} dict."""
+        return {
+            name: table[row_id] for name, table in zip(self.columns, self._column_tables)
+        }
+
+    def fuzzy_index(self, column_name: str, comma_list: bool = False) -> FuzzyIndex:
+        key = (column_name, comma_list)
+        index = self._fuzzy.get(key)
+        if index is None:
+            with self._lock:
+                index = self._fuzzy.get(key)
+                if index is None:
+                    index = build_fuzzy_index(self.column(column_name), comma_list)
+                    self._fuzzy[key] = index
+        return index
+
+    def exact_index(
+        self, columns: Sequence[str], comma_columns: Sequence[str] = ()
+    ) -> ExactIndex:
+        key = (tuple(columns), tuple(comma_columns))
+        index = self._exact.get(key)
+        if index is None:
+            with self._lock:
+                index = self._exact.get(key)
+                if index is None:
+                    index = build_exact_index(
+                        [self.column(c) for c in columns],
+                        [self.column(c) for c in comma_columns],
+                    )
+                    self._exact[key] = index
+        return index
+
+
+def load_lookup_table(tsv_path: Path) -> Union[pd.DataFrame, SnapshotTable]:
+    """
+    Open a lookup TSV, preferring its precompiled snapshot.
+
+    The snapshot is used when it exists and was built from the current TSV
+    contents; otherwise the TSV is read with pandas.
+
+    Args:
+        tsv_path (Path): Path to variants.tsv / drugs.tsv
+    """
+    snapshot_path = snapshot_path_for(tsv_path)
+    if snapshot_path.exists():
+        try:
+            table = SnapshotTable(snapshot_path)
+            if table.source_sha1 == file_sha1(tsv_path):
+                return table
+            logger.warning(
+                f"Snapshot {snapshot_path} is out of date with {tsv_path}; "
+                "rebuild it with scripts/build_term_snapshot.py"
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not open snapshot {snapshot_path}: {e}")
+    return pd.read_csv(tsv_path, sep="\t")
@@ -4,10 +4,25 @@ Wrapper lookup for Variant and Drug Search
 
 from term_normalization.variant_search import VariantLookup
 from term_normalization.drug_search import DrugLookup
-from typing import Optional, List
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from term_normalization.variant_search import VariantSearchResult
 from term_normalization.drug_search import DrugSearchResult
+from term_normalization.haplotype_index import qualify_star_alleles
+from term_normalization.cache import DEFAULT_DATA_DIR, get_term_cache
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from enum import Enum
+import asyncio
+import copy
 import shutil
 import json
 import os
@@ -21,9 +36,17 @@ class TermType(Enum):
 
 
 class TermLookup:
-    def __init__(self):
-        self.variant_search = VariantLookup()
-        self.drug_search = DrugLookup()
+    def __init__(self, data_dir: Path = DEFAULT_DATA_DIR):
+        # Resolved once, so the tables loaded and the cache version agree
+        data_dir = Path(data_dir).resolve()
+        self.variant_search = VariantLookup(data_dir)
+        self.drug_search = DrugLookup(data_dir)
+        get_term_cache().use_data_dir(data_dir)
+
+    def warm_up(self) -> None:
+        """Load both lookup tables and their indexes (e.g. in a fresh worker process)."""
+        self.variant_search.warm_up()
+        self.drug_search.warm_up()
 
     def lookup_variant(
         self, variant: str, threshold: float = 0.8, top_k: int = 1
@@ -43,6 +66,253 @@ class TermLookup:
         elif term_type == TermType.DRUG:
             return self.lookup_drug(term, threshold=threshold, top_k=top_k)
 
+    async def search_async(
+        self,
+        term: str,
+        term_type: TermType,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[VariantSearchResult]] | Optional[List[DrugSearchResult]]:
+        """search() that awaits API requests; blocking steps run on executor."""
+        if term_type == TermType.VARIANT:
+            return await self.variant_search.search_async(
+                term, threshold=threshold, top_k=top_k, executor=executor
+            )
+        elif term_type == TermType.DRUG:
+            return await self.drug_search.search_async(
+                term, threshold=threshold, top_k=top_k, executor=executor
+            )
+
+
+# Process-wide lookup, so callers share one set of lookup objects
+_TERM_LOOKUP: Optional[TermLookup] = None
+
+
+def get_term_lookup() -> TermLookup:
+    """Get the global TermLookup, created on first use."""
+    global _TERM_LOOKUP
+    if _TERM_LOOKUP is None:
+        _TERM_LOOKUP = TermLookup()
+    return _TERM_LOOKUP
+
+
+# Annotation lists that carry normalizable terms
+ANNOTATION_TYPES = ["var_pheno_ann", "var_fa_ann", "var_drug_ann"]
+
+# (annotation field, term type, id key in the "<field>_normalized" dict)
+NORMALIZED_FIELDS = [
+    ("Variant/Haplotypes", TermType.VARIANT, "variant_id"),
+    ("Drug(s)", TermType.DRUG, "drug_id"),
+]
+
+# Default thread count for resolving unique terms in batch mode
+DEFAULT_BATCH_WORKERS = 8
+
+SearchResult = Union[VariantSearchResult, DrugSearchResult]
+
+
+def _iter_term_fields(annotations: dict):
+    """Yield (annotation, field, term_type, id_key) for every non-empty term field."""
+    for ann_type in ANNOTATION_TYPES:
+        if ann_type in annotations:
+            for annotation in annotations[ann_type]:
+                for field, term_type, id_key in NORMALIZED_FIELDS:
+                    if field in annotation and annotation[field]:
+                        yield annotation, field, term_type, id_key
+
+
+def _lookup_term(annotation: dict, field: str, term_type: TermType):
+    """
+    The string to look up for an annotation field.
+
+    Gene-less star alleles ("*4/*4") are qualified with the annotation's
+    Gene ("CYP2D6*4/*4") so they resolve against the right gene.
+    """
+    term = annotation[field]
+    if term_type == TermType.VARIANT:
+        gene = annotation.get("Gene")
+        return qualify_star_alleles(term, gene if isinstance(gene, str) else None)
+    return term
+
+
+def collect_terms(annotations: dict) -> Set[Tuple[str, TermType]]:
+    """
+    Collect the distinct (term, term type) pairs that need normalizing.
+
+    Args:
+        annotations (dict): Loaded annotation JSON
+    """
+    return {
+        (_lookup_term(annotation, field, term_type), term_type)
+        for annotation, field, term_type, _ in _iter_term_fields(annotations)
+        if isinstance(annotation[field], str)
+    }
+
+
+def apply_term_mappings(
+    annotations: dict, resolve: Callable[[str, TermType], Optional[SearchResult]]
+) -> dict:
+    """
+    Add "<field>_normalized" entries and a term_mappings section to annotations.
+
+    Args:
+        annotations (dict): Loaded annotation JSON, modified in place
+        resolve: Returns the best search result for a (term, term type), or None
+    """
+    saved_mappings = {}
+
+    for annotation, field, term_type, id_key in _iter_term_fields(annotations):
+        term = annotation[field]
+        result = resolve(_lookup_term(annotation, field, term_type), term_type)
+        if result is not None and result.id:
+            saved_mappings[term] = result.to_dict()
+            annotation[f"{field}_normalized"] = {
+                "normalized": result.normalized_term or term,
+                id_key: result.id,
+                "confidence": result.score or 1.0,
+            }
+        else:
+            annotation[f"{field}_normalized"] = {
+                "normalized": term,
+                id_key: None,
+                "confidence": 0.0,
+            }
+
+    # Add saved mappings to annotations
+    annotations["term_mappings"] = saved_mappings
+    return annotations
+
+
+def resolve_terms(
+    terms: Iterable[Tuple[str, TermType]],
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    term_lookup: Optional[TermLookup] = None,
+) -> Tuple[
+    Dict[Tuple[str, TermType], Optional[SearchResult]],
+    Dict[Tuple[str, TermType], Exception],
+]:
+    """
+    Look up each distinct term once, in parallel.
+
+    Args:
+        terms: (term, term type) pairs; duplicates are looked up once
+        max_workers (int): Number of lookup threads
+        term_lookup (TermLookup): Lookup to use (the global one by default)
+
+    Returns:
+        Tuple of (best result or None per term, exception per failed term)
+    """
+    term_lookup = term_lookup or get_term_lookup()
+    unique_terms = list(dict.fromkeys(terms))
+    resolved: Dict[Tuple[str, TermType], Optional[SearchResult]] = {}
+    failed: Dict[Tuple[str, TermType], Exception] = {}
+
+    def lookup(item: Tuple[str, TermType]) -> Optional[SearchResult]:
+        results = term_lookup.search(item[0], term_type=item[1])
+        return results[0] if results else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(lookup, item): item for item in unique_terms}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                resolved[item] = future.result()
+            except Exception as e:
+                logger.error(
+                    f"Failed to resolve {item[1].value} term {item[0]!r}: {e}"
+                )
+                failed[item] = e
+
+    return resolved, failed
+
+
+async def resolve_terms_async(
+    terms: Iterable[Tuple[str, TermType]],
+    executor: Optional[Executor] = None,
+    term_lookup: Optional[TermLookup] = None,
+    on_result: Optional[
+        Callable[[Tuple[str, TermType], Optional[SearchResult], Optional[Exception]], None]
+    ] = None,
+) -> Tuple[
+    Dict[Tuple[str, TermType], Optional[SearchResult]],
+    Dict[Tuple[str, TermType], Exception],
+]:
+    """
+    resolve_terms() for async callers: one pass that awaits API requests.
+
+    Table scans and cache access run on executor (the event loop's default
+    pool when None), so a term waiting on PharmGKB or RxNorm holds no thread.
+
+    Args:
+        terms: (term, term type) pairs; duplicates are looked up once
+        executor: Pool for the blocking steps of each lookup
+        term_lookup (TermLookup): Lookup to use (the global one by default)
+        on_result: Called with (term pair, best result or None, exception or
+            None) as each term finishes, before the whole pass is done
+
+    Returns:
+        Tuple of (best result or None per term, exception per failed term)
+    """
+    term_lookup = term_lookup or get_term_lookup()
+    resolved: Dict[Tuple[str, TermType], Optional[SearchResult]] = {}
+    failed: Dict[Tuple[str, TermType], Exception] = {}
+
+    async def lookup(item: Tuple[str, TermType]) -> None:
+        try:
+            results = await term_lookup.search_async(
+                item[0], term_type=item[1], executor=executor
+            )
+        except Exception as e:
+            logger.error(f"Failed to resolve {item[1].value} term {item[0]!r}: {e}")
+            failed[item] = e
+            if on_result is not None:
+                on_result(item, None, e)
+            return
+        resolved[item] = results[0] if results else None
+        if on_result is not None:
+            on_result(item, resolved[item], None)
+
+    await asyncio.gather(*(lookup(item) for item in dict.fromkeys(terms)))
+    return resolved, failed
+
+
+def save_annotations(annotations: dict, output_annotation: Path) -> None:
+    """
+    Write an annotations dict as JSON, creating the parent directory.
+
+    Args:
+        annotations (dict): Annotation JSON to write
+        output_annotation (Path): Path to the output file
+    """
+    output_annotation = Path(output_annotation)
+    os.makedirs(output_annotation.parent, exist_ok=True)
+    with open(output_annotation, "w", encoding="utf-8") as f:
+        json.dump(annotations, f, indent=4, ensure_ascii=False)
+
+
+def normalize_annotations(
+    annotations: dict, term_lookup: Optional[TermLookup] = None
+) -> dict:
+    """
+    Normalize the terms of an annotation dict in memory.
+
+    Args:
+        annotations (dict): Loaded annotation JSON (not modified)
+        term_lookup (TermLookup): Lookup to use (the global one by default)
+
+    Returns:
+        A normalized copy with "<field>_normalized" entries and term_mappings.
+        Lookup errors are raised.
+    """
+    term_lookup = term_lookup or get_term_lookup()
+
+    def resolve(term: str, term_type: TermType) -> Optional[SearchResult]:
+        results = term_lookup.search(term, term_type=term_type)
+        return results[0] if results else None
+
+    return apply_term_mappings(copy.deepcopy(annotations), resolve)
+
 
 def normalize_annotation(input_annotation: Path, output_annotation: Path):
     """
@@ -62,83 +332,11 @@ def normalize_annotation(input_annotation: Path, output_annotation: Path):
         logger.error(f"Failed to load annotations file: {e}")
         return
 
-    # Initialize the TermLookup class
-    term_lookup = TermLookup()
-
-    # Iterate through the annotations and normalize the terms
-    annotation_types = ["var_pheno_ann", "var_fa_ann", "var_drug_ann"]
-    saved_mappings = {}
-
-    # Iterate through each annotation type
-    for ann_type in annotation_types:
-        if ann_type in annotations:
-            # Iterate through each annotation in the list
-            for annotation in annotations[ann_type]:
-                # Normalize Variant/Haplotypes if present
-                if (
-                    "Variant/Haplotypes" in annotation
-                    and annotation["Variant/Haplotypes"]
-                ):
-                    variant_term = annotation["Variant/Haplotypes"]
-                    results = term_lookup.search(
-                        variant_term, term_type=TermType.VARIANT
-                    )
-                    if results and len(results) > 0:
-                        result = results[0]
-                        if result.id:
-                            saved_mappings[variant_term] = result.to_dict()
-                            annotation["Variant/Haplotypes_normalized"] = {
-                                "normalized": result.normalized_term or variant_term,
-                                "variant_id": result.id,
-                                "confidence": result.score or 1.0,
-                            }
-                        else:
-                            annotation["Variant/Haplotypes_normalized"] = {
-                                "normalized": variant_term,
-                                "variant_id": None,
-                                "confidence": 0.0,
-                            }
-                    else:
-                        annotation["Variant/Haplotypes_normalized"] = {
-                            "normalized": variant_term,
-                            "variant_id": None,
-                            "confidence": 0.0,
-                        }
-
-                # Normalize Drug(s) if present
-                if "Drug(s)" in annotation and annotation["Drug(s)"]:
-                    drug_term = annotation["Drug(s)"]
-                    results = term_lookup.search(drug_term, term_type=TermType.DRUG)
-                    if results and len(results) > 0:
-                        result = results[0]
-                        if result.id:
-                            saved_mappings[drug_term] = result.to_dict()
-                            annotation["Drug(s)_normalized"] = {
-                                "normalized": result.normalized_term or drug_term,
-                                "drug_id": result.id,
-                                "confidence": result.score or 1.0,
-                            }
-                        else:
-                            annotation["Drug(s)_normalized"] = {
-                                "normalized": drug_term,
-                                "drug_id": None,
-                                "confidence": 0.0,
-                            }
-                    else:
-                        annotation["Drug(s)_normalized"] = {
-                            "normalized": drug_term,
-                            "drug_id": None,
-                            "confidence": 0.0,
-                        }
-
-    # Add saved mappings to annotations
-    annotations["term_mappings"] = saved_mappings
+    annotations = normalize_annotations(annotations)
 
     # Save the normalized annotations to a file
     try:
-        os.makedirs(output_annotation.parent, exist_ok=True)
-        with open(output_annotation, "w", encoding="utf-8") as f:
-            json.dump(annotations, f, indent=4, ensure_ascii=False)
+        save_annotations(annotations, output_annotation)
     except Exception as e:
         logger.error(f"Failed to save annotations file: {e}")
         return
@@ -146,6 +344,98 @@ def normalize_annotation(input_annotation: Path, output_annotation: Path):
     logger.info(f"Successfully normalized annotations file: {output_annotation}")
 
 
+def normalize_annotations_many(
+    annotation_dicts: Sequence[dict], max_workers: int = DEFAULT_BATCH_WORKERS
+) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """
+    Normalize many annotation dicts in memory, resolving each distinct term once.
+
+    The distinct variant and drug strings across all dicts are resolved in
+    one parallel pass (see resolve_terms), then every dict is normalized from
+    the resolved map. A dict that mentions a term whose lookup raised is
+    reported as failed, matching normalize_annotations.
+
+    Args:
+        annotation_dicts: Loaded annotation JSONs (not modified)
+        max_workers (int): Number of lookup threads
+
+    Returns:
+        List of (normalized copy or None, error message or None) in input order
+    """
+    terms: Set[Tuple[str, TermType]] = set()
+    for annotations in annotation_dicts:
+        terms |= collect_terms(annotations)
+    logger.info(
+        f"Resolving {len(terms)} unique terms across "
+        f"{len(annotation_dicts)} annotation files"
+    )
+    resolved, failed = resolve_terms(terms, max_workers=max_workers)
+
+    def resolve(term: str, term_type: TermType) -> Optional[SearchResult]:
+        if (term, term_type) in failed:
+            raise failed[(term, term_type)]
+        return resolved.get((term, term_type))
+
+    outcomes: List[Tuple[Optional[dict], Optional[str]]] = []
+    for annotations in annotation_dicts:
+        try:
+            outcomes.append(
+                (apply_term_mappings(copy.deepcopy(annotations), resolve), None)
+            )
+        except Exception as e:
+            outcomes.append((None, str(e)))
+    return outcomes
+
+
+def normalize_annotations_batch(
+    files: Sequence[Tuple[Path, Path]], max_workers: int = DEFAULT_BATCH_WORKERS
+) -> List[Tuple[Path, bool, Optional[str]]]:
+    """
+    Normalize many annotation files, resolving each distinct term only once.
+
+    All files are loaded first and normalized together with
+    normalize_annotations_many; files that fail are not written.
+
+    Args:
+        files: (input path, output path) pairs
+        max_workers (int): Number of lookup threads
+
+    Returns:
+        List of (input path, success, error message) in input order
+    """
+    loaded: Dict[Path, dict] = {}
+    outcomes: Dict[Path, Tuple[bool, Optional[str]]] = {}
+    for input_annotation, _ in files:
+        try:
+            with open(input_annotation, "r") as f:
+                loaded[input_annotation] = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load annotations file {input_annotation}: {e}")
+            outcomes[input_annotation] = (False, f"Failed to load: {e}")
+
+    pending = [(i, o) for i, o in files if i in loaded]
+    normalized = normalize_annotations_many(
+        [loaded[i] for i, _ in pending], max_workers=max_workers
+    )
+    for (input_annotation, output_annotation), (annotations, error) in zip(
+        pending, normalized
+    ):
+        if annotations is None:
+            logger.error(
+                f"Failed to normalize annotations file {input_annotation}: {error}"
+            )
+            outcomes[input_annotation] = (False, error)
+            continue
+        try:
+            save_annotations(annotations, output_annotation)
+            outcomes[input_annotation] = (True, None)
+        except Exception as e:
+            logger.error(f"Failed to save annotations file {output_annotation}: {e}")
+            outcomes[input_annotation] = (False, str(e))
+
+    return [(path, *outcomes[path]) for path, _ in files]
+
+
 if __name__ == "__main__":
     input_annotation = Path("data/example_annotation.json")
     output_annotation = Path("data/example_annotation_normalized.json")
@@ -1,65 +1,61 @@
-from pydantic import BaseModel
+import functools
 from typing import List, Optional, Any
-import requests
+from concurrent.futures import Executor
 from term_normalization.search_utils import (
+    BaseSearchResult,
+    LookupTable,
     calc_similarity,
     general_search,
     general_search_comma_list,
+    get_exact_index,
+    get_fuzzy_index,
+    get_row_dict,
+    run_blocking,
 )
-import pandas as pd
+from term_normalization.haplotype_index import HAPLOTYPE_TSV, get_haplotype_index
 from loguru import logger
 from pathlib import Path
-from term_normalization.cache import get_term_cache, get_pharmgkb_semaphore
+from term_normalization.cache import get_term_cache
+from term_normalization.single_flight import get_lookup_flight
+from term_normalization.http_client import PHARMGKB_API, get_api_client, lookup_found
+
+# Indexes precompiled into variants.snapshot (see scripts/build_term_snapshot.py)
+SNAPSHOT_FUZZY_INDEXES = [("Variant Name", False), ("Synonyms", True)]
+SNAPSHOT_EXACT_INDEXES = [(("Variant Name",), ("Synonyms",))]
 
 # Global cache for variant TSV data
-_VARIANT_DF_CACHE: Optional[pd.DataFrame] = None
+_VARIANT_DF_CACHE: Optional[LookupTable] = None
 
 
-def _get_cached_variant_df(data_path: Path) -> pd.DataFrame:
-    """Load and cache the variant TSV file to avoid repeated file I/O."""
+def _get_cached_variant_df(data_path: Path) -> LookupTable:
+    """Load and cache the variant table (snapshot if built, else the TSV)."""
     global _VARIANT_DF_CACHE
     if _VARIANT_DF_CACHE is None:
-        _VARIANT_DF_CACHE = pd.read_csv(data_path, sep="\t")
+        # Imported on first use: snapshots and TSVs need numpy/pandas
+        from term_normalization.snapshot import load_lookup_table
+
+        _VARIANT_DF_CACHE = load_lookup_table(data_path)
     return _VARIANT_DF_CACHE
 
 
-class VariantSearchResult(BaseModel):
-    raw_input: str
-    id: str
-    normalized_term: str
-    url: str
-    score: float
+class VariantSearchResult(BaseSearchResult):
+    __slots__ = ()
 
-    def to_dict(self) -> dict:
-        """
-        Return a plain-Python dict representation of the result that is safe for json.dump.
-        Supports both Pydantic v1 (dict) and v2 (model_dump).
-        """
-        try:
-            # Pydantic v2
-            return self.model_dump()
-        except AttributeError:  # pragma: no cover - v1 fallback
-            # Pydantic v1
-            return self.dict()
 
-
-def pgkb_star_allele_search(
-    star_allele: str, threshold: float = 0.8, top_k: int = 1
-) -> Optional[List[VariantSearchResult]]:
-    base_url = "https://api.pharmgkb.org/v1/data/haplotype?symbol="
-    semaphore = get_pharmgkb_semaphore()
-    with semaphore:
-        response = requests.get(base_url + star_allele, timeout=10)
-    if response.status_code == 200:
+def _pgkb_results(
+    response, term: str, kind: str
+) -> List[VariantSearchResult]:
+    """Results of a PharmGKB /haplotype or /variant response for term."""
+    if lookup_found(response):
         data = response.json()
-        score = calc_similarity(star_allele, data["data"][0]["symbol"])
-        if data["data"]:
+        if data.get("data"):
+            score = calc_similarity(term, data["data"][0]["symbol"])
             return [
                 VariantSearchResult(
-                    raw_input=star_allele,
+                    raw_input=term,
                     id=result["id"],
                     normalized_term=result["symbol"],
-                    url=f"https://www.clinpgx.org/haplotype/{result['id']}",
+                    url=f"https://www.clinpgx.org/{kind}/{result['id']}",
                     score=score,
                 )
                 for result in data["data"]
@@ -67,31 +63,47 @@ def pgkb_star_allele_search(
     return []
 
 
+def pgkb_star_allele_search(
+    star_allele: str, threshold: float = 0.8, top_k: int = 1
+) -> Optional[List[VariantSearchResult]]:
+    response = get_api_client(PHARMGKB_API).get_sync(
+        "/haplotype", params={"symbol": star_allele}
+    )
+    return _pgkb_results(response, star_allele, "haplotype")
+
+
+async def pgkb_star_allele_search_async(
+    star_allele: str, threshold: float = 0.8, top_k: int = 1
+) -> Optional[List[VariantSearchResult]]:
+    response = await get_api_client(PHARMGKB_API).get(
+        "/haplotype",
+        params={"symbol": star_allele},
+        on_latency=functools.partial(get_term_cache().record_latency, "pharmgkb_api"),
+    )
+    return _pgkb_results(response, star_allele, "haplotype")
+
+
 def pgkb_rsid_search(
     rsid: str, threshold: float = 0.8, top_k: int = 1
 ) -> Optional[List[VariantSearchResult]]:
-    base_url = "https://api.pharmgkb.org/v1/data/variant?symbol="
-    semaphore = get_pharmgkb_semaphore()
-    with semaphore:
-        response = requests.get(base_url + rsid.strip(), timeout=10)
-    if response.status_code == 200:
-        data = response.json()
-        score = calc_similarity(rsid, data["data"][0]["symbol"])
-        if data["data"]:
-            return [
-                VariantSearchResult(
-                    raw_input=rsid,
-                    id=result["id"],
-                    normalized_term=result["symbol"],
-                    url=f"https://www.clinpgx.org/variant/{result['id']}",
-                    score=score,
-                )
-                for result in data["data"]
-            ]
-    return []
+    response = get_api_client(PHARMGKB_API).get_sync(
+        "/variant", params={"symbol": rsid.strip()}
+    )
+    return _pgkb_results(response, rsid, "variant")
 
 
-class VariantLookup(BaseModel):
+async def pgkb_rsid_search_async(
+    rsid: str, threshold: float = 0.8, top_k: int = 1
+) -> Optional[List[VariantSearchResult]]:
+    response = await get_api_client(PHARMGKB_API).get(
+        "/variant",
+        params={"symbol": rsid.strip()},
+        on_latency=functools.partial(get_term_cache().record_latency, "pharmgkb_api"),
+    )
+    return _pgkb_results(response, rsid, "variant")
+
+
+class VariantLookup:
     """
     Lookup class for variants
     Uses PharmGKB (local and API access) to find variant information
@@ -101,12 +113,27 @@ class VariantLookup(BaseModel):
     variant_lookup.search("rs12345")
     """
 
-    # Base data directory; expects TSV at `<data_dir>/term_lookup_info/variants.tsv`
-    data_dir: Path = Path("data")
+    __slots__ = ("data_dir",)
+
+    def __init__(self, data_dir: Path = Path("data")):
+        # Base data directory; expects TSV at `<data_dir>/term_lookup_info/variants.tsv`
+        self.data_dir = Path(data_dir)
 
     def _data_path(self) -> Path:
         return self.data_dir / "term_lookup_info" / "variants.tsv"
 
+    def _haplotype_path(self) -> Path:
+        return self.data_dir / "term_lookup_info" / HAPLOTYPE_TSV
+
+    def warm_up(self) -> None:
+        """Load the variant table and build its search indexes ahead of the first query."""
+        get_haplotype_index(self._haplotype_path())
+        df = _get_cached_variant_df(self._data_path())
+        for column, comma_list in SNAPSHOT_FUZZY_INDEXES:
+            get_fuzzy_index(df, column, comma_list=comma_list)
+        for columns, comma_columns in SNAPSHOT_EXACT_INDEXES:
+            get_exact_index(df, list(columns), comma_columns=list(comma_columns))
+
     def _clinpgx_variant_search(
         self, variant: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[VariantSearchResult]]:
@@ -138,20 +165,112 @@ class VariantLookup(BaseModel):
             ]
         return []
 
+    def _exact_variant_search(
+        self, variant: str, top_k: int = 1
+    ) -> List[VariantSearchResult]:
+        """
+        Exact, case-insensitive match against Variant Name and Synonyms.
+
+        Only returns results when there are at least top_k exact hits, so the
+        fuzzy search is never skipped when it would contribute extra results.
+        """
+        df = _get_cached_variant_df(self._data_path())
+        index = get_exact_index(df, ["Variant Name"], comma_columns=["Synonyms"])
+        rows = index.lookup(variant)
+        if not rows or len(rows) < top_k:
+            return []
+        results = []
+        for row_id in rows[:top_k]:
+            row = get_row_dict(df, row_id)
+            results.append(
+                VariantSearchResult(
+                    raw_input=variant,
+                    id=row["Variant ID"],
+                    normalized_term=row["Variant Name"],
+                    url=f"https://www.clinpgx.org/variant/{row['Variant ID']}",
+                    score=1.0,
+                )
+            )
+        return results
+
+    def _local_haplotype_search(
+        self, star_allele: str, top_k: int = 1
+    ) -> List[VariantSearchResult]:
+        """
+        Resolve a star allele against the local haplotype table.
+
+        Gene-less alleles ("*4/*4") only resolve when the allele exists in a
+        single gene; pass gene-qualified terms ("CYP2D6*4/*4") otherwise.
+        """
+        index = get_haplotype_index(self._haplotype_path())
+        if index is None:
+            return []
+        return [
+            VariantSearchResult(
+                raw_input=star_allele,
+                id=haplotype_id,
+                normalized_term=name,
+                url=f"https://www.clinpgx.org/haplotype/{haplotype_id}",
+                score=1.0,
+            )
+            for haplotype_id, name in index.resolve(star_allele)[:top_k]
+        ]
+
     def star_lookup(
         self, star_allele: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[VariantSearchResult]]:
         """
         Search flow for star alleles
+        1. Resolves against the local haplotype table (no network)
+        2. Falls back to the PharmGKB API and the variant TSV
         """
-        results = pgkb_star_allele_search(star_allele, threshold=threshold, top_k=top_k)
-        results.extend(
-            self._clinpgx_variant_search(star_allele, threshold=threshold, top_k=top_k)
+        cache = get_term_cache()
+        with cache.timed("local_haplotypes"):
+            results = self._local_haplotype_search(star_allele, top_k=top_k)
+        if results:
+            return results
+        with cache.timed("pharmgkb_api"):
+            results = pgkb_star_allele_search(star_allele, threshold=threshold, top_k=top_k)
+        with cache.timed("local_tsv"):
+            results.extend(
+                self._clinpgx_variant_search(star_allele, threshold=threshold, top_k=top_k)
+            )
+        return _best_results(results, top_k)
+
+    async def star_lookup_async(
+        self,
+        star_allele: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[VariantSearchResult]]:
+        """star_lookup() that awaits the PharmGKB request instead of blocking a thread."""
+        cache = get_term_cache()
+        results = await run_blocking(
+            executor,
+            cache.timed_call,
+            "local_haplotypes",
+            self._local_haplotype_search,
+            star_allele,
+            top_k=top_k,
         )
-        results.sort(key=lambda x: x.score, reverse=True)
         if results:
-            return results[:top_k]
-        return []
+            return results
+        results = await pgkb_star_allele_search_async(
+            star_allele, threshold=threshold, top_k=top_k
+        )
+        results.extend(
+            await run_blocking(
+                executor,
+                cache.timed_call,
+                "local_tsv",
+                self._clinpgx_variant_search,
+                star_allele,
+                threshold=threshold,
+                top_k=top_k,
+            )
+        )
+        return _best_results(results, top_k)
 
     def rsid_lookup(
         self, rsid: str, threshold: float = 0.8, top_k: int = 1
@@ -159,23 +278,91 @@ class VariantLookup(BaseModel):
         """
         Search flow for rsids
         """
-        results = pgkb_rsid_search(rsid, threshold=threshold, top_k=top_k)
+        cache = get_term_cache()
+        with cache.timed("pharmgkb_api"):
+            results = pgkb_rsid_search(rsid, threshold=threshold, top_k=top_k)
+        with cache.timed("local_tsv"):
+            results.extend(
+                self._clinpgx_variant_search(rsid, threshold=threshold, top_k=top_k)
+            )
+        return _best_results(results, top_k)
+
+    async def rsid_lookup_async(
+        self,
+        rsid: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[VariantSearchResult]]:
+        """rsid_lookup() that awaits the PharmGKB request instead of blocking a thread."""
+        results = await pgkb_rsid_search_async(rsid, threshold=threshold, top_k=top_k)
         results.extend(
-            self._clinpgx_variant_search(rsid, threshold=threshold, top_k=top_k)
+            await run_blocking(
+                executor,
+                get_term_cache().timed_call,
+                "local_tsv",
+                self._clinpgx_variant_search,
+                rsid,
+                threshold=threshold,
+                top_k=top_k,
+            )
         )
-        results.sort(key=lambda x: x.score, reverse=True)
-        if results:
-            return results[:top_k]
-        return []
+        return _best_results(results, top_k)
+
+    def _flight_key(self, variant: str, threshold: float, top_k: int) -> tuple:
+        return ("variant", variant.lower().strip(), threshold, top_k)
 
     def search(
         self, variant: str, threshold: float = 0.8, top_k: int = 1
     ) -> Optional[List[VariantSearchResult]]:
-        # Check cache first
+        """
+        Search for a variant; concurrent searches for the same term share one lookup.
+        """
+        return get_lookup_flight().do(
+            self._flight_key(variant, threshold, top_k),
+            lambda: self._search(variant, threshold=threshold, top_k=top_k),
+        )
+
+    async def search_async(
+        self,
+        variant: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[VariantSearchResult]]:
+        """
+        Awaitable search(). The PharmGKB request is awaited, so no thread is
+        held while it is in flight; table scans and cache access run on
+        executor (default: the event loop's pool).
+        """
+        return await get_lookup_flight().do_coroutine(
+            self._flight_key(variant, threshold, top_k),
+            lambda: self._search_async(
+                variant, threshold=threshold, top_k=top_k, executor=executor
+            ),
+        )
+
+    def _search_local(
+        self, variant: str, top_k: int = 1
+    ) -> Optional[List[VariantSearchResult]]:
+        """Exact table hits, else the cached result; None if the term needs a lookup."""
         cache = get_term_cache()
-        cached = cache.get_variant(variant)
-        if cached is not None:
-            return cached
+
+        # Exact name/synonym hits skip both the fuzzy scan and the API call
+        with cache.timed("local_tsv"):
+            results = self._exact_variant_search(variant, top_k=top_k)
+        if results:
+            return results
+
+        # Check cache
+        return cache.get_variant(variant)
+
+    def _search(
+        self, variant: str, threshold: float = 0.8, top_k: int = 1
+    ) -> Optional[List[VariantSearchResult]]:
+        results = self._search_local(variant, top_k=top_k)
+        if results is not None:
+            return results
 
         # Perform lookup
         # Check if it starts with "rs"
@@ -184,8 +371,42 @@ class VariantLookup(BaseModel):
         else:
             results = self.star_lookup(variant, threshold=threshold, top_k=top_k)
 
-        # Cache result
-        if results:
-            cache.set_variant(variant, results)
+        # Cache result (empty results are cached as a negative entry; API
+        # failures have raised by now and are not cached)
+        get_term_cache().set_variant(variant, results or [])
 
         return results
+
+    async def _search_async(
+        self,
+        variant: str,
+        threshold: float = 0.8,
+        top_k: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> Optional[List[VariantSearchResult]]:
+        results = await run_blocking(executor, self._search_local, variant, top_k=top_k)
+        if results is not None:
+            return results
+
+        if variant.strip().startswith("rs"):
+            results = await self.rsid_lookup_async(
+                variant, threshold=threshold, top_k=top_k, executor=executor
+            )
+        else:
+            results = await self.star_lookup_async(
+                variant, threshold=threshold, top_k=top_k, executor=executor
+            )
+
+        await run_blocking(executor, get_term_cache().set_variant, variant, results or [])
+
+        return results
+
+
+def _best_results(
+    results: List[VariantSearchResult], top_k: int
+) -> List[VariantSearchResult]:
+    """Highest-scoring top_k of the API and TSV results."""
+    results.sort(key=lambda x: x.score, reverse=True)
+    if results:
+        return results[:top_k]
+    return []
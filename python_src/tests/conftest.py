@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Tests import modules the way the API does: from python_src, with the repo
+# root (benchmarks/) importable
+PYTHON_SRC = Path(__file__).parent.parent
+sys.path.insert(0, str(PYTHON_SRC.parent))
+sys.path.insert(0, str(PYTHON_SRC))
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from term_normalization.batcher import TermBatcher
+from term_normalization.term_lookup import TermType
+
+
+class FakeLookup:
+    """search_async stand-in: 'fail*' terms raise, 'slow*' terms never finish."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def search_async(self, term, term_type, executor=None, **kwargs):
+        self.calls.append(term)
+        if term.startswith("slow"):
+            await asyncio.Event().wait()
+        await asyncio.sleep(0.01)
+        if term.startswith("fail"):
+            raise RuntimeError(f"lookup of {term} failed")
+        return [SimpleNamespace(normalized_term=term.upper())]
+
+
+def test_concurrent_submissions_share_one_pass():
+    lookup = FakeLookup()
+    batcher = TermBatcher(term_lookup=lookup, max_wait_ms=20)
+
+    async def run():
+        futures = [batcher.submit(f"rs{i}", TermType.VARIANT) for i in range(5)]
+        # Already queued: the same future, looked up once
+        futures.append(batcher.submit("rs0", TermType.VARIANT))
+        futures.append(batcher.submit("fail", TermType.DRUG))
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    *results, error = asyncio.run(run())
+
+    assert [r.normalized_term for r in results] == ["RS0", "RS1", "RS2", "RS3", "RS4", "RS0"]
+    assert isinstance(error, RuntimeError)
+    assert sorted(lookup.calls) == ["fail", "rs0", "rs1", "rs2", "rs3", "rs4"]
+    assert batcher.stats() == {
+        "batches": 1,
+        "terms_resolved": 6,
+        "coalesced": 1,
+        "pending": 0,
+    }
+
+
+def test_cancelled_pass_cancels_unfinished_terms():
+    batcher = TermBatcher(term_lookup=FakeLookup(), max_wait_ms=1)
+
+    async def run():
+        fast = batcher.submit("rs1", TermType.VARIANT)
+        slow = batcher.submit("slow", TermType.VARIANT)
+        assert (await fast).normalized_term == "RS1"
+        for work in list(batcher._passes):
+            work.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        return slow
+
+    assert asyncio.run(run()).cancelled()
+    assert batcher.stats()["pending"] == 0
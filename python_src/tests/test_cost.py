@@ -0,0 +1,74 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cost import CostTracker, calculate_cost, extract_usage_from_response
+
+
+@pytest.fixture(autouse=True)
+def local_pricing(monkeypatch):
+    # Price from MODEL_PRICING, not whatever LiteLLM version is installed
+    monkeypatch.setitem(sys.modules, "litellm", None)
+
+
+def test_cached_prompt_tokens_are_repriced():
+    # OpenAI: cache reads at the model's cached_input price
+    assert calculate_cost("openai/gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert calculate_cost(
+        "openai/gpt-4o", 1_000_000, 0, cached_tokens=400_000
+    ) == pytest.approx(0.6 * 2.50 + 0.4 * 1.25)
+
+    # Anthropic: reads at 0.1x and writes at 1.25x the input price
+    assert calculate_cost(
+        "anthropic/claude-sonnet-4-5-20250929",
+        1_000_000,
+        100_000,
+        cached_tokens=500_000,
+        cache_write_tokens=200_000,
+    ) == pytest.approx(0.3 * 3.00 + 0.5 * 0.30 + 0.2 * 3.75 + 0.1 * 15.00)
+
+    # Gemini: provider multiplier when the model has no cached_input price
+    assert calculate_cost(
+        "gemini/gemini-2.0-flash", 1_000_000, 0, cached_tokens=1_000_000
+    ) == pytest.approx(0.25 * 0.075)
+
+    assert calculate_cost("unknown/model", 1_000_000, 0, cached_tokens=10) == 0.0
+
+
+def test_usage_reads_cache_tokens_in_both_provider_shapes():
+    openai_style = SimpleNamespace(
+        usage=SimpleNamespace(
+            prompt_tokens=1000,
+            completion_tokens=100,
+            total_tokens=1100,
+            prompt_tokens_details={"cached_tokens": 800},
+        )
+    )
+    anthropic_style = SimpleNamespace(
+        usage=SimpleNamespace(
+            prompt_tokens=1000,
+            completion_tokens=100,
+            total_tokens=1100,
+            prompt_tokens_details=None,
+            cache_read_input_tokens=600,
+            cache_creation_input_tokens=300,
+        )
+    )
+
+    usage = extract_usage_from_response(openai_style, "openai/gpt-4o-mini")
+    assert (usage.cached_tokens, usage.cache_write_tokens) == (800, 0)
+    assert usage.cost_usd == pytest.approx(
+        calculate_cost("openai/gpt-4o-mini", 1000, 100, cached_tokens=800)
+    )
+    assert usage.cost_usd < calculate_cost("openai/gpt-4o-mini", 1000, 100)
+
+    model = "anthropic/claude-haiku-4-5-20251001"
+    usage = extract_usage_from_response(anthropic_style, model)
+    assert (usage.cached_tokens, usage.cache_write_tokens) == (600, 300)
+    assert usage.cost_usd == pytest.approx(calculate_cost(model, 1000, 100, 600, 300))
+
+    tracker = CostTracker()
+    tracker.add_usage("extract", usage)
+    tracker.add_usage("extract", usage)
+    assert tracker.get_summary()["cached_tokens"] == 1200
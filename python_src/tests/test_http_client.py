@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from term_normalization import http_client
+from term_normalization.http_client import (
+    PHARMGKB_API,
+    close_api_clients,
+    configure_api,
+    get_api_client,
+    lookup_found,
+)
+from term_normalization.variant_search import pgkb_rsid_search, pgkb_rsid_search_async
+
+
+class StubPharmGKB(BaseHTTPRequestHandler):
+    """Answers /variant?symbol=... after a delay; symbols pick error statuses."""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.2
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    ports = set()
+    attempts = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        symbol = parse_qs(urlparse(self.path).query)["symbol"][0]
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.ports.add(self.client_address[1])
+            cls.attempts[symbol] = cls.attempts.get(symbol, 0) + 1
+            attempt = cls.attempts[symbol]
+        time.sleep(cls.delay)
+        if symbol == "bad":
+            status, body = 400, {"error": "bad symbol"}
+        elif symbol == "down" or (symbol == "flaky" and attempt == 1):
+            status, body = 503, {"error": "unavailable"}
+        else:
+            status, body = 200, {"data": [{"id": f"PA{symbol}", "symbol": symbol}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with cls.lock:
+            cls.in_flight -= 1
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPharmGKB)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubPharmGKB.max_in_flight = 0
+    StubPharmGKB.ports = set()
+    StubPharmGKB.attempts = {}
+    configure_api(
+        PHARMGKB_API,
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        rate_per_second=1000.0,
+        max_connections=4,
+        max_retries=2,
+        backoff_base=0.01,
+    )
+    yield StubPharmGKB
+    http_client._CONFIGS.pop(PHARMGKB_API, None)
+    close_api_clients()
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_lookups_share_pooled_connections(stub_api):
+    async def lookup_all():
+        return await asyncio.gather(
+            *(pgkb_rsid_search_async(f"rs{i}") for i in range(16))
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(lookup_all())
+    elapsed = time.perf_counter() - start
+
+    assert [r[0].normalized_term for r in results] == [f"rs{i}" for i in range(16)]
+    # Four connections at a time: four rounds of 0.2s, not sixteen
+    assert 1 < stub_api.max_in_flight <= 4
+    assert elapsed < 16 * stub_api.delay / 2
+    # Keep-alive: requests reuse the pool's connections
+    assert len(stub_api.ports) <= 4
+
+
+def test_sync_lookup_retries_server_errors(stub_api):
+    results = pgkb_rsid_search("flaky")
+
+    assert results[0].normalized_term == "flaky"
+    assert stub_api.attempts["flaky"] == 2
+
+
+def test_client_error_is_no_match_and_outage_raises(stub_api):
+    assert pgkb_rsid_search("bad") == []
+    assert stub_api.attempts["bad"] == 1
+
+    with pytest.raises(httpx.HTTPStatusError):
+        pgkb_rsid_search("down")
+    assert stub_api.attempts["down"] == 3
+
+
+def test_latency_covers_the_request_not_the_callers_wait(stub_api):
+    latencies = []
+
+    async def lookup():
+        task = asyncio.ensure_future(
+            get_api_client(PHARMGKB_API).get(
+                "/variant", params={"symbol": "flaky"}, on_latency=latencies.append
+            )
+        )
+        await asyncio.sleep(0)
+        # A busy caller loop resumes late; that delay is not request latency
+        time.sleep(3 * stub_api.delay)
+        return await task
+
+    assert asyncio.run(lookup()).status_code == 200
+    assert len(latencies) == 1
+    # Both attempts, but neither the backoff nor the caller's stall
+    assert 2 * stub_api.delay <= latencies[0] < 3 * stub_api.delay
+
+
+def test_lookup_found_statuses():
+    request = httpx.Request("GET", "https://api.example/variant")
+
+    assert lookup_found(httpx.Response(200, request=request))
+    assert not lookup_found(httpx.Response(404, request=request))
+    assert not lookup_found(httpx.Response(422, request=request))
+    for status in (429, 500, 503):
+        with pytest.raises(httpx.HTTPStatusError):
+            lookup_found(httpx.Response(status, request=request))
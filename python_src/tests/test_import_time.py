@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from scripts.check_import_time import DEFAULT_BUDGET_MS, DEFERRED_MODULES
+
+PYTHON_SRC = Path(__file__).parent.parent
+
+# The API and every script that should start without the heavy dependencies
+# (build_term_snapshot builds pandas/numpy snapshots, so needs them up front)
+MODULES = [
+    "main",
+    "scripts.batch_process",
+    "scripts.benchmark_pipeline_mock",
+    "scripts.benchmark_term_lookup",
+    "scripts.build_haplotype_table",
+    "scripts.combine_outputs",
+    "scripts.normalize_ground_truth",
+    "scripts.normalize_terms",
+    "scripts.run_benchmark",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"elapsed_ms": elapsed_ms, "modules": sorted(sys.modules)}}))
+"""
+
+
+def import_in_fresh_interpreter(module: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PYTHON_SRC), str(PYTHON_SRC.parent), env.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=PYTHON_SRC,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_defers_heavy_dependencies(module):
+    budget_ms = float(os.getenv("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS))
+
+    probe = import_in_fresh_interpreter(module)
+
+    loaded = set(probe["modules"])
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []
+    assert probe["elapsed_ms"] < budget_ms
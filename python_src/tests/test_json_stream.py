@@ -0,0 +1,51 @@
+import json
+import random
+
+from utils.json_stream import ArrayElementStream
+
+KEYS = ["var_pheno_ann", "var_drug_ann"]
+
+
+def expected_elements(document: dict):
+    return [
+        (key, index, element)
+        for key in KEYS
+        for index, element in enumerate(document.get(key, []))
+        if element is not None
+    ]
+
+
+def feed_in_chunks(text: str, cuts):
+    parser = ArrayElementStream(KEYS)
+    elements = []
+    start = 0
+    for cut in list(cuts) + [len(text)]:
+        elements += parser.feed(text[start:cut])
+        start = cut
+    return elements
+
+
+def test_escaped_backslash_at_chunk_boundary():
+    text = '{"var_pheno_ann": [{"a": "x\\\\"}, {"b": 2}]}'
+    document = json.loads(text)
+
+    for cut in range(1, len(text)):
+        assert feed_in_chunks(text, [cut]) == expected_elements(document), cut
+
+
+def test_random_chunking_with_escapes():
+    rng = random.Random(0)
+    alphabet = ['a', '"', "\\", "\n", "{", "]", ",", "é"]
+    for _ in range(200):
+        document = {
+            "summary": "".join(rng.choice(alphabet) for _ in range(5)),
+            "var_pheno_ann": [
+                {"Notes": "".join(rng.choice(alphabet) for _ in range(8)), "n": i}
+                for i in range(rng.randint(0, 4))
+            ],
+            "var_drug_ann": ["".join(rng.choice(alphabet) for _ in range(3)), 7, None],
+        }
+        text = "```json\n" + json.dumps(document, ensure_ascii=False) + "\n```"
+        cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 20)))
+
+        assert feed_in_chunks(text, cuts) == expected_elements(document)
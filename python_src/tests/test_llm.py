@@ -0,0 +1,36 @@
+import json
+
+from llm import extract_json_from_response
+
+
+def test_truncated_response_drops_partial_element():
+    text = (
+        '```json\n{"var_pheno_ann": [{"Variant": "rs1", "Gene": "A"}, '
+        '{"Variant": "rs2", "Gene": "B", "Notes": "cut off mi'
+    )
+
+    extracted = json.loads(extract_json_from_response(text))
+
+    assert extracted == {"var_pheno_ann": [{"Variant": "rs1", "Gene": "A"}]}
+
+
+def test_truncated_response_keeps_elements_with_nested_values():
+    text = (
+        '{"summary": "ok", "var_drug_ann": [{"Drug(s)": ["a", "b"]}, '
+        '{"Drug(s)": ["c"]}, {"Drug(s)": ["d", '
+    )
+
+    extracted = json.loads(extract_json_from_response(text))
+
+    assert extracted == {
+        "summary": "ok",
+        "var_drug_ann": [{"Drug(s)": ["a", "b"]}, {"Drug(s)": ["c"]}],
+    }
+
+
+def test_complete_response_in_prose_is_extracted():
+    text = 'Here you go:\n{"var_fa_ann": [{"Variant": "rs3"}]}\nLet me know.'
+
+    assert json.loads(extract_json_from_response(text)) == {
+        "var_fa_ann": [{"Variant": "rs3"}]
+    }
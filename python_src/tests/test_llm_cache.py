@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from llm import generate_response
+from utils import llm_cache, mock_llm
+from utils.llm_cache import LLMResponseCache, make_cache_key
+
+SCHEMA = {"type": "object", "properties": {"a": {"type": "string"}}, "required": ["a"]}
+BASE = dict(
+    model="openai/gpt-4o",
+    prompt="Extract",
+    text="Article",
+    response_format=SCHEMA,
+    temperature=0.0,
+    max_tokens=100,
+)
+
+
+def test_cache_key_covers_every_input():
+    key = make_cache_key(**BASE)
+
+    assert make_cache_key(**BASE) == key
+    # Same schema with keys in another order, same temperature as an int
+    reordered = {"required": ["a"], "properties": {"a": {"type": "string"}}, "type": "object"}
+    assert make_cache_key(**{**BASE, "response_format": reordered, "temperature": 0}) == key
+
+    changes = {
+        "model": "openai/gpt-4o-mini",
+        "prompt": "Extract!",
+        "text": "Article.",
+        "response_format": None,
+        "temperature": 0.2,
+        "max_tokens": 101,
+    }
+    keys = {make_cache_key(**{**BASE, field: value}) for field, value in changes.items()}
+    assert len(keys) == len(changes) and key not in keys
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("MOCK_LLM_LATENCY", "fixed:0")
+    monkeypatch.setattr(mock_llm, "_MOCK_LLM", None)
+    cache = LLMResponseCache(tmp_path / "llm_cache.sqlite3")
+    monkeypatch.setattr(llm_cache, "_LLM_CACHE", cache)
+    return cache
+
+
+def test_identical_requests_are_served_from_the_cache(response_cache):
+    async def ask(model, temperature=0.0):
+        return await generate_response(
+            "Extract",
+            "Article",
+            model,
+            response_format=SCHEMA,
+            temperature=temperature,
+            return_usage=True,
+            use_cache=True,
+        )
+
+    text, usage = asyncio.run(ask("mock/gpt-4o-mini"))
+    cached_text, cached_usage = asyncio.run(ask("mock/gpt-4o-mini"))
+
+    assert cached_text == text
+    assert cached_usage.cache_hits == 1 and cached_usage.cost_usd == 0
+    assert cached_usage.saved_cost_usd == usage.cost_usd
+    # A different temperature or model is a different completion
+    asyncio.run(ask("mock/gpt-4o-mini", temperature=0.5))
+    asyncio.run(ask("mock/gpt-4o"))
+    assert mock_llm.get_mock_llm().stats()["calls"] == 3
+    assert response_cache.stats()["entries"] == 3
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from utils.llm_rate_limit import LLMRateLimiter, RateBudget, RateBudgetError
+
+MODEL = "anthropic/claude-sonnet-4-20250514"
+
+
+def test_request_larger_than_default_budget_asks_for_configuration(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_LLM_TPM", raising=False)
+    limiter = LLMRateLimiter()
+
+    # A full-article prompt plus max_tokens
+    with pytest.raises(RateBudgetError, match="ANTHROPIC_LLM_TPM"):
+        limiter.check_fits(MODEL, 50_000 + 16_384)
+    limiter.check_fits(MODEL, 2_000)
+
+    monkeypatch.setenv("ANTHROPIC_LLM_TPM", "400000")
+    limiter.check_fits(MODEL, 50_000 + 16_384)
+
+
+def test_configured_budget_admits_any_request(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_LLM_TPM", raising=False)
+    limiter = LLMRateLimiter(
+        model_budgets={MODEL: RateBudget(requests_per_minute=50, tokens_per_minute=10_000)}
+    )
+
+    limiter.check_fits(MODEL, 100_000)
+    assert not LLMRateLimiter(enabled=False).check_fits(MODEL, 100_000)
+
+
+def test_settle_refunds_unused_max_tokens():
+    limiter = LLMRateLimiter(
+        model_budgets={MODEL: RateBudget(requests_per_minute=600, tokens_per_minute=60_000)}
+    )
+
+    async def reserve(tokens):
+        return await limiter.acquire(MODEL, tokens)
+
+    # 10s of burst: 10k tokens; reserving prompt + max_tokens goes into debt
+    reservation = asyncio.run(reserve(8_000 + 16_000))
+    tokens = limiter._limiters[MODEL].tokens
+    assert tokens._balance < -10_000
+
+    # Only 9k used: the debt is paid back and the next call need not wait
+    limiter.settle(reservation, 9_000)
+    assert tokens._balance > 0
+    assert asyncio.run(reserve(1_000)).wait_seconds == 0
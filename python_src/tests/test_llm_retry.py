@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from utils.llm_retry import CircuitBreaker, CircuitOpenError, LLMRetryHandler, RetryPolicy
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class ServiceUnavailableError(Exception):
+    status_code = 503
+
+
+def make_handler(**overrides) -> LLMRetryHandler:
+    policy = dict(
+        max_retries=2,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        breaker_threshold=1,
+        breaker_cooldown=0.0,
+    )
+    policy.update(overrides)
+    return LLMRetryHandler(RetryPolicy(**policy))
+
+
+def failing(*errors):
+    """An attempt raising each error in turn, then returning "ok"."""
+    remaining = list(errors)
+
+    async def attempt():
+        if remaining:
+            raise remaining.pop(0)
+        return "ok"
+
+    return attempt
+
+
+def open_breaker(handler: LLMRetryHandler, provider: str = "openai") -> None:
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(handler.call(provider, failing(ServiceUnavailableError())))
+    assert handler.stats()[provider]["breaker"] == CircuitBreaker.OPEN
+
+
+def test_rate_limited_probe_retries_and_closes_breaker():
+    handler = make_handler()
+    open_breaker(handler)
+
+    result, stats = asyncio.run(handler.call("openai", failing(RateLimitError())))
+
+    assert result == "ok"
+    assert stats.retries == 1
+    assert handler.stats()["openai"]["breaker"] == CircuitBreaker.CLOSED
+
+
+def test_rate_limited_probe_that_gives_up_releases_probe():
+    handler = make_handler(max_retries=1)
+    open_breaker(handler)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(
+            handler.call("openai", failing(RateLimitError(), RateLimitError()))
+        )
+
+    # The next call may probe again instead of failing fast forever
+    result, _ = asyncio.run(handler.call("openai", failing()))
+    assert result == "ok"
+    assert handler.stats()["openai"]["rejected"] == 0
+
+
+def test_failed_probe_reopens_breaker():
+    handler = make_handler(breaker_cooldown=60.0)
+    open_breaker(handler)
+    handler._providers["openai"].breaker.opened_at -= 60.0
+
+    with pytest.raises(ServiceUnavailableError):
+        asyncio.run(handler.call("openai", failing(ServiceUnavailableError())))
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(handler.call("openai", failing()))
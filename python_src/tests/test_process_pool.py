@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from term_normalization import process_pool
+
+
+def _skip_warm_up(api_rate_share):
+    pass
+
+
+@pytest.fixture
+def cold_pool(monkeypatch):
+    # Workers need not load the lookup tables for these tests
+    monkeypatch.setattr(process_pool, "_init_worker", _skip_warm_up)
+    yield
+    process_pool.shutdown_normalization_pool()
+
+
+def test_resizing_the_pool_does_not_wait_for_the_old_one(cold_pool):
+    old_pool = process_pool.get_normalization_pool(1)
+    work = old_pool.submit(time.sleep, 1.0)
+    # Let the old pool start running the work
+    time.sleep(0.3)
+
+    start = time.perf_counter()
+    new_pool = process_pool.get_normalization_pool(2)
+    elapsed = time.perf_counter() - start
+
+    assert new_pool is not old_pool
+    assert process_pool.get_normalization_pool(2) is new_pool
+    assert elapsed < 0.5
+    # Work already on the old pool still completes
+    assert work.result(timeout=10) is None
@@ -0,0 +1,189 @@
+import random
+
+import pandas as pd
+import pytest
+
+from term_normalization.search_utils import (
+    ExactIndex,
+    FuzzyIndex,
+    TrigramIndex,
+    calc_similarity,
+    general_search,
+    general_search_comma_list,
+    get_exact_index,
+    strip_special_characters,
+)
+
+WORDS = ["warfarin", "aspirin", "clopidogrel", "tamoxifen", "codeine", "abacavir"]
+
+
+def _mutate(rng, word):
+    """A word with a few characters replaced, dropped or doubled."""
+    chars = list(word)
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(chars))
+        op = rng.choice(("replace", "drop", "double"))
+        if op == "replace":
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        elif op == "drop" and len(chars) > 2:
+            del chars[i]
+        else:
+            chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+@pytest.fixture
+def terms_df():
+    rng = random.Random(7)
+    names = [_mutate(rng, rng.choice(WORDS)) for _ in range(300)]
+    # Exact duplicates (score ties), casing and padding, missing values
+    names[10] = names[20] = "Warfarin"
+    names[30] = "  ASPIRIN "
+    names[40] = None
+    synonyms = [
+        ", ".join(_mutate(rng, rng.choice(WORDS)) for _ in range(rng.randint(1, 4)))
+        for _ in range(300)
+    ]
+    synonyms[50] = None
+    synonyms[60] = "Coumadin, warfarin-sodium, (warfarin)"
+    return pd.DataFrame(
+        {"ID": [f"PA{i}" for i in range(300)], "Name": names, "Synonyms": synonyms}
+    )
+
+
+def _scan_search(df, query, column_name, threshold):
+    """The row-by-row general_search that FuzzyIndex replaced."""
+    query_lower = query.lower().strip()
+    matches = []
+    for _, row in df.iterrows():
+        if pd.isna(row[column_name]):
+            continue
+        similarity = calc_similarity(query_lower, str(row[column_name]).lower().strip())
+        if similarity >= threshold:
+            matches.append({**row.to_dict(), "score": similarity})
+    matches.sort(key=lambda x: x["score"], reverse=True)
+    return matches
+
+
+def _scan_search_comma_list(df, query, column_name, threshold, top_k):
+    """The row-by-row general_search_comma_list that FuzzyIndex replaced."""
+    query_cleaned = strip_special_characters(query.lower())
+    matches = []
+    for _, row in df.iterrows():
+        if pd.isna(row[column_name]):
+            continue
+        best_similarity, best_match_text = 0.0, ""
+        for item in str(row[column_name]).split(","):
+            item_cleaned = strip_special_characters(item.lower())
+            if item_cleaned:
+                similarity = calc_similarity(query_cleaned, item_cleaned)
+                if similarity > best_similarity:
+                    best_similarity, best_match_text = similarity, item.strip()
+        if best_similarity >= threshold:
+            matches.append(
+                {**row.to_dict(), "score": best_similarity, "matched_text": best_match_text}
+            )
+    matches.sort(key=lambda x: x["score"], reverse=True)
+    return matches[:top_k]
+
+
+QUERIES = ["warfarin", "Aspirin ", "clopidogrl", "tamoxiphen", "codein", "x", "abacavir sulfate"]
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.4, 0.7, 0.8, 0.95])
+@pytest.mark.parametrize("top_k", [1, 5, 1000])
+def test_general_search_matches_row_scan(terms_df, threshold, top_k):
+    for query in QUERIES:
+        expected = _scan_search(terms_df, query, "Name", threshold)[:top_k]
+        assert general_search(terms_df, query, "Name", "ID", threshold, top_k) == expected
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.4, 0.7, 0.8, 0.95])
+@pytest.mark.parametrize("top_k", [1, 5, 1000])
+def test_general_search_comma_list_matches_row_scan(terms_df, threshold, top_k):
+    for query in QUERIES + ["Warfarin sodium"]:
+        expected = _scan_search_comma_list(terms_df, query, "Synonyms", threshold, top_k)
+        assert (
+            general_search_comma_list(
+                terms_df, query, "Synonyms", "ID", threshold, top_k
+            )
+            == expected
+        )
+
+
+def test_keep_columns_and_empty_queries(terms_df):
+    results = general_search(
+        terms_df, "warfarin", "Name", "ID", top_k=1000, keep_columns=["ID"]
+    )
+
+    assert results == [
+        {"ID": match["ID"], "score": match["score"]}
+        for match in _scan_search(terms_df, "warfarin", "Name", 0.8)
+    ]
+    assert {"ID": "PA10", "score": 1.0} in results
+    assert general_search(terms_df, "  ", "Name", "ID") == []
+    assert general_search(terms_df.iloc[0:0], "warfarin", "Name", "ID") == []
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.7, 0.8, 0.9])
+def test_trigram_candidates_keep_every_match(threshold):
+    rng = random.Random(11)
+    texts = [_mutate(rng, rng.choice(WORDS)) for _ in range(500)] + ["a", "ab", ""]
+    index = FuzzyIndex(texts, list(range(len(texts))))
+
+    for query in [_mutate(rng, rng.choice(WORDS)) for _ in range(50)] + ["a", "abc"]:
+        start, end = index._length_window(len(query), threshold)
+        candidates = index.trigram_index.candidates(
+            query, threshold, start, end, index.lengths
+        )
+        matches = {
+            idx
+            for idx, text in enumerate(index.texts)
+            if calc_similarity(query, text) >= threshold
+        }
+        # The length window and the trigram bound never drop a match...
+        assert matches <= set(range(start, end))
+        if candidates is not None:
+            assert matches <= set(candidates)
+        # ...and FuzzyIndex returns exactly the matches
+        assert {idx for idx, _, _ in index.search(query, threshold)} == matches
+
+
+def test_trigram_required_overlap_falls_back_when_bound_is_weak():
+    # Entries sorted by length, as FuzzyIndex keeps them
+    index = TrigramIndex(["aspirin", "warfarin"])
+
+    # At a low threshold an entry could match without sharing a trigram
+    assert TrigramIndex.required_overlap(8, 8, 0.3) <= 0
+    assert index.candidates("warfarin", 0.3, 0, 2, [7, 8]) is None
+    assert index.candidates("warfarin", 0.9, 0, 2, [7, 8]) == [1]
+
+
+def test_exact_index_ignores_case_and_padding():
+    index = ExactIndex()
+    index.add(" Warfarin", 3)
+    index.add("WARFARIN", 3)
+    index.add("warfarin", 1)
+    index.add("   ", 2)
+
+    assert index.lookup("warfarin ") == [3, 1]
+    assert index.lookup("WarFarin") == [3, 1]
+    assert index.lookup("warfari") == []
+    assert len(index) == 1
+
+
+def test_exact_index_ranks_name_columns_before_synonyms():
+    df = pd.DataFrame(
+        {
+            "Name": ["Coumadin", "Warfarin", None],
+            "Synonyms": ["warfarin, Warfarin sodium", None, "aspirin,  ASA "],
+        }
+    )
+    index = get_exact_index(df, ["Name"], comma_columns=["Synonyms"])
+
+    # A hit on the name column comes first, then rows found via synonyms
+    assert index.lookup("warfarin") == [1, 0]
+    assert index.lookup("warfarin sodium") == [0]
+    assert index.lookup("asa") == [2]
+    assert index.lookup("coumadin") == [0]
+    assert get_exact_index(df, ["Name"], comma_columns=["Synonyms"]) is index
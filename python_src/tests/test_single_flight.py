@@ -0,0 +1,40 @@
+import asyncio
+
+from term_normalization.single_flight import SingleFlight
+
+
+def test_do_coroutine_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do_coroutine("term", lookup) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == [["result"]] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_do_coroutine_shares_exceptions():
+    flight = SingleFlight()
+
+    async def lookup():
+        await asyncio.sleep(0.01)
+        raise LookupError("API unavailable")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do_coroutine("term", lookup) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, LookupError) for r in results)
+    assert flight.stats()["in_flight"] == 0
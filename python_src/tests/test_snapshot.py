@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from term_normalization.search_utils import (
+    general_search,
+    general_search_comma_list,
+    get_exact_index,
+)
+from term_normalization.snapshot import (
+    SnapshotTable,
+    build_snapshot,
+    load_lookup_table,
+    snapshot_path_for,
+)
+
+FUZZY_SPECS = [("Variant Name", False), ("Synonyms", True)]
+EXACT_SPECS = [(("Variant Name",), ("Synonyms",))]
+
+ROWS = [
+    ("PA1", "rs1045642", "C3435T, ABCB1 3435C>T"),
+    ("PA2", "rs4244285", "CYP2C19*2, 681G>A"),
+    ("PA3", "rs1057910", None),
+    ("PA4", "rs9923231", "VKORC1 -1639G>A, c.-1639G>A, 1639G>A"),
+    ("PA5", "rs4149056", "SLCO1B1 521T>C, Val174Ala, é-variant"),
+]
+
+
+def _plain(results):
+    """Row dicts with pandas' NaN as None, the snapshot's missing value."""
+    return [{k: None if pd.isna(v) else v for k, v in row.items()} for row in results]
+
+
+@pytest.fixture
+def tsv_path(tmp_path):
+    path = tmp_path / "variants.tsv"
+    pd.DataFrame(ROWS, columns=["Variant ID", "Variant Name", "Synonyms"]).to_csv(
+        path, sep="\t", index=False
+    )
+    return path
+
+
+def test_snapshot_round_trip_matches_dataframe(tsv_path):
+    build_snapshot(tsv_path, FUZZY_SPECS, EXACT_SPECS)
+    df = pd.read_csv(tsv_path, sep="\t")
+    table = load_lookup_table(tsv_path)
+
+    assert isinstance(table, SnapshotTable)
+    assert len(table) == len(df) and not table.empty
+    for row_id in range(len(df)):
+        assert [table.row(row_id)] == _plain([df.iloc[row_id].to_dict()])
+
+    for query in ["rs1045642", "rs104564", "rs4244", "rs9923231 "]:
+        assert general_search(table, query, "Variant Name", "Variant ID", 0.6) == _plain(
+            general_search(df, query, "Variant Name", "Variant ID", 0.6)
+        )
+    for query in ["CYP2C19*2", "1639G>A", "val174ala", "e-variant", "521T>C"]:
+        assert general_search_comma_list(
+            table, query, "Synonyms", "Variant ID", 0.6, top_k=3
+        ) == _plain(
+            general_search_comma_list(df, query, "Synonyms", "Variant ID", 0.6, top_k=3)
+        )
+
+    exact = table.exact_index(["Variant Name"], ["Synonyms"])
+    df_exact = get_exact_index(df, ["Variant Name"], comma_columns=["Synonyms"])
+    for query in ["RS4244285", "c.-1639g>a", "cyp2c19*2", "é-variant", "missing"]:
+        assert list(exact.lookup(query)) == df_exact.lookup(query)
+
+    # Indexes that were not prebuilt are built from the mapped columns
+    assert general_search(table, "PA3", "Variant ID", "Variant ID") == _plain(
+        general_search(df, "PA3", "Variant ID", "Variant ID")
+    )
+
+
+def test_stale_or_missing_snapshot_falls_back_to_pandas(tsv_path):
+    assert isinstance(load_lookup_table(tsv_path), pd.DataFrame)
+
+    build_snapshot(tsv_path, FUZZY_SPECS, EXACT_SPECS)
+    with open(tsv_path, "a") as f:
+        f.write("PA6\trs1799853\tCYP2C9*2\n")
+
+    assert snapshot_path_for(tsv_path).exists()
+    table = load_lookup_table(tsv_path)
+    assert isinstance(table, pd.DataFrame)
+    assert len(table) == len(ROWS) + 1
@@ -0,0 +1,96 @@
+from term_normalization.cache import PersistentTermStore, TermCache, term_lookup_files
+from term_normalization.variant_search import VariantSearchResult
+
+
+def _result(term):
+    return VariantSearchResult(
+        raw_input=term, id=f"PA{term}", normalized_term=term, url="", score=1.0
+    )
+
+
+def _write_tables(data_dir, variants="rs1\n"):
+    lookup_dir = data_dir / "term_lookup_info"
+    lookup_dir.mkdir(parents=True)
+    (lookup_dir / "variants.tsv").write_text(variants)
+    (lookup_dir / "drugs.tsv").write_text("aspirin\n")
+    (lookup_dir / "haplotypes.tsv").write_text("CYP2D6*4\n")
+    return data_dir
+
+
+def test_snapshot_version_hashes_the_lookup_data_dir(tmp_path, monkeypatch):
+    old = _write_tables(tmp_path / "old")
+    new = _write_tables(tmp_path / "new", variants="rs1\nrs2\n")
+    store = PersistentTermStore(tmp_path / "cache.sqlite3")
+    cache = TermCache(persistent=store)
+
+    # A relative data_dir is resolved against the working directory of the lookup
+    monkeypatch.chdir(tmp_path)
+    cache.use_data_dir("old")
+    assert store._files == term_lookup_files(old)
+    assert all(path.is_absolute() for path in store._files)
+    store.set("variant", "rs1", "rs1", [{"id": "PA1"}])
+    assert store.get("variant", "rs1") is not None
+
+    # Tables that changed invalidate the stored entries
+    cache.use_data_dir(new)
+    assert store.get("variant", "rs1") is None
+
+    # Unchanged tables at another path keep them
+    cache.use_data_dir(old)
+    copy = _write_tables(tmp_path / "copy")
+    cache.use_data_dir(copy)
+    assert store.get("variant", "rs1") is not None
+
+
+def test_lru_eviction_and_stats():
+    cache = TermCache(max_entries=2)
+    for term in ("rs1", "rs2"):
+        cache.set_variant(term, [_result(term)])
+
+    # Reading rs1 makes rs2 the least recently used entry
+    assert cache.get_variant(" RS1 ")[0].id == "PArs1"
+    cache.set_variant("rs3", [_result("rs3")])
+    assert cache.get_variant("rs2") is None
+    assert cache.get_variant("rs1") is not None
+    # Drugs have their own bound
+    cache.set_drug("aspirin", [_result("aspirin")])
+    assert cache.get_variant("rs3") is not None
+
+    stats = cache.stats()
+    assert stats["variant_count"] == 2 and stats["drug_count"] == 1
+    assert stats["max_entries"] == 2
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    assert stats["hit_rate"] == 0.75
+
+    with cache.timed("local_tsv"):
+        pass
+    assert cache.timed_call("local_tsv", len, "rs1") == 3
+    assert cache.stats()["latency"]["local_tsv"]["calls"] == 2
+
+
+def test_negative_results_expire_sooner(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("term_normalization.cache.time.time", lambda: now[0])
+    store = PersistentTermStore(tmp_path / "cache.sqlite3", version="v1")
+    cache = TermCache(persistent=store, negative_ttl_seconds=60)
+
+    cache.set_drug("zzqqx", [])
+    cache.set_drug("aspirin", [_result("aspirin")])
+    assert cache.get_drug("ZZQQX") == []
+    assert cache.stats()["negative_hits"] == 1
+
+    # Another process sees the negative entry, with the same expiry
+    other = TermCache(persistent=store, negative_ttl_seconds=60)
+    assert other.get_drug("zzqqx") == []
+    assert other.stats()["persistent_hits"] == 1
+
+    now[0] += 61
+    assert cache.get_drug("zzqqx") is None
+    assert other.get_drug("zzqqx") is None
+    assert cache.get_drug("aspirin")[0].id == "PAaspirin"
+
+    # A later positive result replaces a negative one
+    cache.set_drug("zzqqx", [])
+    cache.set_drug("zzqqx", [_result("zzqqx")])
+    assert cache.get_drug("zzqqx")[0].id == "PAzzqqx"
+    assert cache.stats()["negative_count"] == 0
@@ -24,6 +24,7 @@ from .cost import (
     UsageInfo,
     CostTracker,
     calculate_cost,
+    cached_usage,
     extract_usage_from_response,
 )
 
@@ -52,5 +53,6 @@ __all__ = [
     "UsageInfo",
     "CostTracker",
     "calculate_cost",
+    "cached_usage",
     "extract_usage_from_response",
 ]
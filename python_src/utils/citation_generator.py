@@ -48,10 +48,13 @@ def clean_citation(citation: str) -> str:
     return cleaned
 
 
-# Single source of truth for citation prompt template
+# Single source of truth for citation prompt template.
+# The article is sent ahead of this prompt (see llm.build_messages), so every
+# citation call for an article shares the same cacheable prefix. Templates
+# may still use {full_text}; it is filled with a pointer to the article.
 CITATION_PROMPT_TEMPLATE = """You are a research assistant helping extract citations from a scientific article.
 
-Given an annotation about a genetic variant, find the exact sentences or passages in the article that support this annotation. Return 1-3 direct quotes from the article that provide evidence for the annotation.
+Given an annotation about a genetic variant, find the exact sentences or passages in the article above that support this annotation. Return 1-3 direct quotes from the article that provide evidence for the annotation.
 
 **Annotation Details:**
 - Variant/Haplotype: {variant}
@@ -67,12 +70,11 @@ Given an annotation about a genetic variant, find the exact sentences or passage
 4. Include surrounding context if needed for clarity
 5. Return 1-3 citations maximum
 
-**Article Text:**
-{full_text}
-
 Return your response as JSON with a "citations" array containing the exact quote strings.
 """
 
+ARTICLE_TEXT_PLACEHOLDER = "(the full article text is given above)"
+
 
 async def generate_citations(
     annotation: Dict,
@@ -123,13 +125,14 @@ async def generate_citations(
             drug=annotation.get("Drug(s)", annotation.get("Drug(s", "")),  # Handle typo
             sentence=annotation.get("Sentence", ""),
             notes=annotation.get("Notes", ""),
-            full_text=full_text,
+            full_text=ARTICLE_TEXT_PLACEHOLDER,
         )
 
-        # Call LLM with JSON output format
+        # Call LLM with JSON output format; the article goes in `text` so it
+        # leads the message and is shared by every annotation's call
         result = await generate_response(
             prompt=formatted_prompt,
-            text="",
+            text=full_text,
             model=model,
             response_format={
                 "type": "object",
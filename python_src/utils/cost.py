@@ -7,18 +7,17 @@ costs across different LLM providers and models.
 
 from dataclasses import dataclass, field
 from typing import Dict, Any
-import litellm
 
 
-# Model pricing per 1M tokens (input, output) in USD
+# Model pricing per 1M tokens (input, output, optional cached_input) in USD
 # Source: Provider pricing pages as of Dec 2025
 MODEL_PRICING: Dict[str, Dict[str, float]] = {
     # OpenAI models
-    "openai/gpt-4o": {"input": 2.50, "output": 10.00},
-    "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    "openai/gpt-5-mini": {"input": 0.25, "output": 2.00},
-    "openai/gpt-5.1": {"input": 1.25, "output": 10.00},
-    "openai/gpt-5.2": {"input": 1.75, "output": 14.00},
+    "openai/gpt-4o": {"input": 2.50, "output": 10.00, "cached_input": 1.25},
+    "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
+    "openai/gpt-5-mini": {"input": 0.25, "output": 2.00, "cached_input": 0.025},
+    "openai/gpt-5.1": {"input": 1.25, "output": 10.00, "cached_input": 0.125},
+    "openai/gpt-5.2": {"input": 1.75, "output": 14.00, "cached_input": 0.175},
     # Anthropic models
     "anthropic/claude-opus-4-5-20251101": {"input": 15.00, "output": 75.00},
     "anthropic/claude-sonnet-4-5-20250929": {"input": 3.00, "output": 15.00},
@@ -30,6 +29,17 @@ MODEL_PRICING: Dict[str, Dict[str, float]] = {
     "gemini/gemini-1.5-pro": {"input": 1.25, "output": 5.00},
 }
 
+# Price of prompt-cache reads (and Anthropic cache writes) relative to the
+# input price, for models without a "cached_input" price above
+CACHE_READ_MULTIPLIER: Dict[str, float] = {
+    "openai": 0.5,
+    "anthropic": 0.1,
+    "gemini": 0.25,
+}
+CACHE_WRITE_MULTIPLIER: Dict[str, float] = {
+    "anthropic": 1.25,
+}
+
 
 @dataclass
 class UsageInfo:
@@ -40,6 +50,16 @@ class UsageInfo:
     total_tokens: int = 0
     cost_usd: float = 0.0
     model: str = ""
+    # Prompt tokens read from / written to the provider's prompt cache
+    # (already counted in prompt_tokens)
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    # Calls answered from the LLM response cache, and what they would have cost
+    cache_hits: int = 0
+    saved_cost_usd: float = 0.0
+    # Provider retries and the time spent backing off between them
+    retries: int = 0
+    retry_wait_s: float = 0.0
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -48,6 +68,12 @@ class UsageInfo:
             "total_tokens": self.total_tokens,
             "cost_usd": round(self.cost_usd, 6),
             "model": self.model,
+            "cached_tokens": self.cached_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cache_hits": self.cache_hits,
+            "saved_cost_usd": round(self.saved_cost_usd, 6),
+            "retries": self.retries,
+            "retry_wait_s": round(self.retry_wait_s, 3),
         }
 
 
@@ -69,6 +95,12 @@ class CostTracker:
     total_prompt_tokens: int = 0
     total_completion_tokens: int = 0
     total_cost_usd: float = 0.0
+    total_cached_tokens: int = 0
+    total_cache_write_tokens: int = 0
+    total_cache_hits: int = 0
+    total_saved_cost_usd: float = 0.0
+    total_retries: int = 0
+    total_retry_wait_s: float = 0.0
 
     def add_usage(self, task_name: str, usage: UsageInfo) -> None:
         """Add usage from a single LLM call to the tracker."""
@@ -81,10 +113,22 @@ class CostTracker:
         task_usage.total_tokens += usage.total_tokens
         task_usage.cost_usd += usage.cost_usd
         task_usage.model = usage.model
+        task_usage.cached_tokens += usage.cached_tokens
+        task_usage.cache_write_tokens += usage.cache_write_tokens
+        task_usage.cache_hits += usage.cache_hits
+        task_usage.saved_cost_usd += usage.saved_cost_usd
+        task_usage.retries += usage.retries
+        task_usage.retry_wait_s += usage.retry_wait_s
 
         self.total_prompt_tokens += usage.prompt_tokens
         self.total_completion_tokens += usage.completion_tokens
         self.total_cost_usd += usage.cost_usd
+        self.total_cached_tokens += usage.cached_tokens
+        self.total_cache_write_tokens += usage.cache_write_tokens
+        self.total_cache_hits += usage.cache_hits
+        self.total_saved_cost_usd += usage.saved_cost_usd
+        self.total_retries += usage.retries
+        self.total_retry_wait_s += usage.retry_wait_s
 
     def get_summary(self) -> Dict[str, Any]:
         """Return a dictionary summary suitable for JSON serialization."""
@@ -93,49 +137,118 @@ class CostTracker:
             "total_prompt_tokens": self.total_prompt_tokens,
             "total_completion_tokens": self.total_completion_tokens,
             "total_tokens": self.total_prompt_tokens + self.total_completion_tokens,
+            "cached_tokens": self.total_cached_tokens,
+            "cache_write_tokens": self.total_cache_write_tokens,
+            "cache_hits": self.total_cache_hits,
+            "saved_cost_usd": round(self.total_saved_cost_usd, 6),
+            "retries": self.total_retries,
+            "retry_wait_s": round(self.total_retry_wait_s, 3),
             "by_task": {task: usage.to_dict() for task, usage in self.by_task.items()},
         }
 
 
+def _input_price_per_token(model: str) -> float:
+    """Input price per token, from the local table or LiteLLM's model_cost map."""
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]["input"] / 1_000_000
+    try:
+        import litellm
+
+        for name in (model, model.split("/", 1)[-1]):
+            info = litellm.model_cost.get(name)
+            if info and info.get("input_cost_per_token"):
+                return float(info["input_cost_per_token"])
+    except Exception:
+        pass
+    return 0.0
+
+
+def _prompt_cache_adjustment(
+    model: str, cached_tokens: int, cache_write_tokens: int
+) -> float:
+    """
+    Difference between the prompt-cache price and the full input price of
+    cached_tokens and cache_write_tokens (negative for cache reads).
+    """
+    if not cached_tokens and not cache_write_tokens:
+        return 0.0
+    input_price = _input_price_per_token(model)
+    provider = model.split("/", 1)[0] if "/" in model else "openai"
+
+    pricing = MODEL_PRICING.get(model, {})
+    if "cached_input" in pricing:
+        read_price = pricing["cached_input"] / 1_000_000
+    else:
+        read_price = input_price * CACHE_READ_MULTIPLIER.get(provider, 1.0)
+    write_price = input_price * CACHE_WRITE_MULTIPLIER.get(provider, 1.0)
+
+    return cached_tokens * (read_price - input_price) + cache_write_tokens * (
+        write_price - input_price
+    )
+
+
 def calculate_cost(
     model: str,
     prompt_tokens: int,
     completion_tokens: int,
+    cached_tokens: int = 0,
+    cache_write_tokens: int = 0,
 ) -> float:
     """
     Calculate cost in USD for given token counts.
 
     Uses LiteLLM's completion_cost if available, falls back to local pricing table.
+    Prompt tokens served from (or written to) the provider's prompt cache are
+    then repriced at the cache rate.
 
     Args:
         model: Model identifier (e.g., "openai/gpt-4o")
         prompt_tokens: Number of input tokens
         completion_tokens: Number of output tokens
+        cached_tokens: Input tokens read from the prompt cache (within prompt_tokens)
+        cache_write_tokens: Input tokens written to the prompt cache (within prompt_tokens)
 
     Returns:
         Cost in USD
     """
-    # Try LiteLLM's built-in cost calculation first
+    cost = None
+
+    # Try LiteLLM's built-in cost calculation first (imported here, not at
+    # module level, to keep it out of API and script startup)
     try:
+        import litellm
+
         cost = litellm.completion_cost(
             model=model,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
         )
-        if cost is not None and cost > 0:
-            return cost
     except Exception:
         pass
 
-    # Fall back to local pricing table
-    if model in MODEL_PRICING:
+    if cost is None or cost <= 0:
+        # Fall back to local pricing table
+        if model not in MODEL_PRICING:
+            # Unknown model - return 0
+            return 0.0
         pricing = MODEL_PRICING[model]
         input_cost = (prompt_tokens / 1_000_000) * pricing["input"]
         output_cost = (completion_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        cost = input_cost + output_cost
 
-    # Unknown model - return 0
-    return 0.0
+    adjustment = _prompt_cache_adjustment(model, cached_tokens, cache_write_tokens)
+    return max(0.0, cost + adjustment)
+
+
+def _usage_field(obj: Any, name: str) -> int:
+    """Read an int field from a usage object or dict (LiteLLM returns both)."""
+    if obj is None:
+        return 0
+    value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
 
 
 def extract_usage_from_response(response: Any, model: str) -> UsageInfo:
@@ -159,7 +272,16 @@ def extract_usage_from_response(response: Any, model: str) -> UsageInfo:
         prompt_tokens + completion_tokens
     )
 
-    cost = calculate_cost(model, prompt_tokens, completion_tokens)
+    # OpenAI (and LiteLLM's normalized usage) report cache reads in
+    # prompt_tokens_details; Anthropic reports reads and writes separately
+    cached_tokens = _usage_field(
+        getattr(usage, "prompt_tokens_details", None), "cached_tokens"
+    ) or _usage_field(usage, "cache_read_input_tokens")
+    cache_write_tokens = _usage_field(usage, "cache_creation_input_tokens")
+
+    cost = calculate_cost(
+        model, prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens
+    )
 
     return UsageInfo(
         prompt_tokens=prompt_tokens,
@@ -167,4 +289,23 @@ def extract_usage_from_response(response: Any, model: str) -> UsageInfo:
         total_tokens=total_tokens,
         cost_usd=cost,
         model=model,
+        cached_tokens=cached_tokens,
+        cache_write_tokens=cache_write_tokens,
+    )
+
+
+def cached_usage(original: UsageInfo) -> UsageInfo:
+    """
+    Usage to report for a response served from the LLM response cache.
+
+    Nothing is billed, so tokens and cost are zero; the original call's cost
+    is reported as saved.
+
+    Args:
+        original: UsageInfo recorded when the response was first generated
+    """
+    return UsageInfo(
+        model=original.model,
+        cache_hits=1,
+        saved_cost_usd=original.cost_usd,
     )
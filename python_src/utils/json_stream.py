@@ -0,0 +1,163 @@
+"""
+Incremental parsing of streamed JSON responses.
+
+Extraction prompts answer with one JSON object holding arrays of
+annotations ({"var_pheno_ann": [{...}, {...}, ...]}). ArrayElementStream is
+fed the response text as it streams in and returns each element of the
+watched top-level arrays as soon as its closing bracket (or, for scalars,
+the following comma) arrives, so work on annotation #1 can start while the
+model is still writing annotation #20.
+
+Each character is examined once, whatever the chunking, and only the text
+of the element in progress is kept. Text before the first "{" (a code fence
+or a line of prose) is skipped. Elements that fail to parse are skipped; the
+full response, parsed once the stream ends, remains the authoritative result.
+"""
+
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Structural characters, and backslash escapes so escaped quotes are skipped
+_TOKEN = re.compile(r'\\.|[{}\[\]",]', re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class ArrayElementStream:
+    """
+    Yields completed elements of selected top-level arrays of a streamed
+    JSON object.
+
+    Usage:
+        parser = ArrayElementStream(["var_pheno_ann", "var_drug_ann"])
+        async for delta in stream:
+            for key, index, element in parser.feed(delta):
+                ...
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        # Unprocessed text and the element (or key) in progress; positions
+        # below are offsets into it
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._string_start = 0
+        self._done = False
+        # Last string closed directly inside the top-level object: the key
+        # of the value that follows
+        self._last_key: Optional[str] = None
+        # Array being watched: its key, the next element's index and start,
+        # and whether the current element (an object or array) already ended
+        self._array_key: Optional[str] = None
+        self._index = 0
+        self._element_start = 0
+        self._element_done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, int, Any]]:
+        """
+        Add streamed text.
+
+        Returns:
+            (array key, element index, parsed element) for every element
+            completed by this chunk, in order
+        """
+        if self._done or not chunk:
+            return []
+        self._text += chunk
+        text = self._text
+        # An odd run of trailing backslashes ends with one that escapes the
+        # first character of the next chunk; scanning starts at a token
+        # boundary, so the run is counted from there
+        trailing = min(len(text) - len(text.rstrip("\\")), len(text) - self._pos)
+        end = len(text) - trailing % 2
+        completed: List[Tuple[str, int, Any]] = []
+
+        for match in _TOKEN.finditer(text, self._pos, end):
+            token = match.group()
+            pos = match.start()
+            if self._in_string:
+                if token == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        key_text = text[self._string_start : pos + 1]
+                        try:
+                            self._last_key = json.loads(key_text)
+                        except (json.JSONDecodeError, RecursionError):
+                            self._last_key = None
+                continue
+            if len(token) > 1:
+                continue
+            stack = self._stack
+            if not stack:
+                # Wait for the top-level object, skipping any preamble
+                if token == "{":
+                    stack.append("}")
+                continue
+            if token == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif token in _CLOSERS:
+                stack.append(_CLOSERS[token])
+                if token == "[" and len(stack) == 2 and self._last_key in self.keys:
+                    self._array_key = self._last_key
+                    self._index = 0
+                    self._element_start = pos + 1
+                    self._element_done = False
+            elif token == ",":
+                if len(stack) == 2 and self._array_key is not None:
+                    self._end_scalar(text, pos, completed)
+                    self._element_start = pos + 1
+                    self._element_done = False
+            elif token == stack[-1]:
+                stack.pop()
+                if self._array_key is None:
+                    if not stack:
+                        self._done = True
+                        break
+                elif len(stack) == 2:
+                    # An object or array element just closed
+                    self._emit(text[self._element_start : pos + 1], completed)
+                    self._element_done = True
+                elif len(stack) == 1:
+                    # The watched array itself closed
+                    self._end_scalar(text, pos, completed)
+                    self._array_key = None
+            else:
+                # Mismatched bracket: not the JSON we are looking for
+                self._done = True
+                break
+
+        self._pos = end
+        self._trim()
+        return completed
+
+    def _trim(self) -> None:
+        """Drop text that no element or key in progress still needs."""
+        keep = self._pos
+        if self._array_key is not None:
+            keep = min(keep, self._element_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if keep:
+            self._text = self._text[keep:]
+            self._pos -= keep
+            self._element_start -= keep
+            self._string_start -= keep
+
+    def _end_scalar(
+        self, text: str, pos: int, completed: List[Tuple[str, int, Any]]
+    ) -> None:
+        """Emit a scalar element ending at pos (a comma or the closing bracket)."""
+        if not self._element_done and text[self._element_start : pos].strip():
+            self._emit(text[self._element_start : pos], completed)
+
+    def _emit(self, element_text: str, completed: List[Tuple[str, int, Any]]) -> None:
+        try:
+            element = json.loads(element_text)
+        except (json.JSONDecodeError, RecursionError):
+            element = None
+        if element is not None:
+            completed.append((self._array_key, self._index, element))
+        self._index += 1
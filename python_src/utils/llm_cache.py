@@ -0,0 +1,242 @@
+"""
+Content-addressed cache of LLM responses.
+
+Re-running the pipeline over the same articles with unchanged prompts would
+otherwise pay for every completion again. When enabled, generate_response
+looks up a hash of everything that determines the completion (normalized
+model, prompt, article text, response schema, temperature, max_tokens)
+before calling the provider, and stores the response together with the
+UsageInfo of the original call.
+
+Entries live in a SQLite database (WAL mode, shared between the API and the
+scripts). Once the stored responses exceed the size budget, the least
+recently used entries are evicted.
+
+The cache is opt-in, configured from the environment:
+    LLM_CACHE               1/true/yes to enable (default off)
+    LLM_CACHE_DIR           database directory (default data/cache)
+    LLM_CACHE_FILE          database file name (default llm_cache.sqlite3)
+    LLM_CACHE_MAX_MB        size budget for stored responses (default 512)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from utils.cost import UsageInfo
+
+DEFAULT_CACHE_DIR = "data/cache"
+DEFAULT_CACHE_FILE = "llm_cache.sqlite3"
+DEFAULT_MAX_MB = 512
+
+# Bump when the meaning of a cached response changes (e.g. post-processing)
+CACHE_KEY_VERSION = 1
+
+
+def make_cache_key(
+    model: str,
+    prompt: str,
+    text: str,
+    response_format: Optional[dict],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Hash the inputs that determine a completion.
+
+    Args:
+        model: Normalized, provider-prefixed model (see llm.normalize_model)
+        prompt: Instruction prompt
+        text: Article text
+        response_format: JSON schema, or None
+        temperature: Effective sampling temperature
+        max_tokens: Completion token limit
+
+    Returns:
+        Hex SHA-256 digest; schemas that differ only in key order hash the same
+    """
+    payload = json.dumps(
+        {
+            "version": CACHE_KEY_VERSION,
+            "model": model,
+            "prompt": prompt,
+            "text": text,
+            "response_format": response_format,
+            "temperature": float(temperature),
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed store of (response text, original UsageInfo) by cache key.
+
+    Each thread gets its own connection. The byte size of every entry is
+    stored, and set() evicts least recently used entries once their total
+    exceeds max_bytes.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._counters_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        cache_key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        usage TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS llm_responses_last_used "
+                    "ON llm_responses (last_used_at)"
+                )
+                self._initialized = True
+
+        self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, UsageInfo]]:
+        """
+        Get a cached response.
+
+        Returns:
+            (response text, UsageInfo of the original call), or None on a miss.
+            Database errors are logged and read as a miss.
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, usage FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE llm_responses SET last_used_at = ? WHERE cache_key = ?",
+                    (time.time(), key),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache read failed: {e}")
+            row = None
+        with self._counters_lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        response, usage = row
+        return response, UsageInfo(**json.loads(usage))
+
+    def set(self, key: str, model: str, response: str, usage: UsageInfo) -> None:
+        """Store a response and its usage, then evict down to the size budget."""
+        usage_json = json.dumps(usage.to_dict())
+        size = len(response.encode("utf-8")) + len(usage_json)
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(cache_key, model, response, usage, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, usage_json, size, now, now),
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = conn.execute(
+            "SELECT cache_key, size FROM llm_responses ORDER BY last_used_at"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self._counters_lock:
+            self.evictions += evicted
+
+    def clear(self) -> None:
+        """Delete all cached responses."""
+        self._connect().execute("DELETE FROM llm_responses")
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = (
+            self._connect()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses")
+            .fetchone()
+        )
+        with self._counters_lock:
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def cache_enabled_by_default() -> bool:
+    return os.getenv("LLM_CACHE", "0").lower() in ("1", "true", "yes")
+
+
+_LLM_CACHE: Optional[LLMResponseCache] = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the global response cache, configured from the environment on first use."""
+    global _LLM_CACHE
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE is None:
+            cache_dir = os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR)
+            cache_file = os.getenv("LLM_CACHE_FILE", DEFAULT_CACHE_FILE)
+            max_mb = float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            _LLM_CACHE = LLMResponseCache(
+                Path(cache_dir) / cache_file, max_bytes=int(max_mb * 1024 * 1024)
+            )
+            logger.info(f"LLM response cache at {_LLM_CACHE.db_path}")
+        return _LLM_CACHE
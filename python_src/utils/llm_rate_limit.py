@@ -0,0 +1,319 @@
+"""
+Process-wide request and token budgets for LLM calls.
+
+Every generate_response call, from the pipeline, /run-best-prompts,
+batch_process.py or fetch_new_article.py, first reserves one request and
+its estimated prompt tokens plus max_tokens from the budget of its model.
+Callers that would exceed the requests-per-minute or tokens-per-minute
+budget wait their turn instead of failing with a 429. After the response
+arrives, the reservation is settled against the reported token usage, so
+the unused part of max_tokens (and any estimation error) is refunded to, or
+charged from, the next callers.
+
+Budgets are per model (OpenAI and Anthropic enforce limits per model), with
+defaults per provider. A request is admitted as soon as the budget is not
+in debt, so with a configured budget one request larger than the whole
+per-minute budget still runs; the requests after it wait until its tokens
+have been paid back. The built-in defaults are only a guess at the account
+tier, so a request that does not fit in a default budget fails with
+RateBudgetError, asking for the real limits to be configured, rather than
+being throttled to a rate the account may not have.
+
+Configured from the environment:
+    <PROVIDER>_LLM_RPM      requests per minute, e.g. OPENAI_LLM_RPM
+    <PROVIDER>_LLM_TPM      tokens per minute, e.g. ANTHROPIC_LLM_TPM
+    LLM_RATE_LIMITS         JSON per-model overrides,
+                            e.g. {"openai/gpt-4o": {"rpm": 5000, "tpm": 800000}}
+    LLM_RATE_LIMIT          0/false/no to turn the limiter off
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+# Bucket capacity, in seconds of budget: how much can burst after idling
+BURST_SECONDS = 10.0
+
+# Rough characters per token for English prose and JSON
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class RateBudget:
+    """Requests and tokens (prompt + completion) allowed per minute."""
+
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+# Conservative defaults, roughly the lowest paid tier of each provider. A
+# request bigger than a default budget raises RateBudgetError (see above);
+# e.g. Anthropic's lowest tier is smaller than one full-article prompt, so
+# set ANTHROPIC_LLM_TPM (or LLM_RATE_LIMITS) to the account's limit.
+_DEFAULT_BUDGETS: Dict[str, RateBudget] = {
+    "openai": RateBudget(requests_per_minute=500, tokens_per_minute=200_000),
+    "anthropic": RateBudget(requests_per_minute=50, tokens_per_minute=40_000),
+    "gemini": RateBudget(requests_per_minute=1000, tokens_per_minute=1_000_000),
+    # Offline mock provider (utils.mock_llm); set MOCK_LLM_RPM/TPM to emulate a tier
+    "mock": RateBudget(requests_per_minute=100_000, tokens_per_minute=100_000_000),
+}
+_FALLBACK_BUDGET = RateBudget(requests_per_minute=60, tokens_per_minute=100_000)
+
+
+class RateBudgetError(ValueError):
+    """Raised for a request that does not fit in an unconfigured default budget."""
+
+
+def _provider(model: str) -> str:
+    return model.split("/", 1)[0] if "/" in model else "openai"
+
+
+def _budget_from_env(provider: str) -> RateBudget:
+    """Apply <PROVIDER>_LLM_RPM / _TPM environment overrides to the default budget."""
+    default = _DEFAULT_BUDGETS.get(provider, _FALLBACK_BUDGET)
+    prefix = f"{provider.upper()}_LLM_"
+    return replace(
+        default,
+        requests_per_minute=float(
+            os.getenv(prefix + "RPM", default.requests_per_minute)
+        ),
+        tokens_per_minute=float(os.getenv(prefix + "TPM", default.tokens_per_minute)),
+    )
+
+
+def _model_budgets_from_env() -> Dict[str, RateBudget]:
+    budgets = {}
+    for model, limits in json.loads(os.getenv("LLM_RATE_LIMITS", "{}")).items():
+        base = _budget_from_env(_provider(model))
+        budgets[model] = RateBudget(
+            requests_per_minute=float(limits.get("rpm", base.requests_per_minute)),
+            tokens_per_minute=float(limits.get("tpm", base.tokens_per_minute)),
+        )
+    return budgets
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """
+    Estimate the prompt tokens of chat messages without a tokenizer.
+
+    About 4 characters per token, plus a few tokens of framing per message;
+    the reservation is corrected with the real usage after the call.
+    """
+    chars = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            # Content blocks, e.g. [{"type": "text", "text": ...}]
+            content = "".join(block.get("text", "") for block in content)
+        chars += len(content)
+    return chars // CHARS_PER_TOKEN + 4 * len(messages)
+
+
+class DebtBucket:
+    """
+    Token bucket that admits a caller whenever it is not in debt.
+
+    Each acquire() takes its cost immediately, even if that drives the
+    balance negative, and returns how long the caller must wait for the
+    balance in front of it to be paid back. Waits are therefore served in
+    arrival order. Thread-safe, and independent of any event loop.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._balance = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._balance = min(
+            self.capacity, self._balance + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Charge cost and return the seconds until the caller may proceed."""
+        self._refill(now)
+        wait = max(0.0, -self._balance) / self.rate
+        self._balance -= cost
+        return wait
+
+    def give(self, amount: float) -> None:
+        """Refund (or, if negative, charge) tokens after the fact."""
+        self._balance = min(self.capacity, self._balance + amount)
+
+
+@dataclass
+class Reservation:
+    """What one call took from its model's budget."""
+
+    model: str
+    tokens: int
+    wait_seconds: float
+
+
+class _ModelLimiter:
+    def __init__(self, budget: RateBudget):
+        self.budget = budget
+        self.requests = DebtBucket(budget.requests_per_minute)
+        self.tokens = DebtBucket(budget.tokens_per_minute)
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class LLMRateLimiter:
+    """Per-model request and token budgets shared by every caller in the process."""
+
+    def __init__(
+        self,
+        model_budgets: Optional[Dict[str, RateBudget]] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self._model_budgets = dict(model_budgets or {})
+        self._provider_budgets: Dict[str, RateBudget] = {}
+        self._limiters: Dict[str, _ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def budget_for(self, model: str) -> RateBudget:
+        if model in self._model_budgets:
+            return self._model_budgets[model]
+        provider = _provider(model)
+        if provider not in self._provider_budgets:
+            self._provider_budgets[provider] = _budget_from_env(provider)
+        return self._provider_budgets[provider]
+
+    def _is_default_budget(self, model: str) -> bool:
+        """Whether model's token budget is a built-in default, not configured."""
+        if model in self._model_budgets:
+            return False
+        return os.getenv(f"{_provider(model).upper()}_LLM_TPM") is None
+
+    def check_fits(self, model: str, tokens: int) -> None:
+        """
+        Raise RateBudgetError if one request of tokens exceeds model's default budget.
+
+        Call before the first attempt: a configured budget admits any
+        request (see the module docstring), but a default one is likely
+        wrong for an account whose requests are this large.
+        """
+        if not self.enabled or not self._is_default_budget(model):
+            return
+        budget = self.budget_for(model)
+        if tokens > budget.tokens_per_minute:
+            provider = _provider(model)
+            raise RateBudgetError(
+                f"A {model} request reserves ~{tokens} tokens (prompt estimate + "
+                f"max_tokens), more than the default {provider} budget of "
+                f"{budget.tokens_per_minute:g} tokens per minute. Set "
+                f"{provider.upper()}_LLM_TPM or LLM_RATE_LIMITS to the account's "
+                "limit, or LLM_RATE_LIMIT=0 to turn the limiter off."
+            )
+
+    def configure(
+        self,
+        model: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """Override the budget of one model (takes effect for new reservations)."""
+        with self._lock:
+            base = self.budget_for(model)
+            self._model_budgets[model] = RateBudget(
+                requests_per_minute=requests_per_minute or base.requests_per_minute,
+                tokens_per_minute=tokens_per_minute or base.tokens_per_minute,
+            )
+            self._limiters.pop(model, None)
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limiter = self._limiters[model] = _ModelLimiter(self.budget_for(model))
+        return limiter
+
+    async def acquire(self, model: str, estimated_tokens: int) -> Reservation:
+        """
+        Reserve one request and estimated_tokens, waiting if the budget is in debt.
+
+        estimated_tokens should cover the whole call: the prompt estimate
+        plus max_tokens, refunded down to the real usage by settle().
+
+        A cancelled wait gives the reservation back.
+        """
+        if not self.enabled:
+            return Reservation(model=model, tokens=0, wait_seconds=0.0)
+        with self._lock:
+            limiter = self._limiter(model)
+            now = time.monotonic()
+            wait = max(
+                limiter.requests.take(1, now),
+                limiter.tokens.take(estimated_tokens, now),
+            )
+            limiter.calls += 1
+            if wait > 0:
+                limiter.waited_calls += 1
+                limiter.total_wait += wait
+                limiter.max_wait = max(limiter.max_wait, wait)
+        reservation = Reservation(
+            model=model, tokens=estimated_tokens, wait_seconds=wait
+        )
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                with self._lock:
+                    limiter.requests.give(1)
+                    limiter.tokens.give(estimated_tokens)
+                raise
+        return reservation
+
+    def settle(self, reservation: Reservation, actual_tokens: Optional[int]) -> None:
+        """
+        Correct a reservation with the tokens the provider reported.
+
+        After a failed call, pass the prompt estimate: no completion was
+        generated, so the max_tokens part of the reservation is refunded.
+        """
+        if not self.enabled or not actual_tokens:
+            return
+        with self._lock:
+            limiter = self._limiters.get(reservation.model)
+            if limiter is not None:
+                limiter.tokens.give(reservation.tokens - actual_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                model: {
+                    "requests_per_minute": limiter.budget.requests_per_minute,
+                    "tokens_per_minute": limiter.budget.tokens_per_minute,
+                    "calls": limiter.calls,
+                    "waited_calls": limiter.waited_calls,
+                    "total_wait_s": round(limiter.total_wait, 3),
+                    "max_wait_s": round(limiter.max_wait, 3),
+                }
+                for model, limiter in self._limiters.items()
+            }
+
+
+_RATE_LIMITER: Optional[LLMRateLimiter] = None
+_RATE_LIMITER_LOCK = threading.Lock()
+
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """Get the global LLM rate limiter, configured from the environment on first use."""
+    global _RATE_LIMITER
+    with _RATE_LIMITER_LOCK:
+        if _RATE_LIMITER is None:
+            _RATE_LIMITER = LLMRateLimiter(
+                model_budgets=_model_budgets_from_env(),
+                enabled=os.getenv("LLM_RATE_LIMIT", "1").lower()
+                not in ("0", "false", "no"),
+            )
+        return _RATE_LIMITER
@@ -0,0 +1,371 @@
+"""
+Retries, backoff and circuit breaking for LLM provider calls.
+
+A transient 429, 5xx, timeout or dropped connection would otherwise turn
+into a permanent error for that task. generate_response runs every provider
+call through LLMRetryHandler.call(), which:
+
+- classifies each error: rate limits, server errors, timeouts and connection
+  errors are retried; anything else (bad request, auth, context length) is
+  raised at once;
+- waits with exponential backoff and full jitter between attempts, or for
+  the provider's Retry-After when it sends one;
+- spends retries from a per-provider budget that only refills as calls are
+  made (RETRY_BUDGET_RATIO retries per call, plus a small floor), so an
+  outage does not multiply the load on the provider;
+- keeps a per-provider circuit breaker: after BREAKER_THRESHOLD consecutive
+  failed calls the breaker opens and calls fail fast with CircuitOpenError
+  for BREAKER_COOLDOWN seconds, then one probe call decides whether it closes.
+
+Retry counts and backoff time of each call are returned for reporting (see
+UsageInfo.retries / retry_wait_s).
+
+Configured from the environment:
+    LLM_MAX_RETRIES          retries after the first attempt (default 4)
+    LLM_BACKOFF_BASE         first backoff in seconds (default 1)
+    LLM_BACKOFF_MAX          longest backoff in seconds (default 60)
+    LLM_RETRY_BUDGET_RATIO   retries earned per call (default 0.2)
+    LLM_BREAKER_THRESHOLD    consecutive failures that open the breaker (default 5)
+    LLM_BREAKER_COOLDOWN     seconds the breaker stays open (default 30)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Error classes
+RATE_LIMIT = "rate_limit"
+SERVER_ERROR = "server_error"
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+FATAL = "fatal"
+
+RETRYABLE_ERRORS = {RATE_LIMIT, SERVER_ERROR, TIMEOUT, CONNECTION}
+
+# 529 is Anthropic's "overloaded"
+RETRY_STATUS_CODES = {408, 409, 500, 502, 503, 504, 529}
+
+# Retries always available per provider, however few calls have been made
+RETRY_BUDGET_FLOOR = 10
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 4
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    retry_budget_ratio: float = 0.2
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+
+
+def _policy_from_env() -> RetryPolicy:
+    default = RetryPolicy()
+    return RetryPolicy(
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", default.max_retries)),
+        backoff_base=float(os.getenv("LLM_BACKOFF_BASE", default.backoff_base)),
+        backoff_max=float(os.getenv("LLM_BACKOFF_MAX", default.backoff_max)),
+        retry_budget_ratio=float(
+            os.getenv("LLM_RETRY_BUDGET_RATIO", default.retry_budget_ratio)
+        ),
+        breaker_threshold=int(
+            os.getenv("LLM_BREAKER_THRESHOLD", default.breaker_threshold)
+        ),
+        breaker_cooldown=float(
+            os.getenv("LLM_BREAKER_COOLDOWN", default.breaker_cooldown)
+        ),
+    )
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Sort a provider error into a retryable class or FATAL.
+
+    Works on LiteLLM, OpenAI and httpx exceptions alike by looking at the
+    HTTP status code and the exception type name.
+    """
+    name = type(error).__name__
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in name:
+        return TIMEOUT
+    status = _status_code(error)
+    if status == 429 or "RateLimit" in name:
+        return RATE_LIMIT
+    if status in RETRY_STATUS_CODES or name in (
+        "InternalServerError",
+        "ServiceUnavailableError",
+    ):
+        return SERVER_ERROR
+    if isinstance(error, ConnectionError) or "Connection" in name:
+        return CONNECTION
+    return FATAL
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The Retry-After (or retry-after-ms) the provider sent with an error, if any."""
+    headers: Dict[str, Any] = {}
+    response_headers = getattr(getattr(error, "response", None), "headers", None)
+    if response_headers:
+        headers.update(response_headers)
+    headers.update(getattr(error, "litellm_response_headers", None) or {})
+    headers = {str(k).lower(): v for k, v in headers.items()}
+
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except (TypeError, ValueError):
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent calls.
+
+    Every call deposits `ratio` tokens and every retry withdraws one; the
+    balance never exceeds the floor plus what recent calls earned, so a
+    burst of failures can only retry a bounded share of the traffic.
+    """
+
+    def __init__(self, ratio: float, floor: int = RETRY_BUDGET_FLOOR):
+        self.ratio = ratio
+        self.capacity = float(floor)
+        self._balance = float(floor)
+
+    def record_call(self) -> None:
+        self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._balance >= 1:
+            self._balance -= 1
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive failed calls; open -> half
+    open after `cooldown` seconds, when a single probe call is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def allow(self, now: float) -> bool:
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == self.CLOSED
+
+    def release_probe(self) -> None:
+        """Let another caller probe (the probe call was cancelled or gave up)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = now
+            self._probing = False
+
+
+@dataclass
+class CallStats:
+    """How one call went: attempts, retries and time spent backing off."""
+
+    attempts: int = 0
+    retries: int = 0
+    backoff_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+class _ProviderState:
+    def __init__(self, policy: RetryPolicy):
+        self.budget = RetryBudget(policy.retry_budget_ratio)
+        self.breaker = CircuitBreaker(policy.breaker_threshold, policy.breaker_cooldown)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.backoff_seconds = 0.0
+        self.errors: Dict[str, int] = {}
+
+
+class LLMRetryHandler:
+    """Per-provider retry budgets and circuit breakers shared by the process."""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self._providers: Dict[str, _ProviderState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._providers.get(provider)
+        if state is None:
+            state = self._providers[provider] = _ProviderState(self.policy)
+        return state
+
+    def _backoff(self, retry: int, error: BaseException) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.policy.backoff_max)
+        ceiling = min(self.policy.backoff_max, self.policy.backoff_base * (2**retry))
+        return random.uniform(0, ceiling)
+
+    async def call(
+        self, provider: str, attempt: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, CallStats]:
+        """
+        Run attempt() until it succeeds, fails with a non-retryable error,
+        runs out of retries, or the retry budget or circuit breaker says stop.
+
+        Args:
+            provider: Provider name the breaker and budget are kept for
+            attempt: Zero-argument coroutine function making one provider call
+
+        Returns:
+            (result, CallStats). The last error is raised when giving up;
+            CircuitOpenError when the breaker is open.
+        """
+        stats = CallStats()
+        with self._lock:
+            state = self._state(provider)
+            state.calls += 1
+            state.budget.record_call()
+
+        # Whether this call holds the half-open breaker's single probe slot
+        probing = False
+        while True:
+            with self._lock:
+                if not probing:
+                    if not state.breaker.allow(time.monotonic()):
+                        state.rejected += 1
+                        raise CircuitOpenError(
+                            f"{provider} circuit breaker is open after "
+                            f"{state.breaker.failures} consecutive failures; calls "
+                            f"resume after a {self.policy.breaker_cooldown:g}s cooldown"
+                        )
+                    probing = state.breaker.state == CircuitBreaker.HALF_OPEN
+            stats.attempts += 1
+            try:
+                result = await attempt()
+            except asyncio.CancelledError:
+                if probing:
+                    with self._lock:
+                        state.breaker.release_probe()
+                raise
+            except Exception as e:
+                error_class = classify_error(e)
+                stats.errors.append(error_class)
+                with self._lock:
+                    state.errors[error_class] = state.errors.get(error_class, 0) + 1
+                    if error_class not in RETRYABLE_ERRORS:
+                        # The provider answered; the request itself is bad
+                        state.breaker.record_success()
+                        raise
+                    if error_class != RATE_LIMIT:
+                        state.breaker.record_failure(time.monotonic())
+                        probing = False
+                    give_up = (
+                        stats.retries >= self.policy.max_retries
+                        or state.breaker.state == CircuitBreaker.OPEN
+                        or not state.budget.try_spend()
+                    )
+                    if give_up:
+                        state.failures += 1
+                        if probing:
+                            # A rate-limited probe settles nothing; let
+                            # another call probe
+                            state.breaker.release_probe()
+                if give_up:
+                    raise
+                delay = self._backoff(stats.retries, e)
+                stats.retries += 1
+                stats.backoff_seconds += delay
+                with self._lock:
+                    state.retries += 1
+                    state.backoff_seconds += delay
+                await asyncio.sleep(delay)
+                continue
+            with self._lock:
+                state.breaker.record_success()
+            return result, stats
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                provider: {
+                    "calls": state.calls,
+                    "retries": state.retries,
+                    "failures": state.failures,
+                    "rejected": state.rejected,
+                    "backoff_s": round(state.backoff_seconds, 3),
+                    "errors": dict(state.errors),
+                    "breaker": state.breaker.state,
+                    "breaker_opened": state.breaker.times_opened,
+                }
+                for provider, state in self._providers.items()
+            }
+
+
+_RETRY_HANDLER: Optional[LLMRetryHandler] = None
+_RETRY_HANDLER_LOCK = threading.Lock()
+
+
+def get_llm_retry_handler() -> LLMRetryHandler:
+    """Get the global retry handler, configured from the environment on first use."""
+    global _RETRY_HANDLER
+    with _RETRY_HANDLER_LOCK:
+        if _RETRY_HANDLER is None:
+            _RETRY_HANDLER = LLMRetryHandler(_policy_from_env())
+        return _RETRY_HANDLER
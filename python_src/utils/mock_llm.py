@@ -0,0 +1,495 @@
+"""
+Offline mock LLM provider for load and latency testing.
+
+generate_response sends models with the "mock/" prefix (e.g.
+"mock/gpt-4o-mini") here instead of to LiteLLM, so the pipeline, the
+scheduler, the rate limiter and the retry handler can be exercised without
+API keys or network access.
+
+Each call answers with, in order of preference:
+
+1. a recorded fixture whose key matches the request (same messages and
+   response schema, whatever the model);
+2. a fixture whose "match" substring occurs in the request;
+3. JSON synthesized from the response_format schema, deterministic for a
+   given request and seed;
+4. a short canned text when there is no schema.
+
+Before answering, a call sleeps for a latency drawn from a configurable
+distribution, plus completion_tokens / tokens-per-second, and may fail with
+an injected 429, 503 or timeout (which the retry handler classifies like the
+real thing). With stream=True the answer instead arrives as OpenAI-style
+delta chunks paced at tokens-per-second, followed by a usage chunk.
+
+Fixtures are JSONL lines, in one file or a directory of *.jsonl files:
+    {"key": "<fixture_key>", "response": "...", "usage": {"prompt_tokens": 1200, "completion_tokens": 300}}
+    {"match": "var_pheno_ann", "response": {"var_pheno_ann": []}}
+Setting MOCK_LLM_RECORD makes generate_response append a keyed fixture for
+every real provider call, so a live run can be replayed offline.
+
+Configured from the environment:
+    MOCK_LLM_LATENCY            time to first token: fixed:S, uniform:LO,HI,
+                                exponential:MEAN or lognormal:MEDIAN,SIGMA
+                                (default lognormal:0.5,0.6)
+    MOCK_LLM_TOKENS_PER_S       generation speed, 0 for none (default 0)
+    MOCK_LLM_COMPLETION_TOKENS  report this many completion tokens instead of
+                                ~4 characters per token
+    MOCK_LLM_ARRAY_ITEMS        items per synthesized array, LO-HI (default 1-3)
+    MOCK_LLM_RATE_LIMIT_RATE    probability of a 429 (default 0)
+    MOCK_LLM_RETRY_AFTER        Retry-After seconds sent with a 429 (default none)
+    MOCK_LLM_SERVER_ERROR_RATE  probability of a 503 (default 0)
+    MOCK_LLM_TIMEOUT_RATE       probability of a timeout (default 0)
+    MOCK_LLM_TIMEOUT_S          how long a timed-out call hangs first (default 10)
+    MOCK_LLM_SEED               seed for latencies, errors and content (default 0)
+    MOCK_LLM_FIXTURES           fixture file or directory
+    MOCK_LLM_RECORD             JSONL file to record real responses to
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from utils.cost import UsageInfo
+from utils.llm_rate_limit import CHARS_PER_TOKEN, estimate_tokens
+
+MOCK_PROVIDER = "mock"
+
+DEFAULT_LATENCY = "lognormal:0.5,0.6"
+
+# Nesting depth past which synthesized objects and arrays are left empty
+MAX_SCHEMA_DEPTH = 8
+
+# Characters per streamed delta chunk
+STREAM_CHUNK_CHARS = 16
+
+
+class MockRateLimitError(Exception):
+    """Injected 429 Too Many Requests."""
+
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.litellm_response_headers = (
+            {"retry-after": f"{retry_after:g}"} if retry_after is not None else {}
+        )
+
+
+class MockServiceUnavailableError(Exception):
+    """Injected 503 Service Unavailable."""
+
+    status_code = 503
+
+
+class MockTimeoutError(TimeoutError):
+    """Injected request timeout."""
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a latency distribution spec into a sampler of seconds.
+
+    Args:
+        spec: "fixed:S", "uniform:LO,HI", "exponential:MEAN" or
+            "lognormal:MEDIAN,SIGMA"
+
+    Raises:
+        ValueError: For an unknown distribution or wrong number of parameters
+    """
+    kind, _, args = spec.partition(":")
+    kind = kind.strip().lower()
+    try:
+        values = [float(v) for v in args.split(",")] if args.strip() else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0]) if values[0] > 0 else -math.inf
+        return lambda rng: rng.lognormvariate(mu, values[1]) if values[0] > 0 else 0.0
+    raise ValueError(
+        f"Invalid latency spec: {spec!r} (expected fixed:S, uniform:LO,HI, "
+        "exponential:MEAN or lognormal:MEDIAN,SIGMA)"
+    )
+
+
+@dataclass(frozen=True)
+class MockLLMConfig:
+    latency: str = DEFAULT_LATENCY
+    tokens_per_second: float = 0.0
+    completion_tokens: Optional[int] = None
+    array_items: Tuple[int, int] = (1, 3)
+    rate_limit_rate: float = 0.0
+    retry_after: Optional[float] = None
+    server_error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 10.0
+    seed: int = 0
+    fixtures: Optional[str] = None
+
+
+def _config_from_env() -> MockLLMConfig:
+    default = MockLLMConfig()
+    completion_tokens = os.getenv("MOCK_LLM_COMPLETION_TOKENS")
+    retry_after = os.getenv("MOCK_LLM_RETRY_AFTER")
+    lo, _, hi = os.getenv("MOCK_LLM_ARRAY_ITEMS", "1-3").partition("-")
+    return MockLLMConfig(
+        latency=os.getenv("MOCK_LLM_LATENCY", default.latency),
+        tokens_per_second=float(
+            os.getenv("MOCK_LLM_TOKENS_PER_S", default.tokens_per_second)
+        ),
+        completion_tokens=int(completion_tokens) if completion_tokens else None,
+        array_items=(int(lo), int(hi or lo)),
+        rate_limit_rate=float(
+            os.getenv("MOCK_LLM_RATE_LIMIT_RATE", default.rate_limit_rate)
+        ),
+        retry_after=float(retry_after) if retry_after else None,
+        server_error_rate=float(
+            os.getenv("MOCK_LLM_SERVER_ERROR_RATE", default.server_error_rate)
+        ),
+        timeout_rate=float(os.getenv("MOCK_LLM_TIMEOUT_RATE", default.timeout_rate)),
+        timeout_seconds=float(
+            os.getenv("MOCK_LLM_TIMEOUT_S", default.timeout_seconds)
+        ),
+        seed=int(os.getenv("MOCK_LLM_SEED", default.seed)),
+        fixtures=os.getenv("MOCK_LLM_FIXTURES") or None,
+    )
+
+
+def _message_text(messages: List[Dict[str, Any]]) -> List[str]:
+    """Text of each message, with content blocks joined and cache hints dropped."""
+    texts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "\n\n".join(block.get("text", "") for block in content)
+        texts.append(content)
+    return texts
+
+
+def fixture_key(messages: List[Dict[str, Any]], response_format: Optional[dict]) -> str:
+    """
+    Key a request for fixture replay.
+
+    Depends only on the message text and the response schema, so a response
+    recorded from any provider replays under any mock model.
+    """
+    payload = json.dumps(
+        {"messages": _message_text(messages), "response_format": response_format},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _resolve_ref(ref: str, root: dict) -> dict:
+    node: Any = root
+    for part in ref.lstrip("#/").split("/"):
+        node = node.get(part, {}) if isinstance(node, dict) else {}
+    return node if isinstance(node, dict) else {}
+
+
+class SchemaSynthesizer:
+    """Builds a value that conforms to a JSON schema from a seeded RNG."""
+
+    def __init__(self, rng: random.Random, array_items: Tuple[int, int] = (1, 3)):
+        self.rng = rng
+        self.array_items = array_items
+
+    def synthesize(self, schema: dict) -> Any:
+        return self._value(schema, schema, "value", 0)
+
+    def _value(self, schema: dict, root: dict, name: str, depth: int) -> Any:
+        if not isinstance(schema, dict):
+            return None
+        if "$ref" in schema:
+            return self._value(_resolve_ref(schema["$ref"], root), root, name, depth)
+        if "const" in schema:
+            return schema["const"]
+        if schema.get("enum"):
+            return self.rng.choice(schema["enum"])
+        for combinator in ("anyOf", "oneOf"):
+            options = [
+                s for s in schema.get(combinator, []) if s.get("type") != "null"
+            ] or schema.get(combinator, [])
+            if options:
+                return self._value(self.rng.choice(options), root, name, depth)
+        if schema.get("allOf"):
+            merged: Dict[str, Any] = {}
+            for part in schema["allOf"]:
+                merged.update(part)
+            return self._value(merged, root, name, depth)
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            schema_type = next((t for t in schema_type if t != "null"), "null")
+        if schema_type is None:
+            schema_type = "object" if "properties" in schema else "string"
+
+        if schema_type == "object":
+            if depth >= MAX_SCHEMA_DEPTH:
+                return {}
+            return {
+                key: self._value(sub, root, key, depth + 1)
+                for key, sub in schema.get("properties", {}).items()
+            }
+        if schema_type == "array":
+            if depth >= MAX_SCHEMA_DEPTH:
+                return []
+            lo = max(self.array_items[0], schema.get("minItems", 0))
+            hi = max(lo, min(self.array_items[1], schema.get("maxItems", 1 << 30)))
+            items = schema.get("items", {})
+            return [
+                self._value(items, root, name, depth + 1)
+                for _ in range(self.rng.randint(lo, hi))
+            ]
+        if schema_type == "integer":
+            lo = int(schema.get("minimum", 1))
+            return self.rng.randint(lo, int(schema.get("maximum", lo + 999)))
+        if schema_type == "number":
+            lo = float(schema.get("minimum", 0.0))
+            return round(self.rng.uniform(lo, float(schema.get("maximum", lo + 1))), 4)
+        if schema_type == "boolean":
+            return self.rng.random() < 0.5
+        if schema_type == "null":
+            return None
+        return f"mock {name} {self.rng.randint(1, 9999)}"
+
+
+class MockLLM:
+    """Stands in for litellm.acompletion for "mock/" models."""
+
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        self.config = config or MockLLMConfig()
+        self._sample_latency = parse_latency(self.config.latency)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._fixtures: Optional[Tuple[Dict[str, dict], List[dict]]] = None
+        self.calls = 0
+        self.fixture_hits = 0
+        self.injected: Dict[str, int] = {}
+
+    def _load_fixtures(self) -> Tuple[Dict[str, dict], List[dict]]:
+        if self._fixtures is not None:
+            return self._fixtures
+        by_key: Dict[str, dict] = {}
+        by_match: List[dict] = []
+        path = Path(self.config.fixtures) if self.config.fixtures else None
+        files = []
+        if path is not None:
+            files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    fixture = json.loads(line)
+                    if "key" in fixture:
+                        by_key[fixture["key"]] = fixture
+                    elif "match" in fixture:
+                        by_match.append(fixture)
+        if files:
+            logger.info(
+                f"Loaded {len(by_key) + len(by_match)} mock LLM fixtures from {path}"
+            )
+        self._fixtures = (by_key, by_match)
+        return self._fixtures
+
+    def _find_fixture(
+        self, messages: List[Dict[str, Any]], response_format: Optional[dict]
+    ) -> Optional[dict]:
+        by_key, by_match = self._load_fixtures()
+        fixture = by_key.get(fixture_key(messages, response_format))
+        if fixture is None and by_match:
+            text = "\n".join(_message_text(messages))
+            fixture = next((f for f in by_match if f["match"] in text), None)
+        return fixture
+
+    def _draw(self) -> Tuple[float, Optional[str]]:
+        """Latency to first token and the error to inject, if any."""
+        with self._lock:
+            self.calls += 1
+            latency = max(0.0, self._sample_latency(self._rng))
+            roll = self._rng.random()
+        config = self.config
+        for error, rate in (
+            ("rate_limit", config.rate_limit_rate),
+            ("server_error", config.server_error_rate),
+            ("timeout", config.timeout_rate),
+        ):
+            if roll < rate:
+                return latency, error
+            roll -= rate
+        return latency, None
+
+    def _raise(self, error: str, model: str) -> None:
+        with self._lock:
+            self.injected[error] = self.injected.get(error, 0) + 1
+        if error == "rate_limit":
+            raise MockRateLimitError(
+                f"{model}: rate limit exceeded (injected)", self.config.retry_after
+            )
+        if error == "server_error":
+            raise MockServiceUnavailableError(f"{model}: service unavailable (injected)")
+        raise MockTimeoutError(f"{model}: request timed out (injected)")
+
+    def _respond(
+        self, messages: List[Dict[str, Any]], response_format: Optional[dict]
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        fixture = self._find_fixture(messages, response_format)
+        if fixture is not None:
+            with self._lock:
+                self.fixture_hits += 1
+            response = fixture["response"]
+            if not isinstance(response, str):
+                response = json.dumps(response)
+            return response, fixture.get("usage")
+        if not response_format:
+            return "This is a mock response.", None
+        # Same request and seed, same content, however calls interleave
+        seed = f"{self.config.seed}:{fixture_key(messages, response_format)}"
+        synthesizer = SchemaSynthesizer(random.Random(seed), self.config.array_items)
+        return json.dumps(synthesizer.synthesize(response_format)), None
+
+    async def acompletion(self, **params) -> Any:
+        """Answer a completion request shaped like litellm.acompletion's."""
+        model = params.get("model", MOCK_PROVIDER)
+        messages = params.get("messages", [])
+        # Mock models get OpenAI-style native structured output
+        native = params.get("response_format") or {}
+        response_format = native.get("json_schema", {}).get("schema")
+
+        latency, error = self._draw()
+        if error == "timeout":
+            await asyncio.sleep(self.config.timeout_seconds)
+            self._raise(error, model)
+        await asyncio.sleep(latency)
+        if error is not None:
+            self._raise(error, model)
+
+        content, usage = self._respond(messages, response_format)
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(messages)
+        completion_tokens = (
+            self.config.completion_tokens
+            or usage.get("completion_tokens")
+            or len(content) // CHARS_PER_TOKEN + 1
+        )
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=None,
+        )
+        if params.get("stream"):
+            return self._stream(model, content, usage)
+        if self.config.tokens_per_second > 0:
+            await asyncio.sleep(completion_tokens / self.config.tokens_per_second)
+
+        return SimpleNamespace(
+            model=model,
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(role="assistant", content=content),
+                    finish_reason="stop",
+                )
+            ],
+            usage=usage,
+        )
+
+    async def _stream(self, model: str, content: str, usage: Any):
+        """Yield content as delta chunks over the generation time, then usage."""
+        pieces = [
+            content[i : i + STREAM_CHUNK_CHARS]
+            for i in range(0, len(content), STREAM_CHUNK_CHARS)
+        ]
+        delay = 0.0
+        if self.config.tokens_per_second > 0 and pieces:
+            generation_s = usage.completion_tokens / self.config.tokens_per_second
+            delay = generation_s / len(pieces)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for n, piece in enumerate(pieces, 1):
+            # Paced against the start, so per-sleep overshoot does not add up
+            await asyncio.sleep(max(0.0, start + n * delay - loop.time()))
+            yield SimpleNamespace(
+                model=model,
+                choices=[
+                    SimpleNamespace(
+                        delta=SimpleNamespace(role="assistant", content=piece),
+                        finish_reason=None,
+                    )
+                ],
+                usage=None,
+            )
+        yield SimpleNamespace(model=model, choices=[], usage=usage)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "fixture_hits": self.fixture_hits,
+                "injected_errors": dict(self.injected),
+                "latency": self.config.latency,
+            }
+
+
+_RECORD_LOCK = threading.Lock()
+
+
+def record_fixture(
+    path: str,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[dict],
+    response_text: str,
+    usage: Optional[UsageInfo],
+) -> None:
+    """
+    Append a real response to a JSONL fixture file for later mock replay.
+
+    messages must be built as for a mock model (see llm.build_messages) so
+    that the key matches the replayed request.
+    """
+    fixture = {
+        "key": fixture_key(messages, response_format),
+        "model": usage.model if usage else "",
+        "response": response_text,
+    }
+    if usage is not None:
+        fixture["usage"] = {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        }
+    line = json.dumps(fixture, ensure_ascii=False)
+    with _RECORD_LOCK:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+_MOCK_LLM: Optional[MockLLM] = None
+_MOCK_LLM_LOCK = threading.Lock()
+
+
+def get_mock_llm() -> MockLLM:
+    """Get the global mock provider, configured from the environment on first use."""
+    global _MOCK_LLM
+    with _MOCK_LLM_LOCK:
+        if _MOCK_LLM is None:
+            _MOCK_LLM = MockLLM(_config_from_env())
+        return _MOCK_LLM
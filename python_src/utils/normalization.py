@@ -11,7 +11,19 @@ import os
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Tuple
 
-from term_normalization.term_lookup import normalize_annotation
+from term_normalization.term_lookup import (
+    DEFAULT_BATCH_WORKERS,
+    normalize_annotation,
+    normalize_annotations,
+    normalize_annotations_batch,
+    normalize_annotations_many,
+    save_annotations,
+)
+from term_normalization.process_pool import (
+    normalize_dict_in_pool,
+    normalize_file_in_pool,
+    normalize_files_in_pool,
+)
 
 
 def normalize_output_file(
@@ -47,8 +59,50 @@ def normalize_output_file(
         return False
 
 
+def normalize_files_batch(
+    input_files: List[Path],
+    in_place: bool = True,
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+) -> List[Tuple[str, bool, Optional[str]]]:
+    """
+    Normalize a set of files together, resolving each unique term only once.
+
+    The distinct variant and drug strings across all files are looked up in
+    one parallel pass before any file is rewritten, so terms repeated across
+    files cost a single lookup.
+
+    Args:
+        input_files: JSON files to normalize
+        in_place: If True, overwrite original files; if False, create *_normalized.json
+        max_workers: Number of threads used to resolve terms
+
+    Returns:
+        List of (filename, success, error_message) per file
+    """
+    pairs = []
+    for input_file in input_files:
+        if in_place:
+            pairs.append((input_file, input_file.with_suffix(".json.tmp")))
+        else:
+            pairs.append(
+                (input_file, input_file.with_stem(f"{input_file.stem}_normalized"))
+            )
+
+    results = []
+    outcomes = normalize_annotations_batch(pairs, max_workers=max_workers)
+    for (input_file, output_file), (_, success, error) in zip(pairs, outcomes):
+        if success and in_place:
+            output_file.replace(input_file)
+        results.append((input_file.name, success, error))
+    return results
+
+
 def normalize_outputs_in_directory(
-    directory: str, in_place: bool = True, verbose: bool = True
+    directory: str,
+    in_place: bool = True,
+    verbose: bool = True,
+    batch: bool = False,
+    processes: int = 0,
 ) -> Tuple[int, int]:
     """
     Normalize all JSON output files in a directory.
@@ -57,6 +111,10 @@ def normalize_outputs_in_directory(
         directory: Directory containing output JSON files
         in_place: If True, overwrite original files; if False, create *_normalized.json
         verbose: Whether to print progress messages
+        batch: Resolve the unique terms across all files once up front
+            (see normalize_files_batch) instead of file by file
+        processes: If > 0, normalize files in that many worker processes
+            (see term_normalization.process_pool); ignored with batch
 
     Returns:
         Tuple of (successful_count, failed_count)
@@ -83,26 +141,27 @@ def normalize_outputs_in_directory(
     successful = 0
     failed = 0
 
-    for input_file in json_files:
-        try:
-            if in_place:
-                # Normalize in place using temp file
-                temp_file = input_file.with_suffix(".json.tmp")
-                normalize_annotation(input_file, temp_file)
-                temp_file.replace(input_file)
-            else:
-                # Create separate normalized file
-                output_file = input_file.with_stem(f"{input_file.stem}_normalized")
-                normalize_annotation(input_file, output_file)
-
+    if batch:
+        results = normalize_files_batch(json_files, in_place)
+    elif processes > 0:
+        pairs = [(f, _output_path(f, in_place)) for f in json_files]
+        outcomes = normalize_files_in_pool(pairs, max_workers=processes)
+        results = [
+            (f.name, success, error)
+            for f, (success, error) in zip(json_files, outcomes)
+        ]
+    else:
+        results = (_normalize_single_file(f, in_place) for f in json_files)
+
+    for filename, success, error in results:
+        if success:
             successful += 1
             if verbose:
-                print(f"  ✓ Normalized: {input_file.name}")
-
-        except Exception as e:
+                print(f"  ✓ Normalized: {filename}")
+        else:
             failed += 1
             if verbose:
-                print(f"  ✗ Failed: {input_file.name} - {e}")
+                print(f"  ✗ Failed: {filename} - {error}")
 
     if verbose:
         print(f"Normalization complete: {successful} successful, {failed} failed")
@@ -122,39 +181,42 @@ def normalize_output_dict(output_data: Dict) -> Dict:
 
     Returns:
         Normalized output dictionary (new copy)
-
-    Note:
-        This function saves to a temp file, normalizes it, and loads it back.
-        It's not as efficient as direct in-memory normalization but ensures
-        consistency with the file-based normalization logic.
     """
-    import tempfile
+    return normalize_annotations(output_data)
 
-    # Create temp files
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".json", delete=False
-    ) as input_tmp:
-        json.dump(output_data, input_tmp, indent=2)
-        input_path = input_tmp.name
 
-    output_path = input_path.replace(".json", "_normalized.json")
+def normalize_output_dicts(
+    outputs: Dict[str, Dict], max_workers: int = DEFAULT_BATCH_WORKERS
+) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Normalize several output dictionaries in memory, resolving each unique term once.
 
-    try:
-        # Normalize via file
-        normalize_annotation(input_path, output_path)
+    Args:
+        outputs: Output dictionaries keyed by name (e.g. PMCID)
+        max_workers: Number of threads used to resolve terms
+
+    Returns:
+        Dictionary mapping each name to (normalized copy or None, error message or None)
+    """
+    names = list(outputs)
+    results = normalize_annotations_many(
+        [outputs[name] for name in names], max_workers=max_workers
+    )
+    return dict(zip(names, results))
 
-        # Load normalized result
-        with open(output_path, "r") as f:
-            normalized_data = json.load(f)
 
-        return normalized_data
+def write_output_file(output_data: Dict, output_file: Path) -> None:
+    """
+    Atomically replace an output file with output_data (via a temp file).
 
-    finally:
-        # Clean up temp files
-        if os.path.exists(input_path):
-            os.remove(input_path)
-        if os.path.exists(output_path):
-            os.remove(output_path)
+    Args:
+        output_data: Output dictionary to write
+        output_file: Destination JSON file
+    """
+    output_file = Path(output_file)
+    temp_file = output_file.with_suffix(".json.tmp")
+    save_annotations(output_data, temp_file)
+    temp_file.replace(output_file)
 
 
 def check_normalization_status(output_file: str) -> bool:
@@ -245,6 +307,13 @@ def get_normalization_stats(output_file: str) -> Dict:
     return stats
 
 
+def _output_path(input_file: Path, in_place: bool) -> Path:
+    """Where the normalized version of input_file is written."""
+    if in_place:
+        return input_file
+    return input_file.with_stem(f"{input_file.stem}_normalized")
+
+
 def _normalize_single_file(input_file: Path, in_place: bool) -> Tuple[str, bool, Optional[str]]:
     """
     Normalize a single file (internal helper for async wrapper).
@@ -270,7 +339,7 @@ def _normalize_single_file(input_file: Path, in_place: bool) -> Tuple[str, bool,
 
 
 async def normalize_single_file_async(
-    file_path: Path, in_place: bool = True
+    file_path: Path, in_place: bool = True, use_processes: bool = False
 ) -> Tuple[str, bool, Optional[str]]:
     """
     Normalize a single file asynchronously.
@@ -281,22 +350,57 @@ async def normalize_single_file_async(
     Args:
         file_path: Path to the JSON file to normalize
         in_place: Whether to overwrite the original file (default True)
+        use_processes: Run on the shared process pool instead of a thread
 
     Returns:
         Tuple of (filename, success, error_message)
 
     Note:
-        PharmGKB API calls are rate-limited by the global semaphore
-        in term_normalization.cache (max 2 concurrent API calls).
+        PharmGKB and RxNorm API calls are rate-limited per API by the shared
+        client in term_normalization.http_client.
     """
+    if use_processes:
+        success, error = await normalize_file_in_pool(
+            file_path, _output_path(file_path, in_place)
+        )
+        return (file_path.name, success, error)
     return await asyncio.to_thread(_normalize_single_file, file_path, in_place)
 
 
+async def normalize_output_dict_async(
+    output_data: Dict, output_file: Optional[Path] = None, use_processes: bool = False
+) -> Dict:
+    """
+    Normalize an output dictionary in a worker thread (or process).
+
+    Args:
+        output_data: Output dictionary with annotations (not modified)
+        output_file: If given, the normalized output is also written here
+        use_processes: Run on the shared process pool instead of a thread,
+            keeping the CPU-bound matching off the event loop's GIL
+
+    Returns:
+        Normalized output dictionary (new copy); lookup errors are raised
+    """
+    if use_processes:
+        return await normalize_dict_in_pool(output_data, output_file)
+
+    def run() -> Dict:
+        normalized = normalize_annotations(output_data)
+        if output_file is not None:
+            write_output_file(normalized, output_file)
+        return normalized
+
+    return await asyncio.to_thread(run)
+
+
 async def normalize_outputs_in_directory_async(
     directory: str,
     in_place: bool = True,
     concurrency: int = 10,
     progress_callback: Optional[Callable[[str, int, int], None]] = None,
+    batch: bool = False,
+    use_processes: bool = False,
 ) -> Tuple[int, int]:
     """
     Normalize all JSON output files in a directory concurrently.
@@ -306,13 +410,19 @@ async def normalize_outputs_in_directory_async(
         in_place: If True, overwrite original files; if False, create *_normalized.json
         concurrency: Maximum number of files to process concurrently (default 10)
         progress_callback: Optional callback called after each file with (filename, completed, total)
+        batch: Resolve the unique terms across all files in one pass
+            (see normalize_files_batch); concurrency then sets the lookup
+            thread count
+        use_processes: Normalize files on the shared process pool
+            (term_normalization.process_pool) instead of threads, so
+            throughput scales with cores; ignored with batch
 
     Returns:
         Tuple of (successful_count, failed_count)
 
     Note:
-        PharmGKB API calls are rate-limited separately (max 2 concurrent) via
-        the global semaphore in term_normalization.cache. This concurrency
+        PharmGKB and RxNorm API calls are rate-limited separately (requests
+        per second) by term_normalization.http_client. This concurrency
         parameter controls file-level parallelism.
     """
     if not os.path.exists(directory):
@@ -332,13 +442,28 @@ async def normalize_outputs_in_directory_async(
     failed = 0
     completed = 0
 
+    if batch:
+        results = await asyncio.to_thread(
+            normalize_files_batch, json_files, in_place, concurrency
+        )
+        for filename, success, _ in results:
+            completed += 1
+            if success:
+                successful += 1
+            else:
+                failed += 1
+            if progress_callback:
+                progress_callback(filename, completed, total)
+        return (successful, failed)
+
     # Semaphore for file-level concurrency
     semaphore = asyncio.Semaphore(concurrency)
 
     async def process_file(input_file: Path) -> Tuple[str, bool, Optional[str]]:
         async with semaphore:
-            # Run synchronous normalization in thread pool
-            return await asyncio.to_thread(_normalize_single_file, input_file, in_place)
+            return await normalize_single_file_async(
+                input_file, in_place, use_processes=use_processes
+            )
 
     # Create tasks for all files
     tasks = [process_file(f) for f in json_files]